@@ -0,0 +1,294 @@
+#
+# On-disk cache of fully processed table data, stored as Parquet files.
+#
+# Loading a table from CSV requires parsing the file(s) and then post-processing
+# the data (key and sensitivity fix-ups, NaN => None conversion, etc.) The cache
+# stores the result of this work along with the metadata computed from it, keyed
+# by a hash of the options that affect loading (including the source files' paths)
+# and a hash of the source files' size, mtime and content. Subsequent loads of an
+# unchanged table with the same options read the cache. Databases loading a table
+# with different options can share a cache directory, since each keeps its own entry.
+#
+# Also provides TimeseriesCache, a bounded in-memory LRU cache of the attributes
+# and cleaned timeseries loaded by DataObject.load_timeseries().
+#
+from collections import OrderedDict
+import hashlib
+import json
+import os
+from glob import glob
+
+from .error import CsvdbException
+from .utils import file_digest
+
+# Bump this whenever a change to CsvTable.load_all alters the data it produces
+CACHE_VERSION = 1
+
+# Key for the csvdb-specific info stored in the Parquet schema metadata
+_META_KEY = b'csvdb'
+
+
+def _digest(info):
+    text = json.dumps(info, sort_keys=True, default=str)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def _metadata_state(md):
+    from .database import CsvMetadata
+
+    state = {attr: getattr(md, attr) for attr in CsvMetadata.__slots__}
+    state['lowcase_cols'] = sorted(state['lowcase_cols'])
+    return state
+
+
+class TableCache(object):
+    """
+    Stores the processed data for each CsvTable in a Parquet file named
+    "{table_name}.{options}.{contents}.parquet" in the given directory, where
+    `options` is a digest of the options the table was loaded with, and `contents`
+    a digest of its source files. Requires pyarrow.
+    """
+    def __init__(self, cache_dir):
+        try:
+            import pyarrow
+        except ImportError:
+            raise CsvdbException("The table cache requires the 'pyarrow' package")
+
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, tbl_name, key):
+        return os.path.join(self.cache_dir, '{}.{}.parquet'.format(tbl_name, key))
+
+    def key(self, tbl):
+        """
+        Compute the cache key for a CsvTable, which must not yet have loaded its
+        data, since loading modifies the table's metadata.
+
+        :param tbl: (CsvTable) the table to compute a key for
+        :return: (str) the key, "{options}.{contents}", or None if the table has a
+           user-defined row filter or the source files can't be read, in which case the
+           table should be loaded without the cache.
+        """
+        if tbl.row_filter:
+            return None
+
+        filenames = tbl.filename if type(tbl.filename) is list else [tbl.filename]
+
+        try:
+            files = []
+            for fn in filenames:
+                st = os.stat(fn)
+                files.append((st.st_size, st.st_mtime_ns, file_digest(fn)))
+        except OSError:
+            return None
+
+        options = [CACHE_VERSION, [os.path.abspath(fn) for fn in filenames], tbl.engine, tbl.output_table,
+                   tbl.compile_sensitivities, tbl.filter_columns, tbl.project_columns, tbl.str_cols,
+                   tbl.column_filters(), _metadata_state(tbl.metadata)]
+
+        return '{}.{}'.format(_digest(options), _digest(files))
+
+    def read(self, tbl, key):
+        """
+        Set the data and metadata of `tbl` from the cache, if the cache holds
+        an entry for `key`.
+
+        :param tbl: (CsvTable) the table to set
+        :param key: (str) the key computed by `self.key(tbl)`
+        :return: (bool) True if the data was read from the cache, else False
+        """
+        import pyarrow.parquet as pq
+
+        path = self._path(tbl.name, key)
+        if not os.path.exists(path):
+            return False
+
+        try:
+            table = pq.read_table(path)
+        except Exception:
+            return False    # e.g., a partially written or corrupt file; just reload from CSV
+
+        info = json.loads(table.schema.metadata[_META_KEY].decode('utf-8'))
+        if info.get('engine') != tbl.engine:
+            return False    # written by the other read engine; the key should prevent this
+
+        df = table.to_pandas()
+
+        # Restore the original dtypes, and None in place of NaN in object columns
+        for col, dtype in zip(df.columns, info['dtypes']):
+            if str(df[col].dtype) == dtype:
+                continue
+
+            if dtype == 'object':
+                series = df[col].astype(object)
+                df[col] = series.where(series.notna(), None)
+            else:
+                df[col] = df[col].astype(dtype)
+
+        md = tbl.metadata
+        for attr, value in info['metadata'].items():
+            setattr(md, attr, set(value) if attr == 'lowcase_cols' else value)
+
+        tbl.data = df
+        return True
+
+    def write(self, tbl, key):
+        """
+        Store the data and metadata of `tbl` in the cache under `key`, replacing
+        any older entries for the same table and options. Tables whose data can't be stored
+        in Parquet format (e.g., columns holding a mix of strings and numbers)
+        are silently not cached.
+
+        :param tbl: (CsvTable) a table whose data has been loaded
+        :param key: (str) the key computed by `self.key(tbl)` before loading
+        :return: (bool) True if the data was written to the cache, else False
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        df = tbl.data
+        if df is None:
+            return False
+
+        info = {'engine': tbl.engine,
+                'dtypes': [str(dtype) for dtype in df.dtypes],
+                'metadata': _metadata_state(tbl.metadata)}
+
+        try:
+            table = pa.Table.from_pandas(df)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            return False
+
+        metadata = dict(table.schema.metadata or {})
+        metadata[_META_KEY] = json.dumps(info).encode('utf-8')
+        table = table.replace_schema_metadata(metadata)
+
+        # Entries for other options are kept, since other databases may be using them
+        path = self._path(tbl.name, key)
+        options = key.split('.')[0]
+        for old in glob(self._path(tbl.name, options + '.*')):
+            if old != path:
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+
+        # Write to a temporary file and rename, so readers never see a partial file
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+        return True
+
+
+class TimeseriesCache(object):
+    """
+    A bounded, least-recently-used cache of the results of DataObject.load_timeseries(),
+    keyed by (table_name, key, sensitivity, filters, cleanup function). Since the key
+    holds the resolved sensitivity rather than the scenario, scenarios that resolve to
+    the same data share entries. The size can be limited by number of entries, by the
+    approximate memory used by the cached timeseries, or both.
+    """
+    def __init__(self, max_entries=None, max_bytes=None):
+        if max_entries is not None and max_entries < 1:
+            raise CsvdbException("TimeseriesCache: max_entries must be at least 1; got {}".format(max_entries))
+
+        if max_bytes is not None and max_bytes < 1:
+            raise CsvdbException("TimeseriesCache: max_bytes must be at least 1; got {}".format(max_bytes))
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()    # key => (value, nbytes)
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def size_of(df):
+        """
+        Return the approximate memory used by a DataFrame or Series, or 0 for None.
+        """
+        if df is None:
+            return 0
+
+        usage = df.memory_usage(index=True, deep=True)
+        return int(usage.sum()) if hasattr(usage, 'sum') else int(usage)
+
+    def get(self, key):
+        """
+        Return the value stored under `key`, marking it most recently used, or
+        None if there is no such entry.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, value, nbytes=0):
+        """
+        Store `value` under `key`, evicting the least recently used entries as needed
+        to stay within the limits. Values larger than `max_bytes` are not stored.
+
+        :param key: (tuple) the cache key; the first element is the table name
+        :param value: the value to store
+        :param nbytes: (int) the approximate memory used by `value`
+        :return: (bool) True if the value was stored, else False
+        """
+        if self.max_bytes is not None and nbytes > self.max_bytes:
+            return False
+
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.nbytes -= old[1]
+
+        self.entries[key] = (value, nbytes)
+        self.nbytes += nbytes
+
+        while ((self.max_entries is not None and len(self.entries) > self.max_entries) or
+               (self.max_bytes is not None and self.nbytes > self.max_bytes)):
+            _, (_, size) = self.entries.popitem(last=False)
+            self.nbytes -= size
+            self.evictions += 1
+
+        return True
+
+    def invalidate(self, table_name=None):
+        """
+        Drop the cached entries for the given table, or all entries if `table_name` is None.
+        The hit and miss counts are not reset.
+
+        :param table_name: (str) the name of a table, or None
+        :return: (int) the number of entries dropped
+        """
+        if table_name is None:
+            count = len(self.entries)
+            self.entries.clear()
+            self.nbytes = 0
+            return count
+
+        keys = [key for key in self.entries if key[0] == table_name]
+        for key in keys:
+            self.nbytes -= self.entries.pop(key)[1]
+
+        return len(keys)
+
+    def stats(self):
+        """
+        Return a dict of the cache's hit, miss and eviction counts, and its current size.
+        """
+        lookups = self.hits + self.misses
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self.entries),
+                'bytes': self.nbytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes}
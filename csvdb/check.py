@@ -5,6 +5,7 @@ import types
 from .error import CsvdbException, ValidationFormatError
 import pdb
 import numpy as np
+import pandas as pd
 
 _True  = ['t', 'y', 'true',  'yes', 'on']
 _False = ['f', 'n', 'false', 'no',  'off']
@@ -13,48 +14,106 @@ _Bool  = _True + _False
 def str_to_bool(value):
     return isinstance(value, str) and value.lower() in _True
 
-def _check_bool(series, nullable):
-    bad = []
+def _is_bool(value):
+    return isinstance(value, (bool, np.bool_)) or (isinstance(value, str) and value.lower() in _Bool)
+
+def _is_str(value):
+    return isinstance(value, str)
 
-    for i, value in series.items():
-        if value is None and nullable:
-            continue
+def _converts(aType):
+    def converts(value):
+        try:
+            aType(value)
+            return True
+        except:
+            return False
 
-        if not isinstance(value, (bool, np.bool_)) and (not isinstance(value, str) or value.lower() not in _Bool):
-            bad.append((i, value))
+    return converts
 
-    return bad
+_converts_to_int = _converts(int)
+_converts_to_float = _converts(float)
 
-def _check_str(series, nullable):
-    bad = []
+def _bad_values(series, nullable, is_valid, dtype_bad=None):
+    """
+    Return the (index, value) pairs of the values in `series` for which `is_valid(value)`
+    is False, skipping None values if `nullable`. The values of an object column are grouped
+    by type: each distinct string is checked once, and the values of any other type that
+    pandas stores with a numpy dtype (e.g., numbers and booleans) are checked together by
+    `dtype_bad`. Only values of other types, e.g., pandas.NA, are checked one by one.
+
+    :param series: (pandas.Series) the values to check
+    :param nullable: (bool) whether None is a valid value
+    :param is_valid: (callable) tests a single value
+    :param dtype_bad: (callable) if given, called with a series with a numpy dtype (other than
+       object) to return a boolean mask of its bad values, or None to check it value by value.
+    :return: (list of (index, value) tuples) the bad values, in order
+    """
+    mask = _dtype_bad_mask(series, dtype_bad)
+    if mask is not None:
+        return list(series[mask].items())
 
-    for i, value in series.items():
-        if value is None and nullable:
-            continue
+    values = series.to_numpy(dtype=object)
+    count = len(values)
+    type_codes, types = pd.factorize(np.fromiter(map(type, values), dtype=object, count=count))
 
-        if not isinstance(value, str):
-            bad.append((i, value))
+    ok = np.zeros(count, dtype=bool)
+    for code, value_type in enumerate(types):
+        rows = type_codes == code
+        group = values[rows]
 
-    return bad
+        if issubclass(value_type, str):
+            codes, uniques = pd.factorize(group)
+            valid = np.fromiter((is_valid(value) for value in uniques), dtype=bool, count=len(uniques))
+            ok[rows] = valid[codes]
 
-def _check_type(series, aType, nullable):
-    bad = []
+        elif value_type is type(None):
+            ok[rows] = nullable or is_valid(None)
 
-    for i, value in series.items():
-        if value is None and nullable:
-            continue
-        try:
-            aType(value)
-        except:
-            bad.append((i, value))
+        else:
+            mask = _dtype_bad_mask(pd.Series(group.tolist()), dtype_bad)
+            ok[rows] = ~mask if mask is not None else [is_valid(value) for value in group]
+
+    return list(series[~ok].items())
+
+def _dtype_bad_mask(series, dtype_bad):
+    if dtype_bad and isinstance(series.dtype, np.dtype) and series.dtype != object:
+        return dtype_bad(series)
+
+    return None
+
+def _numpy_kind(kinds, bad=None):
+    """
+    Return a dtype_bad function for _bad_values(): series whose dtype kind is in `kinds` have
+    no bad values, and others are checked by `bad`, if given, else value by value.
+    """
+    def dtype_bad(series):
+        if series.dtype.kind in kinds:
+            return np.zeros(len(series), dtype=bool)
+        return bad(series) if bad else None
+
+    return dtype_bad
+
+def _all_bad(series):
+    return np.ones(len(series), dtype=bool)
+
+def _not_finite(series):
+    # int() fails for NaN and infinity, but succeeds for all other floats
+    return ~np.isfinite(series.to_numpy()) if series.dtype.kind == 'f' else None
+
+def _check_bool(series, nullable):
+    return _bad_values(series, nullable, _is_bool, _numpy_kind('b', _all_bad))
+
+def _check_str(series, nullable):
+    if pd.api.types.is_string_dtype(series.dtype) and series.dtype != object:
+        return list(series[series.isna()].items())     # missing values are NaN, not None
 
-    return bad
+    return _bad_values(series, nullable, _is_str, _numpy_kind('', _all_bad))
 
 def _check_float(series, nullable):
-    return _check_type(series, float, nullable)
+    return _bad_values(series, nullable, _converts_to_float, _numpy_kind('iubf'))
 
 def _check_int(series, nullable):
-    return _check_type(series, int, nullable)
+    return _bad_values(series, nullable, _converts_to_int, _numpy_kind('iub', _not_finite))
 
 _check_fns = {
     'int'            : _check_int,
@@ -88,6 +147,117 @@ def _extract_name(path):
     parts = basename.split('.')
     return parts[0]
 
+def _value_set(values):
+    """
+    Return a frozenset of `values`, for validating large columns, or None if
+    some value isn't hashable.
+    """
+    try:
+        return frozenset(values)
+    except TypeError:
+        return None
+
+class ReferenceSets(object):
+    """
+    Per-database registry of the legal values that ValidationInfo objects collect from
+    referenced columns, keyed by (ref_tbl, ref_col), and from folders, keyed by folder.
+    Each is computed once, when first needed, and shared by all the ValidationInfo
+    objects that refer to it. Entries for a table must be dropped by calling invalidate()
+    when the table is reloaded or saved; see CsvDatabase.invalidate_reference_sets().
+    While frozen, invalidation is deferred until thaw() is called, so that a set of
+    tables can be validated against the same values while some of them are rewritten.
+    """
+    def __init__(self, db):
+        self.db = db
+        self.entries = {}   # (ref_tbl, ref_col) or folder => (values, value_set)
+        self.frozen = False
+        self.pending = set()
+
+    def column(self, ref_tbl, ref_col):
+        """
+        Return the distinct values of the column `ref_col` of the table `ref_tbl`.
+
+        :return: (tuple of (list, frozenset or None)) the values, in order of appearance,
+           and their set, if they are hashable
+        :raises ValidationFormatError: if the table or column is unknown
+        """
+        key = (ref_tbl, ref_col)
+        entry = self.entries.get(key)
+        if entry is None:
+            try:
+                tbl = self.db.get_table(ref_tbl, all_columns=True)
+            except CsvdbException:
+                raise ValidationFormatError("unknown table '{}'".format(ref_tbl))
+
+            if ref_col not in tbl.data.columns:
+                raise ValidationFormatError("unknown column '{}' in table '{}'".format(ref_col, ref_tbl))
+
+            values = list(tbl.data[ref_col].unique())
+            entry = self.entries[key] = (values, _value_set(values))
+
+        return entry
+
+    def check_column(self, ref_tbl, ref_col):
+        """
+        Check that the table `ref_tbl` has a column `ref_col`, using the header of the
+        table's file(s) if it lists the column, so the table is loaded only when its values
+        are needed. Otherwise, the table is loaded to check it as column() does.
+
+        :raises ValidationFormatError: if the table or column is unknown
+        """
+        db = self.db
+        if (ref_tbl, ref_col) in self.entries:
+            return
+
+        # Output tables and sensitivity catalogues don't hold the files' columns as read
+        if not (db.output_tables or db.compile_sensitivities) and ref_col in (db.source_columns(ref_tbl) or []):
+            return
+
+        self.column(ref_tbl, ref_col)
+
+    def folder(self, folder):
+        """
+        Return the names of the files in the database subdirectory `folder`.
+
+        :return: (tuple of (list, frozenset)) the names and their set
+        """
+        entry = self.entries.get(folder)
+        if entry is None:
+            pattern = os.path.join(self.db.pathname, folder, '*')
+            values = list(map(_extract_name, glob(pattern)))
+            entry = self.entries[folder] = (values, _value_set(values))
+
+        return entry
+
+    def invalidate(self, tbl_name=None):
+        """
+        Drop the values taken from columns of the given table, or all values,
+        including those of folders, if `tbl_name` is None.
+        """
+        if self.frozen:
+            self.pending.add(tbl_name)
+            return
+
+        if tbl_name is None:
+            self.entries.clear()
+        else:
+            for key in [key for key in self.entries if type(key) is tuple and key[0] == tbl_name]:
+                del self.entries[key]
+
+    def freeze(self):
+        self.frozen = True
+
+    def thaw(self):
+        """
+        End a freeze(), dropping the entries invalidated while frozen.
+        """
+        pending = None if None in self.pending else self.pending
+        self.frozen = False
+        self.pending = set()
+
+        for tbl_name in ([None] if pending is None else sorted(pending)):
+            self.invalidate(tbl_name)
+
 # we have a set of valid inputs, but also want to allow null
 # we have a referenced table and referenced field, but also want to add additional valid options to it (less critical)
 # we have a foreign key constraint within the same table
@@ -110,39 +280,24 @@ class ValidationInfo(object):
         self.ref_tbl2 = ref_tbl2
         self.ref_col2 = ref_col2
         self.cascade_delete = str_to_bool(cascade_delete)
+        self.extra_values = extra_values
 
-        self.values = []    # all legal values given
+        # Values from a referenced folder or table.col are held in the database's shared
+        # ReferenceSets, so they're computed once and dropped if the table is reloaded.
+        self.reference_sets = db.reference_sets
+        self.sources = []
+        self.allow_none = False
 
         if self.folder:
-            pattern = os.path.join(db.pathname, self.folder, '*')
-            paths = glob(pattern)
-            self.values = list(map(_extract_name, paths))
+            self.sources.append((self.folder,))
 
         elif ref_tbl and ref_col:
-            try:
-                tbl = db.get_table(ref_tbl)
-            except CsvdbException:
-                raise ValidationFormatError("unknown table '{}'".format(ref_tbl))
-
-            if ref_col not in tbl.data.columns:
-                raise ValidationFormatError("unknown column '{}' in table '{}'".format(ref_col, ref_tbl))
-
+            self.sources.append((ref_tbl, ref_col))
             if ref_tbl2 and ref_col2:
-                try:
-                    tbl2 = db.get_table(ref_tbl2)
-                except CsvdbException:
-                    raise ValidationFormatError("unknown table '{}'".format(ref_tbl2))
-
-                if ref_col2 not in tbl2.data.columns:
-                    raise ValidationFormatError("unknown column '{}' in table '{}'".format(ref_col2, ref_tbl2))
-
-                self.values = list(tbl.data[ref_col].unique()) + list(tbl2.data[ref_col2].unique())
-            else:
-                self.values = list(tbl.data[ref_col].unique())
+                self.sources.append((ref_tbl2, ref_col2))
 
             # TODO: handle this in metadata?
-            if ref_col == 'shape':
-                self.values.append(None)
+            self.allow_none = (ref_col == 'shape')
 
         if extra_values:
             # parse / validate numbers
@@ -151,7 +306,62 @@ class ValidationInfo(object):
             elif all(map(_is_float, extra_values)):
                 extra_values = list(map(float, extra_values))
 
-            self.values += extra_values
+        self.extra = extra_values   # the parsed extra values
+
+        self._combined = None       # (sources' entries, values, value_set) when sources are combined
+
+        # Report unknown tables and columns now; the values are collected when first needed
+        for source in self.sources:
+            if len(source) == 2:
+                self.reference_sets.check_column(*source)
+
+    def _source_entries(self):
+        sets = self.reference_sets
+        return [sets.folder(*source) if len(source) == 1 else sets.column(*source) for source in self.sources]
+
+    def _get_values(self):
+        entries = self._source_entries()
+
+        # A single source is shared as is
+        if len(entries) == 1 and not (self.allow_none or self.extra):
+            return entries[0]
+
+        combined = self._combined
+        if combined is None or len(combined[0]) != len(entries) or \
+                any(old is not new for old, new in zip(combined[0], entries)):
+            values = []
+            for entry_values, _ in entries:
+                values += entry_values
+
+            if self.allow_none:
+                values.append(None)
+
+            values += self.extra
+            combined = self._combined = (entries, values, _value_set(values))
+
+        return combined[1], combined[2]
+
+    def resolve(self):
+        """
+        Collect the values from the referenced folder or table columns, if not already done.
+        """
+        self._get_values()
+
+    @property
+    def values(self):
+        """
+        All legal values given (a list), from the referenced folder or table columns, if any,
+        and the additional valid inputs. Must not be modified, since it may be shared.
+        """
+        return self._get_values()[0]
+
+    @property
+    def value_set(self):
+        """
+        The hashed form of self.values, for validating large columns, or None if some
+        value isn't hashable.
+        """
+        return self._get_values()[1]
 
     def __str__(self):
         return "<ValidationInfo {}.{}>".format(self.table_name, self.column_name)
@@ -2,11 +2,13 @@
 from collections import defaultdict
 import pdb
 import logging
+import numpy as np
+import pandas as pd
 
 from .database import CsvDatabase
 from .error import SubclassProtocolError, CsvdbException
-from .table import SENSITIVITY_COL, REF_SENSITIVITY
-from .utils import filter_query, ensure_tuple
+from .table import SENSITIVITY_COL, REF_SENSITIVITY, REFERENCE_COL
+from .utils import ensure_tuple, indexable
 
 
 class StringMap(object):
@@ -92,6 +94,142 @@ class DataObject(object):
         self.init_from_db(key, scenario, **filters)
         return self
 
+    @classmethod
+    def load_all_from_db(cls, scenario, keys=None, **filters):
+        """
+        Create and load an instance of this class for each of the given keys, or for every key
+        in the table, with the same results as calling load_from_db() for each key. The rows of
+        all the keys are found and checked together in a single pass over the table (see
+        _find_key_rows()), and each key's timeseries is sliced from the table's timeseries frame.
+        Keys that this pass doesn't handle, e.g., those whose rows load_timeseries() would reject
+        with an error, are loaded by load_from_db().
+
+        :param scenario: (instance of subclass of csvdb.AbstractScenario) the scenario to load
+        :param keys: (iterable of str) the keys of the instances to load, or None for all keys
+           in the table, in the order in which they first appear.
+        :param filters (dict) additional col/value filtering to perform to isolate rows of interest
+        :return: (dict) the instances, keyed by key
+        """
+        db = get_database()
+        tbl = db.get_table(cls._table_name)
+
+        index = tbl.key_index()
+        if index is None:
+            raise CsvdbException("DataObject: table '{}' has no key column".format(cls._table_name))
+
+        keys = list(index) if keys is None else list(keys)
+        found = cls._find_key_rows(tbl, scenario, keys, filters)
+
+        instances = {}
+        for key in keys:
+            if key in found:
+                self = instances[key] = cls(key, scenario)
+                self._init_from_rows(key, scenario, *found[key])
+            else:
+                instances[key] = cls.load_from_db(key, scenario, **filters)
+
+        return instances
+
+    @classmethod
+    def _find_key_rows(cls, tbl, scenario, keys, filters):
+        """
+        Find the rows that load_timeseries() selects for each of the given keys in a single
+        pass over the table, and apply its checks to all of the keys at once. Keys are omitted
+        if they have no rows, or if load_timeseries() would report an error for them or handle
+        them in any other way than slicing the timeseries frame, so load_from_db() does that.
+        Nothing is returned if the class loads its data differently, if the database caches
+        timeseries, or if the filters can't be answered from an index.
+
+        :return: (dict) key => (attribute tuple, timeseries or None if the key's values are
+           all missing, function returning the key's value for an attribute column)
+        """
+        db = get_database()
+        md = tbl.metadata
+        df = tbl.data
+        key_col = md.key_col
+
+        if not all(col in df.columns and indexable(col, value) for col, value in filters.items()):
+            return {}
+
+        cols = tuple(sorted(set(filters) | {key_col}))
+        index = tbl.index(cols)
+
+        if not (md.df_cols and key_col in md.attr_cols and key_col not in filters and
+                db.timeseries_cache is None and
+                cls.init_from_db is DataObject.init_from_db and
+                cls.load_timeseries is DataObject.load_timeseries and
+                cls.timeseries_cleanup is DataObject.timeseries_cleanup and
+                tbl.timeseries_frame() is not None):
+            return {}
+
+        sens_values = None
+        if SENSITIVITY_COL in df.columns:
+            if df[SENSITIVITY_COL].isna().any():
+                return {}
+            sens_values = df[SENSITIVITY_COL].to_numpy()
+
+        lookup = [filters.get(col) for col in cols]
+        key_pos = cols.index(key_col)
+
+        found = {}
+        for key in keys:
+            if not indexable(key_col, key):
+                continue
+
+            lookup[key_pos] = key
+            positions = index.get(key if len(cols) == 1 else tuple(lookup))
+            if positions is None:
+                continue
+
+            if sens_values is not None:
+                sens = scenario.get_sensitivity(tbl.name, key, **filters) or REF_SENSITIVITY
+                present = set(sens_values[positions])
+                # as in load_timeseries(), if we only have one sensitivity we use it regardless
+                if len(present) == 1:
+                    sens = next(iter(present))
+                if sens not in present:
+                    continue
+                positions = positions[sens_values[positions] == sens]
+
+            found[key] = positions
+
+        if not found:
+            return {}
+
+        lengths = np.array([len(positions) for positions in found.values()])
+        starts = np.cumsum(lengths) - lengths
+        positions = np.concatenate(list(found.values()))
+        firsts = np.repeat(starts, lengths)
+
+        # Each key's attributes must be the same in all of its rows, as compared by drop_duplicates()
+        constant = np.ones(len(positions), dtype=bool)
+        for col in md.attr_cols:
+            codes, _ = pd.factorize(df[col].take(positions))
+            constant &= codes == codes[firsts]
+        constant = np.logical_and.reduceat(constant, starts)
+
+        has_values = df[md.df_value_col].take(positions).notna().to_numpy().any(axis=1)
+        has_values = np.logical_or.reduceat(has_values, starts)
+
+        attrs = tbl.expand(df.iloc[positions[starts]])[md.attr_cols]
+        tups = attrs.values
+        columns = {col: attrs[col].values for col in md.attr_cols}
+
+        result = {}
+        for i, (key, rows) in enumerate(found.items()):
+            if not constant[i]:
+                continue
+
+            timeseries = None
+            if has_values[i]:
+                timeseries = tbl.timeseries_at(rows)
+                if timeseries is None:
+                    continue
+
+            result[key] = (tuple(tups[i]), timeseries, lambda col, i=i: columns[col][i])
+
+        return result
+
     @classmethod
     def instances(cls):
         """
@@ -148,29 +286,58 @@ class DataObject(object):
         if has_sensitivity_col:
             sens = scenario.get_sensitivity(tbl_name, key, **filters) or REF_SENSITIVITY
 
+        cache = db.timeseries_cache
+        cache_key = None
+        if cache is not None:
+            cache_key = self._timeseries_cache_key(key, sens if has_sensitivity_col else None, filters)
+            cached = None if cache_key is None else cache.get(cache_key)
+            if cached is not None:
+                tup, timeseries, self._has_data = cached
+                if self._has_data:
+                    if timeseries is not None and db.copy_timeseries:
+                        timeseries = timeseries.copy(deep=True)
+                    self._timeseries = self.raw_values = timeseries
+                return tup
+
+        # A compiled scenario has already chosen the sensitivity and found its rows
+        sensitivity_rows = getattr(scenario, 'sensitivity_rows', None) if has_sensitivity_col else None
+        resolved = sensitivity_rows(tbl, key, filters) if sensitivity_rows else None
+
         if key is not None:
             # Process key match as another filter
             filters[md.key_col] = key
 
-        matches = filter_query(df, filters)
-
-        # Filter by sensitivity
-        if has_sensitivity_col and len(matches):
-            sens_col_values = list(set(matches[SENSITIVITY_COL].values))
-            # if we only have one sensitivity, we don't care what we queried, let's just grab the one we have
-            if len(sens_col_values) == 1:
-                sens = list(sens_col_values)[0]
-            if sens not in sens_col_values:
-                msg = "Sensitivity name '{}' not found in table '{}'".format(sens, tbl_name)
-                if len(filters):
-                    msg += " at location {}".format(filters)
-                raise CsvdbException(msg)
-            # sens_filter = sens or REF_SENSITIVITY
-            matches = matches[matches[SENSITIVITY_COL] == sens]
-
-        if len(matches) == 0:
-            logging.debug("Warning: table '{}': no rows found with the following pattern: '{}'".format(tbl_name, filters))
+        if resolved is not None:
+            sens, positions = resolved
+            sens_found = positions is not None
+            matches = tbl.expand(df.iloc[positions]) if sens_found else None
+        else:
+            # Misses on the key or an indexed combination of filters are found without querying the data
+            matches = tbl.expand(tbl.select_rows(filters)) if tbl.has_rows(filters) else None
+            sens_found = True
+
+            # Filter by sensitivity
+            if has_sensitivity_col and matches is not None and len(matches):
+                sens_col_values = list(set(matches[SENSITIVITY_COL].values))
+                # if we only have one sensitivity, we don't care what we queried, let's just grab the one we have
+                if len(sens_col_values) == 1:
+                    sens = list(sens_col_values)[0]
+                sens_found = sens in sens_col_values
+                if sens_found:
+                    # sens_filter = sens or REF_SENSITIVITY
+                    matches = matches[matches[SENSITIVITY_COL] == sens]
+
+        if not sens_found:
+            msg = "Sensitivity name '{}' not found in table '{}'".format(sens, tbl_name)
+            if len(filters):
+                msg += " at location {}".format(filters)
+            raise CsvdbException(msg)
+
+        if matches is None or len(matches) == 0:
+            logging.debug("Warning: table '%s': no rows found with the following pattern: '%s'", tbl_name, filters)
             self._has_data = False
+            if cache_key is not None:
+                cache.put(cache_key, (None, None, False))
             return None
         else:
             self._has_data = True
@@ -191,52 +358,95 @@ class DataObject(object):
         col_to_keep = list(set(md.df_cols) - {'sensitivity'})
         timeseries = matches[col_to_keep]
         if not timeseries[md.df_value_col].isnull().all().all():  # sometimes in EP the data is empty
-            timeseries = self.timeseries_cleanup(timeseries)
-            # todo improve this try/except
-            try:
-                timeseries = timeseries.astype(float)
-            except:
-                pass
-
-            if 'gau' in timeseries.index.names:
-                assert attrs['geography'].values[0] is not None, "table {}, key {}, geography can't be None".format(tbl_name, key)
-                if timeseries.index.nlevels > 1:
-                    timeseries.index = timeseries.index.rename(attrs['geography'].values[0], level='gau')
-                else:
-                    timeseries.index.name = attrs['geography'].values[0]
-
-            if 'gau_from' in timeseries.index.names and 'geography_from' in attrs.columns:
-                assert attrs['geography_from'].values[0] is not None, "table {}, key {}, geography_from can't be None".format(tbl_name, key)
-                timeseries.index = timeseries.index.rename(attrs['geography_from'].values[0], level='gau_from')
-
-            if 'gau_to' in timeseries.index.names and 'geography_to' in attrs.columns:
-                assert attrs['geography_to'].values[0] is not None, "table {}, key {}, geography_to can't be None".format(tbl_name, key)
-                timeseries.index = timeseries.index.rename(attrs['geography_to'].values[0], level='gau_to')
-
-            if 'oth_1' in timeseries.index.names:
-                assert attrs['other_index_1'].values[0] is not None, "table {}, key {}, other_index_1 can't be None when oth_1 index exists".format(tbl_name, key)
-                timeseries.index = timeseries.index.rename(attrs['other_index_1'].values[0], level='oth_1')
-
-            if 'oth_2' in timeseries.index.names:
-                assert attrs['other_index_2'].values[0] is not None, "table {}, key {}, other_index_2 can't be None when oth_2 index exists".format(tbl_name, key)
-                timeseries.index = timeseries.index.rename(attrs['other_index_2'].values[0], level='oth_2')
-
-            duplicate_index = timeseries.index.duplicated(keep=False)  # keep = False keeps all of the duplicate indices
-            if any(duplicate_index):
-                print("'{}' in table '{}': duplicate indices found (keeping first): \n {}".format(key, tbl_name, timeseries[duplicate_index]))
-                timeseries = timeseries.groupby(level=timeseries.index.names).first()
-
-            # we save the same data to two variables for ease of code interchangeability
-            self._timeseries = timeseries.copy(deep=True)  # RIO uses _timeseries
-            self.raw_values = self._timeseries  # EP uses raw_values
+            # Use the table's prebuilt timeseries frame unless a subclass cleans the data differently
+            prebuilt = None
+            if key is not None and type(self).timeseries_cleanup is DataObject.timeseries_cleanup:
+                prebuilt = tbl.get_timeseries(matches)
+
+            timeseries = self.timeseries_cleanup(timeseries) if prebuilt is None else prebuilt
+            timeseries = self._store_timeseries(timeseries, md.attr_cols, lambda col: attrs[col].values[0], key)
         else:
-            self._timeseries = self.raw_values = None
+            timeseries = self._timeseries = self.raw_values = None
 
         row = attrs
 
         tup = tuple(row.values[0])
+
+        # The cache holds the uncopied timeseries; hits get their own copy if db.copy_timeseries
+        if cache_key is not None:
+            cache.put(cache_key, (tup, timeseries, True), nbytes=cache.size_of(timeseries))
+
         return tup
 
+    def _store_timeseries(self, timeseries, attr_cols, attr_value, key):
+        """
+        Store the cleaned `timeseries` for `key`, converted to float, with its geography and other
+        index levels named by the corresponding attributes and the first of any rows with duplicate
+        index values. `attr_value` returns the value of the named column in `attr_cols` for this key.
+        Returns the timeseries as stored, before any copy made because of db.copy_timeseries.
+        """
+        db = get_database()
+        tbl_name = self._table_name
+
+        # todo improve this try/except
+        try:
+            timeseries = timeseries.astype(float)
+        except:
+            pass
+
+        if 'gau' in timeseries.index.names:
+            assert attr_value('geography') is not None, "table {}, key {}, geography can't be None".format(tbl_name, key)
+            if timeseries.index.nlevels > 1:
+                timeseries.index = timeseries.index.rename(attr_value('geography'), level='gau')
+            else:
+                timeseries.index.name = attr_value('geography')
+
+        if 'gau_from' in timeseries.index.names and 'geography_from' in attr_cols:
+            assert attr_value('geography_from') is not None, "table {}, key {}, geography_from can't be None".format(tbl_name, key)
+            timeseries.index = timeseries.index.rename(attr_value('geography_from'), level='gau_from')
+
+        if 'gau_to' in timeseries.index.names and 'geography_to' in attr_cols:
+            assert attr_value('geography_to') is not None, "table {}, key {}, geography_to can't be None".format(tbl_name, key)
+            timeseries.index = timeseries.index.rename(attr_value('geography_to'), level='gau_to')
+
+        if 'oth_1' in timeseries.index.names:
+            assert attr_value('other_index_1') is not None, "table {}, key {}, other_index_1 can't be None when oth_1 index exists".format(tbl_name, key)
+            timeseries.index = timeseries.index.rename(attr_value('other_index_1'), level='oth_1')
+
+        if 'oth_2' in timeseries.index.names:
+            assert attr_value('other_index_2') is not None, "table {}, key {}, other_index_2 can't be None when oth_2 index exists".format(tbl_name, key)
+            timeseries.index = timeseries.index.rename(attr_value('other_index_2'), level='oth_2')
+
+        duplicate_index = timeseries.index.duplicated(keep=False)  # keep = False keeps all of the duplicate indices
+        if any(duplicate_index):
+            print("'{}' in table '{}': duplicate indices found (keeping first): \n {}".format(key, tbl_name, timeseries[duplicate_index]))
+            timeseries = timeseries.groupby(level=timeseries.index.names).first()
+
+        # we save the same data to two variables for ease of code interchangeability
+        self._timeseries = timeseries.copy(deep=True) if db.copy_timeseries else timeseries  # RIO uses _timeseries
+        self.raw_values = self._timeseries  # EP uses raw_values
+
+        return timeseries
+
+    def _timeseries_cache_key(self, key, sens, filters):
+        """
+        Return the key under which load_timeseries() results are stored in the database's
+        timeseries cache, or None if the result can't be cached, i.e., if a filter value is
+        unhashable or a subclass overrides load_timeseries() itself. The cleanup method is
+        part of the key since subclasses sharing a table may clean the data differently.
+        """
+        cls = type(self)
+        if cls.load_timeseries is not DataObject.load_timeseries:
+            return None
+
+        try:
+            cache_key = (self._table_name, key, sens, tuple(sorted(filters.items())), cls.timeseries_cleanup)
+            hash(cache_key)
+        except TypeError:
+            return None
+
+        return cache_key
+
     def init_from_db(self, key, scenario, **filters):
         db = get_database()
         tbl_name = self._table_name
@@ -255,8 +465,8 @@ class DataObject(object):
         else:
             tup = self.__class__.get_row(key, scenario=scenario, **filters)
             cols = tbl.get_columns()
-            if 'reference_name' in cols:
-                locate = cols.index('reference_name')
+            if tup is not None and REFERENCE_COL in cols:
+                locate = cols.index(REFERENCE_COL)
                 reference_name = tup[locate]
                 if reference_name is not None:
                     key = reference_name
@@ -274,6 +484,24 @@ class DataObject(object):
         if tup:
             self.init_from_tuple(tup, scenario)
 
+    def _init_from_rows(self, key, scenario, tup, timeseries, attr_value):
+        """
+        Initialize the object as init_from_db() does, from the attribute tuple and the cleaned
+        timeseries (None if the values are all missing) found for `key` by load_all_from_db().
+        """
+        md = get_database().get_table(self._table_name).metadata
+        self._has_data = True
+
+        if timeseries is None:
+            self._timeseries = self.raw_values = None
+        else:
+            self._store_timeseries(timeseries, md.attr_cols, attr_value, key)
+            lst = list(tup)
+            lst[md.attr_cols.index(md.key_col)] = key  # we want the tup to have the key that was passed in
+            tup = tuple(lst)
+
+        self.init_from_tuple(tup, scenario)
+
     @classmethod
     def get_row(cls, key, scenario=None, raise_error=False, **filters):
         """
@@ -294,6 +522,24 @@ class DataObject(object):
                                     scenario=scenario, raise_error=raise_error, **filters)
         return tup
 
+    @classmethod
+    def get_rows(cls, keys, scenario=None, raise_error=False, **filters):
+        """
+        Get the tuples for the rows with the given ids in the table associated with this
+        class, finding all of them in a single pass over the table. Equivalent to calling
+        get_row() for each key.
+
+        :param keys: (iterable of str) the unique ids of rows in `table` (for a given scenario)
+        :param scenario: (str) the name of the scenario to load (together with each key forms unique key.)
+        :param raise_error: (bool) whether to raise an error or return None if an id is not found.
+        :param filters (dict) additional col/value filtering to perform to isolate rows of interest
+        :return: (dict) of tuples of values in the order the columns are defined in the table, keyed by id
+        :raises RowNotFound: if raise_error is True and an id is not present in `table`.
+        """
+        db = get_database()
+        tbl = db.get_table(cls._table_name)
+        return tbl.get_rows(cls._key_col, keys, scenario=scenario, raise_error=raise_error, **filters)
+
     def check_scenario(self, scenario):
         if scenario != self._scenario:
             raise CsvdbException("DataObject: mismatch between caller's scenario ({}) and self._scenario ({})".format(scenario, self._scenario))
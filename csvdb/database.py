@@ -19,13 +19,18 @@
 
 from glob import glob
 from collections import OrderedDict
+import copy
 import csv
 import gzip
 import os
+import numpy as np
 import pandas as pd
 import re
+from .cache import TableCache, TimeseriesCache
+from .check import ReferenceSets
+from .manifest import validation_rules
 from .error import CsvdbException, ValidationFormatError
-from .table import CsvTable, REF_SENSITIVITY, SENSITIVITY_COL
+from .table import CsvTable, REF_SENSITIVITY, SENSITIVITY_COL, ENGINES, load_table_data, sensitivity_catalogue
 import pdb
 import polars as pl
 
@@ -40,6 +45,53 @@ SPACES_PATTERN = re.compile(r'\s\s+')
 # case-insensitive match of *.gz files
 ZIP_PATTERN = re.compile(r'.*\.gz$', re.IGNORECASE)
 
+def trimmed_strings(series):
+    """
+    Strip leading and trailing blanks from the string values in `series` and collapse
+    runs of two or more blanks to one, as clean_table() does.
+
+    :param series: (pandas.Series) a column of data
+    :return: (pandas.Series) the trimmed values that differ from the originals, with
+       the original index labels
+    """
+    values = series.to_numpy(dtype=object)
+    if series.dtype == object:
+        is_str = np.fromiter((isinstance(value, str) for value in values), dtype=bool, count=len(values))
+    elif pd.api.types.is_string_dtype(series.dtype):
+        is_str = series.notna().to_numpy()
+    else:
+        return series.iloc[:0]
+
+    # N.B. object dtype so the Python str methods and re module are used, as for single values
+    strs = pd.Series(values[is_str], index=series.index[is_str], dtype=object)
+    stripped = strs.str.strip().str.replace(SPACES_PATTERN, ' ', regex=True)
+    return stripped[stripped != strs]
+
+def blank_mask(series):
+    """
+    Return a boolean array that is True where the values in `series` are None or ''.
+    """
+    values = series.to_numpy(dtype=object)
+    return (values == None) | (values == '')
+
+# The counts accumulated by clean_table()
+CLEANING_COUNTS = ('empty_rows', 'empty_cols', 'trimmed_blanks', 'orphans')
+
+# The compiled scenarios being run by map_scenarios(), which forked workers
+# inherit from the parent process rather than receiving them by pickling
+_batch_scenarios = None
+
+def _run_scenario(func, i):
+    return func(_batch_scenarios[i])
+
+# The database and validation dict used by clean_tables() with workers > 1, which
+# forked workers inherit once rather than receiving with each table
+_clean_db = None
+_clean_val_dict = None
+
+def _clean_table_worker(tbl_name, kwargs):
+    return _clean_db._clean_table_results(tbl_name, _clean_val_dict, kwargs)
+
 def getResource(pkg_name, rel_path):
     """
     Extract a resource (e.g., file) from the given relative path in
@@ -117,34 +169,103 @@ class ShapeDataMgr(object):
         self.file_map = self.create_file_map(db_path, supplemental_shape_db_path)
         self.compile_sensitivities = compile_sensitivities
 
-    def load_all(self, verbose=True):
-        if self.slices:
-            return self.slices
+    def load_shape(self, shape_name, verbose=True):
+        """
+        Read the data for a single shape and cache it in self.slices.
 
-        verbose and print("Reading shape data:")
+        :param shape_name: (str) the name of the shape to load
+        :param verbose: (bool) whether to print the name of each file read
+        :return: (pandas.DataFrame or None) the shape's data rows
+        :raises KeyError: if `shape_name` is not a known shape
+        """
+        filename = self.file_map[shape_name]
+        if type(filename) is not list:
+            filename = [filename]
+
+        dfs = []
+        for fn in filename:
+            if verbose:
+                print("Reading shape data: {} | file: {}".format(shape_name, os.path.split(fn)[1]))
+            df = pl.read_csv(fn, schema_overrides={'value': float}, glob=False).to_pandas()
+            if SENSITIVITY_COL in df.columns:
+                df[SENSITIVITY_COL] = df[SENSITIVITY_COL].fillna(REF_SENSITIVITY)
+            if self.compile_sensitivities:
+                if SENSITIVITY_COL in df.columns:
+                    df = df[SENSITIVITY_COL].to_frame().drop_duplicates()
+                    df['name'] = shape_name
+                else:
+                    df = None
+            dfs.append(df)
 
-        for shape_name, filename in self.file_map.items():
-            if type(filename) is not list:
-                filename = [filename]
+        self.slices[shape_name] = df = None if all([df is None for df in dfs]) else pd.concat(dfs)
+        return df
 
-            dfs = []
-            for fn in filename:
-                if verbose:
-                    print("Reading shape data: {} | file: {}".format(shape_name, os.path.split(fn)[1]))
-                df = pl.read_csv(fn, schema_overrides={'value': float}, glob=False).to_pandas()
-                if SENSITIVITY_COL in df.columns:
-                    df[SENSITIVITY_COL] = df[SENSITIVITY_COL].fillna(REF_SENSITIVITY)
-                if self.compile_sensitivities:
-                    if SENSITIVITY_COL in df.columns:
-                        df = df[SENSITIVITY_COL].to_frame().drop_duplicates()
-                        df['name'] = shape_name
-                    else:
-                        df = None
-                dfs.append(df)
+    def load_sensitivities(self, shape_name):
+        """
+        Return the distinct sensitivities of the named shape, with the shape's name, as
+        the shape's data would be if `compile_sensitivities` were True, reading only the
+        sensitivity column of the shape's file(s).
+
+        :param shape_name: (str) the name of the shape
+        :return: (pandas.DataFrame or None) columns 'sensitivity' and 'name', or None if
+           the shape has no sensitivity column
+        :raises KeyError: if `shape_name` is not a known shape
+        """
+        filename = self.file_map[shape_name]
+        if type(filename) is not list:
+            filename = [filename]
+
+        dfs = []
+        for fn in filename:
+            openFunc = gzip.open if fn.endswith('.gz') else open
+            with openFunc(fn, 'rt', encoding='utf-8', errors='replace') as f:
+                header = next(csv.reader(f), [])
+
+            if SENSITIVITY_COL not in header:
+                continue
+
+            df = pl.read_csv(fn, columns=[SENSITIVITY_COL], glob=False).to_pandas()
+            df[SENSITIVITY_COL] = df[SENSITIVITY_COL].fillna(REF_SENSITIVITY)
+            df = df[SENSITIVITY_COL].to_frame().drop_duplicates()
+            df['name'] = shape_name
+            dfs.append(df)
+
+        return pd.concat(dfs) if dfs else None
 
-            self.slices[shape_name] = None if all([df is None for df in dfs]) else pd.concat(dfs)
+    def sensitivity_catalogue(self, names=None, workers=None):
+        """
+        Return the sensitivities available in the named shapes, or in all shapes. See
+        load_sensitivities().
+
+        :param names: (list of str) the names of the shapes, or None for all shapes
+        :param workers: (int) the number of threads to use to read the files
+        :return: (dict) shape name => DataFrame, for the shapes with a sensitivity column
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        names = list(self.file_map) if names is None else names
+        with ThreadPoolExecutor(max_workers=workers or 1) as pool:
+            dfs = list(pool.map(self.load_sensitivities, names))
 
+        return {name: df for name, df in zip(names, dfs) if df is not None}
+
+    def preload(self, names, verbose=True):
+        """
+        Load the named shapes that haven't already been loaded.
+
+        :param names: (list of str) the names of shapes to load
+        :param verbose: (bool) whether to print the name of each file read
+        :return: none
+        """
+        for shape_name in names:
+            if shape_name not in self.slices:
+                self.load_shape(shape_name, verbose=verbose)
+
+    def load_all(self, verbose=True):
+        verbose and print("Reading shape data:")
+        self.preload(self.file_map.keys(), verbose=verbose)
         verbose and print("Done.")
+        return self.slices
 
     @classmethod
     def create_file_map(cls, db_path, supplemental_shape_db_path):
@@ -192,11 +313,15 @@ class ShapeDataMgr(object):
         return file_map
 
     def get_slice(self, name, verbose=True):
-        if not self.slices:
-            self.load_all(verbose)
-
+        """
+        Return the data for the named shape, reading only that shape's file(s)
+        the first time it is requested.
+        """
         #name = name.replace(' ', '_')
-        return self.slices[name]
+        try:
+            return self.slices[name]
+        except KeyError:
+            return self.load_shape(name, verbose=verbose)
 
 class CsvDatabase(object):
     """
@@ -207,7 +332,10 @@ class CsvDatabase(object):
     def __init__(self, pathname=None, load=True, metadata=None, mapped_cols=None,
                  tables_to_not_load=None, tables_without_classes=None, tables_to_ignore=None,
                  output_tables=False, compile_sensitivities=False, filter_columns=None, pkg_name=None,
-                 supplemental_shape_db_path=None,weather_datetime_filter=None,year_filter=None):
+                 supplemental_shape_db_path=None,weather_datetime_filter=None,year_filter=None,
+                 load_workers=None, load_executor='thread', cache_dir=None, engine='pandas', row_filter=None,
+                 project_columns=False, compact=False, copy_timeseries=True,
+                 timeseries_cache_entries=None, timeseries_cache_bytes=None, check_references=False):
         """
         Initialize a CsvDatabase.
 
@@ -223,18 +351,67 @@ class CsvDatabase(object):
         :param compile_sensitivities: (bool)
         :param filter_columns: (list of str)
         :param pkg_name: (str) the name of the Python package containing the etc/validation.csv file.
+        :param weather_datetime_filter: (list) if not None, only rows of output tables whose
+           weather_datetime value is in this list are loaded.
+        :param year_filter: (list) if not None, only rows of output tables whose year value
+           is in this list are loaded.
+        :param row_filter: (callable) if not None, a function called as row_filter(tbl_name, df)
+           for each DataFrame (or chunk of one) read from a table's CSV file(s), with columns as
+           read and before any other processing, which returns a boolean Series identifying the
+           rows to keep, or None to keep all rows. Rows filtered out are never accumulated. If
+           `load_executor` is 'process', the function must be picklable. Tables are not cached
+           when a row_filter is given.
+        :param load_workers: (int) if greater than 1 and `load` is True, the number of workers
+           to use to load tables in parallel. By default, tables are loaded serially.
+        :param load_executor: (str) either 'thread' or 'process', the type of worker pool to use
+           when `load_workers` is greater than 1.
+        :param cache_dir: (str) if not None, the directory in which to cache processed table
+           data in Parquet format, which is read in place of the CSV files on subsequent loads
+           as long as the files and loading options are unchanged. Requires pyarrow.
+        :param engine: (str) the CSV reader to use for tables, either 'pandas' (the default) or
+           'polars', which is multithreaded and avoids per-cell converters, but produces the same
+           DataFrames.
+        :param project_columns: (bool) if True, read only the columns of each table that are
+           used by DataObjects, i.e., the key, attr_cols, df_cols and sensitivity columns, as
+           given by the table's metadata. Columns in `filter_columns` are never read. Tables
+           are reloaded with all columns when needed for validation and cleaning; see
+           get_table(all_columns=True).
+        :param compact: (bool) if True, reduce the memory used by regular tables by storing
+           string columns with few distinct values as categoricals, and numeric columns with
+           missing values as nullable numeric columns rather than as Python objects. Rows
+           returned by get_row(), get_dataframe() and DataObjects hold the same values as
+           without compaction.
+        :param copy_timeseries: (bool) if False, DataObjects' timeseries are not deep-copied
+           when loaded, which saves time and memory, but may share data with the tables or with
+           each other, so callers must not modify them in place.
+        :param timeseries_cache_entries: (int) if not None, cache the attributes and cleaned
+           timeseries loaded by DataObjects, keeping at most this many entries and evicting the
+           least recently used. See self.timeseries_cache, whose stats() method reports hits and
+           misses, and whose invalidate() method drops stale entries.
+        :param timeseries_cache_bytes: (int) if not None, cache DataObjects' timeseries as for
+           `timeseries_cache_entries`, keeping at most about this many bytes of timeseries data.
+           Both limits may be given.
+        :param check_references: (bool) if True, check the reference_name columns of the
+           tables loaded on initialization, and raise a CsvdbException listing all broken or
+           cyclic references. See reference_errors().
         """
+        if engine not in ENGINES:
+            raise CsvdbException("CsvDatabase: engine must be one of {}; got '{}'".format(ENGINES, engine))
+
         self.pathname = pathname
         self.supplemental_shape_db_path = supplemental_shape_db_path
         self.output_tables = output_tables
         self.compile_sensitivities = compile_sensitivities
         self.mapped_cols = mapped_cols
+        self.table_cache = TableCache(cache_dir) if cache_dir else None
+        self.engine = engine
         # maps table names => file names under the database root folder
         self.file_map = {}
         self.filter_columns = filter_columns or []
 
         self.pkg_name = pkg_name
         self.val_dict = None         # stored when first read
+        self.reference_sets = ReferenceSets(self)    # values referenced by val_dict entries
 
         metadata = metadata or []
         self.metadata = {md.table_name : md for md in metadata}     # convert the list to a dict
@@ -251,13 +428,24 @@ class CsvDatabase(object):
         self.shapes = ShapeDataMgr(pathname, supplemental_shape_db_path, compile_sensitivities)
         self.weather_datetime_filter = weather_datetime_filter
         self.year_filter = year_filter
+        self.row_filter = row_filter
+        self.project_columns = project_columns
+        self.compact = compact
+        self.copy_timeseries = copy_timeseries
+
+        use_ts_cache = timeseries_cache_entries is not None or timeseries_cache_bytes is not None
+        self.timeseries_cache = (TimeseriesCache(max_entries=timeseries_cache_entries,
+                                                 max_bytes=timeseries_cache_bytes) if use_ts_cache else None)
 
         # cache data for all tables for which there are generated classes
         if load:
-            table_names = self.tables_with_classes()
-            for name in table_names:
-                if name not in tables_to_not_load:
-                    self.get_table(name,filter_columns=self.filter_columns)
+            table_names = [name for name in self.tables_with_classes() if name not in tables_to_not_load]
+            self.load_tables(table_names, workers=load_workers, executor=load_executor)
+
+            if check_references:
+                errors = self.reference_errors()
+                if errors:
+                    raise CsvdbException("Invalid references found:\n  {}".format('\n  '.join(errors)))
 
     @classmethod
     def clear_cached_database(cls):
@@ -301,21 +489,86 @@ class CsvDatabase(object):
     def is_table(self, name):
         return self.table_names.get(name, False)
 
-    def get_table(self, name, filter_columns=None):
-        try:
-            return self.table_objs[name]
-        except KeyError:
-            metadata = self.metadata.get(name, CsvMetadata(name))
-            tbl = CsvTable(self, name, metadata, self.output_tables, self.compile_sensitivities, mapped_cols=self.mapped_cols, filter_columns=filter_columns)
+    def get_table(self, name, filter_columns=None, all_columns=False):
+        """
+        Return the CsvTable for the named table, loading it if necessary.
+
+        :param name: (str) the name of the table
+        :param filter_columns: (list of str) columns to omit, if the table is loaded
+        :param all_columns: (bool) if True, ensure that all columns of the table (other than
+           `filter_columns`) are loaded, without compaction, as required to validate or clean
+           the table, reloading it if it was loaded with `project_columns` or `compact`.
+        :return: (CsvTable) the table
+        """
+        tbl = self.table_objs.get(name)
+
+        if tbl is not None and all_columns and (tbl.project_columns or tbl.compact):
+            tbl = self._create_table(name, filter_columns=tbl.filter_columns, all_columns=True)
             self.table_objs[name] = tbl
-            if hasattr(tbl.data,'index') and ('weather_datetime' in tbl.data.index.names):
-                if self.weather_datetime_filter is not None:
-                    tbl.data = tbl.data[tbl.data.index.get_level_values('weather_datetime').isin(self.weather_datetime_filter)]
-            if hasattr(tbl.data,'index') and 'year' in tbl.data.index.names:
-                if self.year_filter is not None:
-                    tbl.data = tbl.data[tbl.data.index.get_level_values('year').isin(self.year_filter)]
+            self.invalidate_reference_sets(name)
 
-            return tbl
+        if tbl is None:
+            tbl = self._create_table(name, filter_columns=filter_columns, all_columns=all_columns)
+            self.table_objs[name] = tbl
+            self.invalidate_reference_sets(name)
+
+        return tbl
+
+    def _create_table(self, name, filter_columns=None, load=True, all_columns=False):
+        metadata = self.metadata.get(name, CsvMetadata(name))
+        tbl = CsvTable(self, name, metadata, self.output_tables, self.compile_sensitivities, mapped_cols=self.mapped_cols,
+                       filter_columns=filter_columns, project_columns=self.project_columns and not all_columns,
+                       compact=self.compact and not all_columns, load=load)
+        return tbl
+
+    def load_tables(self, names, workers=None, executor='thread'):
+        """
+        Load the named tables, optionally in parallel. Tables are added to `table_objs`
+        in the order given, regardless of the order in which the workers finish, so the
+        result is the same as loading the tables serially with get_table().
+
+        :param names: (list of str) the names of the tables to load
+        :param workers: (int) the number of workers to use. If None or <= 1, the tables
+           are loaded serially in the current thread.
+        :param executor: (str) 'thread' to use a thread pool or 'process' to use a process pool
+        :return: none
+        :raises: the exception raised for the first table (in the order given) that fails to load.
+        """
+        from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+        names = [name for name in names if name not in self.table_objs]
+
+        if not workers or workers <= 1:
+            for name in names:
+                self.get_table(name, filter_columns=self.filter_columns)
+            return
+
+        executors = {'thread': ThreadPoolExecutor, 'process': ProcessPoolExecutor}
+        if executor not in executors:
+            raise CsvdbException("load_tables: executor must be one of {}; got '{}'".format(sorted(executors), executor))
+
+        tables = [self._create_table(name, filter_columns=self.filter_columns, load=False) for name in names]
+
+        with executors[executor](max_workers=workers) as pool:
+            futures = [pool.submit(load_table_data, tbl) for tbl in tables]
+
+            for tbl, future in zip(tables, futures):
+                try:
+                    data, md, compact_dtypes = future.result()
+                except Exception:
+                    for f in futures:
+                        f.cancel()
+                    raise
+
+                # Results from a worker process are copies; update the originals
+                if md is not tbl.metadata:
+                    for attr in CsvMetadata.__slots__:
+                        setattr(tbl.metadata, attr, getattr(md, attr))
+
+                tbl.data = data
+                tbl.compact_dtypes = compact_dtypes
+                self.table_objs[tbl.name] = tbl
+                self.invalidate_reference_sets(tbl.name)
 
     def tables_with_classes(self, include_on_demand=False):
         exclude = self.tables_without_classes
@@ -333,12 +586,151 @@ class CsvDatabase(object):
         tup = tbl.get_row(key_col, key, scenario=scenario, raise_error=raise_error, **filters)
         return tup
 
+    def get_rows(self, name, keys, scenario=None, allow_multiple=False, raise_error=True, **filters):
+        """
+        Get the rows for the given keys in the named table in a single pass. See CsvTable.get_rows().
+
+        :return: (dict) keyed by key, with values of a tuple, or if `allow_multiple` is True and
+           more than one row matches the key, a list of tuples, or None if no row matches and
+           `raise_error` is False.
+        """
+        tbl = self.get_table(name)
+        return tbl.get_rows(self.get_key_col(name), keys, scenario=scenario, allow_multiple=allow_multiple,
+                            raise_error=raise_error, **filters)
+
     # Deprecated?
     def get_rows_from_table(self, name, key_col, key, scenario=None, raise_error=True):
         tbl = self.get_table(name)
         tups = tbl.get_row(key_col, key, scenario=scenario, allow_multiple=True, raise_error=raise_error)
         return tups
 
+    def sensitivity_catalogue(self, names=None, workers=None):
+        """
+        Return the sensitivities available in the named tables, as the tables' data would
+        be in a database created with `compile_sensitivities=True`: the distinct rows of
+        'name', 'filter1'...'filterN' and 'sensitivity'. Tables already loaded in this
+        database are catalogued from their data. Others are read from their files, in
+        parallel, reading only their key, df_filters and sensitivity columns. Use
+        self.shapes.sensitivity_catalogue() for shapes.
+
+        :param names: (list of str) the names of the tables, or None for all tables
+           with generated classes
+        :param workers: (int) the number of threads to use to read tables not yet loaded
+        :return: (dict) table name => DataFrame, for the tables with a sensitivity column
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        names = self.tables_with_classes() if names is None else names
+        with ThreadPoolExecutor(max_workers=workers or 1) as pool:
+            dfs = list(pool.map(self._table_sensitivities, names))
+
+        return {name: df for name, df in zip(names, dfs) if df is not None}
+
+    def _table_sensitivities(self, name):
+        tbl = self.table_objs.get(name)
+        if tbl is not None and not tbl.output_table and tbl.data is not None:
+            if tbl.compile_sensitivities:
+                return tbl.data
+
+            md = tbl.metadata
+            df = tbl.data
+            cols = ([md.key_col] if md.key_col else []) + md.df_filters + [SENSITIVITY_COL]
+            if all(col in df.columns for col in cols):
+                df = sensitivity_catalogue(tbl.expand(df[cols]), md)
+                return df.replace({np.nan: None})
+
+            if SENSITIVITY_COL not in df.columns and SENSITIVITY_COL not in tbl.unread_cols:
+                return None
+
+        # Read just the columns needed, without replacing the table's cache entry
+        metadata = copy.copy(self.table_metadata(name))
+        tbl = CsvTable(self, name, metadata, False, True, mapped_cols=self.mapped_cols,
+                       filter_columns=self.filter_columns, project_columns=True, load=False)
+        tbl.cache = None
+        tbl.load_all()
+        return tbl.data
+
+    def compile_scenarios(self, scenarios):
+        """
+        Compile each of the given scenarios against this database. The compiled views
+        share the tables and the rows selected for the reference sensitivity, and each
+        stores only the lookups for which its scenario names a sensitivity, so memory grows
+        with the scenarios' differences from the reference rather than with their number.
+        See AbstractScenario.compile().
+
+        :param scenarios: (iterable of AbstractScenario) the scenarios to compile
+        :return: (list of CompiledScenario) the compiled views, in the order given
+        """
+        return [scenario.compile(self) for scenario in scenarios]
+
+    def map_scenarios(self, func, scenarios, workers=None):
+        """
+        Call `func` with each of the given scenarios, compiled against this database, and
+        return the results. With `workers` > 1, the calls are made in a pool of forked worker
+        processes, which share this process's loaded tables copy-on-write rather than copying
+        them. The scenarios are compiled before forking and are inherited by the workers, so
+        only `func`, and the results returned, must be picklable. Tables should be loaded
+        before calling this, since tables loaded by a worker aren't shared.
+
+        :param func: (callable) called with a CompiledScenario; for parallel use it must be
+           a module-level function
+        :param scenarios: (iterable of AbstractScenario) the scenarios to run
+        :param workers: (int) the number of worker processes. If None or <= 1, the calls are
+           made serially in the current process.
+        :return: (list) the values returned by `func`, in the order of `scenarios`
+        :raises CsvdbException: if `workers` > 1 and the platform doesn't support forking
+        """
+        global _batch_scenarios
+        import multiprocessing as mp
+        from concurrent.futures import ProcessPoolExecutor
+
+        compiled = self.compile_scenarios(scenarios)
+
+        if not workers or workers <= 1:
+            return [func(scenario) for scenario in compiled]
+
+        if 'fork' not in mp.get_all_start_methods():
+            raise CsvdbException("map_scenarios: worker processes require the 'fork' start method")
+
+        _batch_scenarios = compiled
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('fork')) as pool:
+                futures = [pool.submit(_run_scenario, func, i) for i in range(len(compiled))]
+                return [future.result() for future in futures]
+        finally:
+            _batch_scenarios = None
+
+    def reference_errors(self, names=None):
+        """
+        Check the reference_name columns of the named tables, or of all loaded tables,
+        for references to unknown keys and cycles of references. See CsvTable.reference_errors().
+
+        :param names: (list of str) the names of the tables to check, or None for all loaded tables
+        :return: (list of str) a message for each problem found
+        """
+        names = sorted(self.table_objs) if names is None else names
+        errors = []
+        for name in names:
+            errors += self.get_table(name).reference_errors()
+
+        return errors
+
+    def invalidate_timeseries(self, name=None):
+        """
+        Drop the cached DataObject timeseries for the named table, or for all tables
+        if `name` is None. Call this after modifying a table's data.
+        """
+        if self.timeseries_cache is not None:
+            self.timeseries_cache.invalidate(name)
+
+    def invalidate_reference_sets(self, name=None):
+        """
+        Drop the values of the named table's columns used to validate references to
+        them, or all such values, including those listed from folders, if `name` is
+        None. Call this after reloading or saving a table. See ReferenceSets.
+        """
+        self.reference_sets.invalidate(name)
+
     def get_table_names(self):
         return self.file_map.keys()
 
@@ -400,25 +792,64 @@ class CsvDatabase(object):
     def file_for_table(self, tbl_name):
         return self.file_map.get(tbl_name) or self.shapes.file_map.get(tbl_name)
 
+    def source_columns(self, tbl_name):
+        """
+        Return the names of the columns in the table's CSV file(s), stripped of blanks,
+        read from the files' header lines without loading the table.
+
+        :param tbl_name: (str) the name of the table
+        :return: (list of str) the column names, or None if the table has no files
+        """
+        pathnames = self.file_for_table(tbl_name)
+        if not pathnames:
+            return None
+
+        cols = []
+        for pathname in (pathnames if type(pathnames) is list else [pathnames]):
+            if not (pathname.endswith('.gz') or pathname.endswith('.csv')):
+                continue
+
+            openFunc = gzip.open if pathname.endswith('.gz') else open
+            with openFunc(pathname, 'rt', encoding='utf-8', errors='replace') as f:
+                header = next(csv.reader(f), [])
+
+            cols += [col for col in map(str.strip, header) if col not in cols]
+
+        return cols
+
     @staticmethod
     def check_value_list(series, values):
-        import types
-
-        bad = []
+        """
+        Find the values in `series` that aren't in `values`.
 
+        :param series: (pandas.Series) the values to check
+        :param values: (list or set) the legal values; pass a set, such as
+           ValidationInfo.value_set, to avoid rebuilding it for each series.
+        :return: (list of (index, value) tuples) the bad values, grouped by value in
+           order of first appearance, or None if `series` is empty.
+        """
         if len(series) == 0:
             return None
 
         # this doesn't work when it's lower case, we actually want to match case, whatever that case may be
         # values = [val.lower() if val and isinstance(val, str) else val for val in values]
 
-        for val in series.unique():
-            test_value = val if val and isinstance(val, str) else val
-            if test_value not in values:
-                bad += [(i, val) for i in series[series == test_value].index]
+        if not isinstance(values, (set, frozenset)):
+            try:
+                values = set(values)
+            except TypeError:
+                pass    # unhashable values; fall back to searching the list
 
-        return bad
+        # N.B. null values have code -1 and are never reported, since they don't compare equal to themselves
+        codes, uniques = pd.factorize(series.array)
+        is_bad = np.fromiter((val not in values for val in uniques), dtype=bool, count=len(uniques))
 
+        positions = np.flatnonzero((codes >= 0) & is_bad[np.maximum(codes, 0)])
+        if not len(positions):
+            return []
+
+        positions = positions[np.argsort(codes[positions], kind='stable')]
+        return list(zip(series.index[positions], uniques.take(codes[positions])))
 
     def list_tables(self, skip_dir):
         tables = {}
@@ -495,12 +926,10 @@ class CsvDatabase(object):
             otherwise a list of messages describing what was found or changed. These are separate since
             some errors can't be fixed automatically, so they are just reported.
         """
-        import six
-
         fixable = False
         pathname = self.file_map[tbl_name]
 
-        tbl = self.get_table(tbl_name)
+        tbl = self.get_table(tbl_name, all_columns=True)
         df = tbl.data if data is None else data
 
         msgs = []
@@ -546,19 +975,16 @@ class CsvDatabase(object):
             col_series = df[col_name]
 
             if trim_blanks:
-                for idx, value in col_series.items():
-                    if isinstance(value, six.string_types):
-                        stripped = re.sub(SPACES_PATTERN, ' ', value.strip())
-                        if value != stripped:
-                            trim_count += 1
-                            if save_changes:
-                                df.loc[idx, col_name] = stripped
+                stripped = trimmed_strings(col_series)
+                trim_count += len(stripped)
+                if save_changes and len(stripped):
+                    df.loc[stripped.index, col_name] = stripped.values
 
             if col_name.startswith('Unnamed: '):
                 msgs.append("Table {} has an '{}' column".format(tbl_name, col_name))
 
                 if drop_empty_cols:
-                    if all(map(lambda x: x is None or x == '', col_series)):
+                    if blank_mask(col_series).all():
                         print("Table {} has empty column '{}'".format(tbl_name, col_name))
                         empty_cols.append(col_name)
 
@@ -576,7 +1002,7 @@ class CsvDatabase(object):
 
                 # If there are implicit or explicit values, check against them
                 if values:
-                    bad = self.check_value_list(col_series, values)
+                    bad = self.check_value_list(col_series, val_info.value_set or values)
                 # Otherwise, if there's a type-checking function, call that
                 elif type_func:
                     bad = type_func(col_series, not val_info.not_null)
@@ -627,9 +1053,10 @@ class CsvDatabase(object):
 
         # collect indices of empty rows
         if drop_empty_rows:
-            for idx, row in df.iterrows():
-                if all(map(lambda x: x is None or x == '', row)):
-                    empty_row_idxs.append(idx)
+            empty = np.ones(len(df), dtype=bool)
+            for col_name in df:
+                empty &= blank_mask(df[col_name])
+            empty_row_idxs = list(df.index[empty])
 
         counts['empty_rows'] += len(empty_row_idxs)
         counts['empty_cols'] += len(empty_cols)
@@ -654,6 +1081,11 @@ class CsvDatabase(object):
 
                 self.write_table(df, pathname, tbl_name)
 
+            # the table's data may have been modified in place
+            tbl.clear_indexes()
+            self.invalidate_timeseries(tbl_name)
+            self.invalidate_reference_sets(tbl_name)
+
         if len(msgs)>0:
             # add a divider line to separate the table messages
             msgs = ['__________________________________________________________'] + msgs
@@ -662,7 +1094,8 @@ class CsvDatabase(object):
 
     def clean_tables(self, val_dict, skip_tables=None, skip_dir=None, check_unique=True,
                      trim_blanks=True, drop_empty_rows=True, drop_empty_cols=True,
-                     delete_orphans=True, save_changes=True, print_msgs=True):
+                     delete_orphans=True, save_changes=True, print_msgs=True, workers=None,
+                     manifest=None):
         """
         Fix common errors in CSV files, according the the keyword args given.
         Options include trim_blanks => remove blanks surrounding column names
@@ -682,32 +1115,86 @@ class CsvDatabase(object):
             (N.B., only rows in tables with validation_info.cascade_delete == True are deleted.)
         :param save_changes: (bool) whether to write modifications back to the table's (CSV) file
         :param print_msgs: (bool) whether to print error messages
+        :param workers: (int) the number of worker processes to clean tables in. If None
+            or <= 1, tables are cleaned serially in the current process. Results are merged
+            in table order, so the messages, counts and cleaning_errors.txt are the same
+            as for a serial run.
+        :param manifest: (csvdb.manifest.ValidationManifest) if given, tables whose files and
+            validation rules, and the files of the tables they reference, are unchanged since
+            the manifest was saved aren't cleaned again; their stored results are reported.
+            The manifest is updated and saved.
         :return: (bool) whether any errors where found and fixed.
         """
-        counts = {'empty_rows': 0, 'empty_cols': 0, 'trimmed_blanks': 0, 'orphans' : 0}
+        counts = {key: 0 for key in CLEANING_COUNTS}
 
         all_msgs = []
         any_modified = False
         skip_tables = skip_tables or []
 
-        print_msgs and print("\nCleaning tables:")
+        tables = self.list_tables(skip_dir)
+        tbl_names = [name for name in tables if name not in skip_tables]
 
-        for tbl_name in self.list_tables(skip_dir):
-            if tbl_name in skip_tables:
-                continue
+        kwargs = dict(check_unique=check_unique,
+                      trim_blanks=trim_blanks,
+                      drop_empty_rows=drop_empty_rows,
+                      drop_empty_cols=drop_empty_cols,
+                      delete_orphans=delete_orphans,
+                      save_changes=save_changes)
 
-            print_msgs and print(" -", tbl_name)
+        print_msgs and print("\nCleaning tables:")
 
-            modified, msgs = self.clean_table(tbl_name, val_dict, counts,
-                                              check_unique=check_unique,
-                                              trim_blanks=trim_blanks,
-                                              drop_empty_rows=drop_empty_rows,
-                                              drop_empty_cols=drop_empty_cols,
-                                              delete_orphans=delete_orphans,
-                                              save_changes=save_changes)
-            any_modified |= modified
-            all_msgs += msgs
+        # Validate all tables against the referenced values as they were before cleaning
+        self.reference_sets.freeze()
+        try:
+            # Reuse the stored results for tables that are unchanged since the last run,
+            # unless they have errors to fix now.
+            cached = {}
+            if manifest:
+                for tbl_name in tbl_names:
+                    result = manifest.lookup(self, val_dict, tbl_name, tables[tbl_name], kwargs)
+                    if result and not (save_changes and result[0]):
+                        cached[tbl_name] = result
+
+            to_clean = [name for name in tbl_names if name not in cached]
+
+            # Collect the values referenced by the tables to clean before any is rewritten
+            for tbl_name in to_clean:
+                for val_info in validation_rules(val_dict, tbl_name, self.source_columns(tbl_name) or []):
+                    val_info.resolve()
+
+            results = {}
+            if workers and workers > 1:
+                results.update(zip(to_clean, self._clean_tables_parallel(to_clean, val_dict, kwargs, workers)))
+
+            for tbl_name in tbl_names:
+                if tbl_name in cached:
+                    print_msgs and print(" -", tbl_name, "(unchanged)")
+                    result = cached[tbl_name]
+                else:
+                    print_msgs and print(" -", tbl_name)
+                    result = results.pop(tbl_name, None) or self._clean_table_results(tbl_name, val_dict, kwargs)
+
+                modified, msgs, tbl_counts, output = result[:4]
+                print(output, end='')
+                for key, value in tbl_counts.items():
+                    counts[key] += value
+
+                any_modified |= modified
+                all_msgs += msgs
+
+                if manifest and tbl_name not in cached:
+                    if save_changes and modified:
+                        manifest.forget(tbl_name)   # revalidate the rewritten table next time
+                    else:
+                        manifest.record(self, val_dict, tbl_name, tables[tbl_name], kwargs, result[4], result[:4])
+        finally:
+            self.reference_sets.thaw()
 
+        if manifest:
+            manifest.save(tbl_names)
+            if print_msgs and cached:
+                print("Reporting stored results for {} of {} tables unchanged since the last validation".format(
+                    len(cached), len(tbl_names)))
 
         print_msgs and print('Done.\n')
 
@@ -742,10 +1229,78 @@ class CsvDatabase(object):
         return any_modified
 
 
+    def _clean_table_results(self, tbl_name, val_dict, kwargs):
+        """
+        Run clean_table() for one table with its own counts, capturing anything it prints,
+        so that results computed separately can be merged (or stored) in table order.
+
+        :return: (tuple) (modified, msgs, counts, output, columns), where the first two
+            are as returned by clean_table(), `output` is the text it printed, and `columns`
+            are the names of the table's columns.
+        """
+        import contextlib
+        import io
+
+        counts = {key: 0 for key in CLEANING_COUNTS}
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            modified, msgs = self.clean_table(tbl_name, val_dict, counts, **kwargs)
+
+        columns = list(self.get_table(tbl_name, all_columns=True).data.columns)
+        return modified, msgs, counts, output.getvalue(), columns
+
+    def _clean_tables_parallel(self, tbl_names, val_dict, kwargs, workers):
+        """
+        Run clean_table() for each of `tbl_names` in a pool of forked worker processes,
+        which inherit `val_dict` and the tables already loaded rather than having them
+        pickled with each task. Each table is cleaned, and if `save_changes` is set,
+        written, by a single worker, so workers never write the same file. Tables the
+        parent has loaded are dropped afterwards if a worker may have rewritten them.
+
+        :return: (list of tuple) for each table, in order, the results returned by
+            _clean_table_results()
+        :raises CsvdbException: if the platform doesn't support forking, or two of the
+            tables are stored in the same file
+        """
+        global _clean_db, _clean_val_dict
+        import multiprocessing as mp
+        from concurrent.futures import ProcessPoolExecutor
+
+        if 'fork' not in mp.get_all_start_methods():
+            raise CsvdbException("clean_tables: worker processes require the 'fork' start method")
+
+        if kwargs['save_changes']:
+            seen = {}
+            for tbl_name in tbl_names:
+                pathnames = self.file_map[tbl_name]
+                for pathname in (pathnames if type(pathnames) is list else [pathnames]):
+                    other = seen.setdefault(pathname, tbl_name)
+                    if other != tbl_name:
+                        raise CsvdbException("clean_tables: tables '{}' and '{}' are both stored in '{}'; "
+                                             "they can't be cleaned in parallel".format(other, tbl_name, pathname))
+
+        _clean_db, _clean_val_dict = self, val_dict
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('fork')) as pool:
+                futures = [pool.submit(_clean_table_worker, tbl_name, kwargs) for tbl_name in tbl_names]
+                results = [future.result() for future in futures]
+        finally:
+            _clean_db = _clean_val_dict = None
+
+        if kwargs['save_changes']:
+            for tbl_name, result in zip(tbl_names, results):
+                if result[0]:
+                    self.table_objs.pop(tbl_name, None)
+                    self.invalidate_timeseries(tbl_name)
+                    self.invalidate_reference_sets(tbl_name)
+
+        return results
+
     def validate(self, pkg_name, skip_tables=None, skip_dir=None,
                  save_changes=True, trim_blanks=True,
                  drop_empty_rows=True, drop_empty_cols=True,
-                 check_unique=True, include_shapes=False, delete_orphans=True):
+                 check_unique=True, include_shapes=False, delete_orphans=True,
+                 workers=None, incremental=False):
 
         dbdir = self.pathname
 
@@ -762,6 +1317,12 @@ class CsvDatabase(object):
 
         val_dict = self.read_validation_csv(pkg_name)
 
+        if incremental:
+            from .manifest import ValidationManifest, DefaultManifestFile
+            manifest = ValidationManifest(os.path.join(os.path.split(self.pathname)[0], DefaultManifestFile))
+        else:
+            manifest = None
+
         self.clean_tables(val_dict,
                           skip_dir=skip_dir,
                           skip_tables=skip_tables,
@@ -771,7 +1332,9 @@ class CsvDatabase(object):
                           drop_empty_cols=drop_empty_cols,
                           delete_orphans=delete_orphans,
                           print_msgs=True,
-                          save_changes=save_changes)
+                          save_changes=save_changes,
+                          workers=workers,
+                          manifest=manifest)
 
         CsvDatabase.clear_cached_database()
 
@@ -863,6 +1426,7 @@ class CsvDatabase(object):
 
         if not len(errors[1]):
             self.write_table(df, path, tbl_name)
+            self.invalidate_reference_sets(tbl_name)
 
         return errors
 
@@ -0,0 +1,183 @@
+#
+# Manifest of the results of CsvDatabase.clean_tables(), used to revalidate only
+# the tables that changed since the last run.
+#
+# For each table, the manifest stores digests of the table's files, a digest of the
+# validation rules that applied to its columns (including the files of the tables
+# its columns reference), and the results of cleaning it. On the next run, a table
+# whose files and rules are unchanged is not reloaded or rechecked; its stored
+# results are reported instead.
+#
+import hashlib
+import json
+import os
+
+from .utils import file_digest
+
+# Bump this whenever a change to clean_table alters the results it produces
+MANIFEST_VERSION = 1
+
+DefaultManifestFile = 'validation_manifest.json'
+
+
+def validation_rules(val_dict, tbl_name, columns):
+    """
+    Return the ValidationInfo objects from `val_dict` that apply to the given columns
+    of a table, preferring (table, column) entries to generic ('', column) entries
+    as clean_table() does.
+
+    :param val_dict: (dict) validation dictionary loaded from validation.csv
+    :param tbl_name: (str) the name of the table
+    :param columns: (iterable of str) the names of the table's columns
+    :return: (list of ValidationInfo) the rules, in column order
+    """
+    rules = []
+    for col_name in columns:
+        val_info = val_dict.get((tbl_name, col_name)) or val_dict.get(('', col_name))
+        if val_info:
+            rules.append(val_info)
+
+    return rules
+
+def referenced_tables(rules):
+    """
+    Return the names of the tables whose values are referenced by the given rules,
+    i.e., the tables a table validated by these rules depends on.
+
+    :param rules: (list of ValidationInfo) the rules applying to a table
+    :return: (list of str) the sorted names of the referenced tables
+    """
+    names = set()
+    for val_info in rules:
+        if val_info.ref_tbl and val_info.ref_col:
+            names.add(val_info.ref_tbl)
+            if val_info.ref_tbl2 and val_info.ref_col2:
+                names.add(val_info.ref_tbl2)
+
+    return sorted(names)
+
+def _rule_state(val_info):
+    state = [val_info.table_name, val_info.column_name, val_info.not_null, val_info.linked_column,
+             val_info.dtype, val_info.folder, val_info.ref_tbl, val_info.ref_col, val_info.ref_tbl2,
+             val_info.ref_col2, val_info.cascade_delete, val_info.extra_values]
+
+    # Values listed from a folder aren't captured by any table's files
+    if val_info.folder:
+        state.append(sorted(map(str, val_info.values)))
+
+    return state
+
+
+class ValidationManifest(object):
+    """
+    Stores the results of cleaning each table, with the state of the table's files and
+    validation rules they were computed from, in a JSON file.
+    """
+    def __init__(self, pathname):
+        self.pathname = pathname
+        self.digests = {}       # pathname => digest, for the files seen in this run
+        self.files = {}         # pathname => (size, mtime_ns, digest), as of the last run
+        self.tables = {}        # table name => stored state and results
+
+        try:
+            with open(pathname) as f:
+                info = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if info.get('version') == MANIFEST_VERSION:
+            self.files = info['files']
+            self.tables = info['tables']
+
+    def file_digest(self, pathname):
+        """
+        Return the digest of a file's contents, or None if it can't be read. The digest
+        stored in the manifest is reused if the file's size and modification time are
+        unchanged. Each file's digest is computed once per run, so files rewritten by
+        cleaning keep the digest of the contents they were validated with.
+        """
+        digest = self.digests.get(pathname)
+        if digest is not None:
+            return digest
+
+        try:
+            st = os.stat(pathname)
+            old = self.files.get(pathname)
+            if old and old[0] == st.st_size and old[1] == st.st_mtime_ns:
+                digest = old[2]
+            else:
+                digest = file_digest(pathname)
+                self.files[pathname] = (st.st_size, st.st_mtime_ns, digest)
+        except OSError:
+            return None
+
+        self.digests[pathname] = digest
+        return digest
+
+    def files_state(self, pathnames):
+        """
+        Return the [pathname, digest] pairs for a table's file or list of files.
+        """
+        pathnames = pathnames if type(pathnames) is list else [pathnames]
+        return [[pathname, self.file_digest(pathname)] for pathname in sorted(pathnames)]
+
+    def rules_digest(self, db, val_dict, tbl_name, columns, options):
+        """
+        Return a digest of the cleaning options, the validation rules that apply to the
+        given columns of a table, and the files of the tables those rules reference.
+        """
+        rules = validation_rules(val_dict, tbl_name, columns)
+        parents = [[name, self.files_state(db.file_for_table(name) or [])] for name in referenced_tables(rules)]
+
+        info = [options, [_rule_state(val_info) for val_info in rules], parents]
+        text = json.dumps(info, sort_keys=True, default=str)
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def lookup(self, db, val_dict, tbl_name, pathnames, options):
+        """
+        Return the stored results of cleaning a table, if its files, the rules applying to it,
+        and the files of the tables it references are unchanged since they were stored.
+
+        :return: (tuple or None) (modified, msgs, counts, output) as for clean_tables(),
+           or None if the table must be cleaned again.
+        """
+        files = self.files_state(pathnames)
+        entry = self.tables.get(tbl_name)
+        if (entry is None or entry['files'] != files or
+                entry['rules'] != self.rules_digest(db, val_dict, tbl_name, entry['columns'], options)):
+            return None
+
+        modified, msgs, counts, output = entry['results']
+        return modified, msgs, counts, output
+
+    def record(self, db, val_dict, tbl_name, pathnames, options, columns, results):
+        """
+        Store the results of cleaning a table with the state they were computed from.
+        The file digests used are those computed before cleaning, so if cleaning rewrote
+        files, the affected tables are revalidated on the next run.
+        """
+        self.tables[tbl_name] = {'files': self.files_state(pathnames),
+                                 'columns': list(columns),
+                                 'rules': self.rules_digest(db, val_dict, tbl_name, columns, options),
+                                 'results': list(results)}
+
+    def forget(self, tbl_name):
+        self.tables.pop(tbl_name, None)
+
+    def save(self, tbl_names=None):
+        """
+        Write the manifest, keeping only the entries for `tbl_names`, if given. The
+        file is written to a temporary file and renamed, so it's never left partial.
+        """
+        if tbl_names is not None:
+            tbl_names = set(tbl_names)
+            self.tables = {name: entry for name, entry in self.tables.items() if name in tbl_names}
+
+        files = {pathname: state for pathname, state in self.files.items() if pathname in self.digests}
+        info = {'version': MANIFEST_VERSION, 'files': files, 'tables': self.tables}
+
+        tmp_path = '{}.{}.tmp'.format(self.pathname, os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump(info, f, indent=1, sort_keys=True)
+
+        os.replace(tmp_path, self.pathname)
@@ -3,6 +3,7 @@ import pdb
 import os
 from .error import ScenarioFileError, CsvdbException
 from .data_object import get_database
+from .table import SENSITIVITY_COL, REF_SENSITIVITY
 
 class CsvdbFilter(object):
     def __init__(self, table_name, key_value, sens_value, constraints=None):
@@ -80,6 +81,7 @@ class AbstractScenario(object):
         if filter.table_name not in self.filter_dict:
             self.filter_dict[filter.table_name] = {}
         self.filter_dict[filter.table_name][key] = filter.sens_value
+        self._compiled = None   # any compiled view is now out of date
 
     def get_sensitivity(self, table_name, key_value, **filters):
         """
@@ -94,3 +96,166 @@ class AbstractScenario(object):
 
         sens_value = filt.get(lookup_key, None)
         return sens_value
+
+    def compile(self, db=None):
+        """
+        Resolve this scenario's sensitivities against the tables of `db`, returning a
+        CompiledScenario that can be used in place of this scenario. The compiled view is
+        cached, so repeated calls with the same database return the same instance, which
+        can be shared by all the objects loaded for this scenario. Adding a filter discards
+        the cached view.
+
+        :param db: (CsvDatabase) the database, or None to use the current database
+        :return: (CompiledScenario) the compiled view of this scenario
+        """
+        db = db or get_database()
+        compiled = getattr(self, '_compiled', None)
+        if compiled is None or compiled.db is not db:
+            compiled = self._compiled = CompiledScenario(self, db)
+
+        return compiled
+
+    def diff(self, other, db=None):
+        """
+        Find the lookups that resolve to different sensitivities in this scenario and in
+        `other`, i.e., the table, key and filter combinations named in either scenario's
+        filter_dict whose data DataObject.load_timeseries() would load differently. Names
+        are resolved against the tables loaded in `db` as load_timeseries() resolves them:
+        no sensitivity means the reference sensitivity, and a table with only one sensitivity
+        for the key uses it whatever is named. Objects for lookups not reported load the
+        same data in both scenarios, so their results can be reused.
+
+        :param other: (AbstractScenario) the scenario to compare with
+        :param db: (CsvDatabase) the database, or None to use the current database
+        :return: (dict) table name => list of (key, constraints, sensitivity, other_sensitivity)
+           tuples, where constraints is the tuple of (col_name, col_value) pairs or None, as in
+           filter_dict. A sensitivity is None if it isn't present in the table. Tables with no
+           differences are omitted.
+        """
+        db = db or get_database()
+        ours = self.filter_dict
+        theirs = other.filter_dict
+
+        diffs = {}
+        for tbl_name in sorted(set(ours) | set(theirs), key=str):
+            lookups1 = ours.get(tbl_name, {})
+            lookups2 = theirs.get(tbl_name, {})
+
+            tbl = db.table_objs.get(tbl_name)
+            if tbl is not None and (tbl.data is None or SENSITIVITY_COL not in tbl.data.columns):
+                continue    # sensitivities don't apply to this table
+
+            changed = []
+            for lookup in set(lookups1) | set(lookups2):
+                sens1 = lookups1.get(lookup)
+                sens2 = lookups2.get(lookup)
+                if sens1 == sens2:
+                    continue
+
+                key, constraints = lookup
+                resolved1 = resolved2 = None
+                if tbl is not None:
+                    query = dict(constraints or ())
+                    if key is not None:
+                        query[tbl.metadata.key_col] = key
+                    resolved1 = tbl.sensitivity_rows(sens1, query)
+                    resolved2 = tbl.sensitivity_rows(sens2, query)
+
+                if resolved1 is not None and resolved2 is not None and \
+                        resolved1[1] is not None and resolved2[1] is not None and \
+                        len(resolved1[1]) == len(resolved2[1]) == 0:
+                    continue    # no rows match in either scenario
+
+                if resolved1 is None or resolved2 is None:
+                    # Not answerable from the table's indexes; compare the names
+                    sens1 = sens1 or REF_SENSITIVITY
+                    sens2 = sens2 or REF_SENSITIVITY
+                else:
+                    sens1 = resolved1[0] if resolved1[1] is not None else None
+                    sens2 = resolved2[0] if resolved2[1] is not None else None
+
+                if sens1 != sens2:
+                    changed.append((key, constraints, sens1, sens2))
+
+            if changed:
+                diffs[tbl_name] = sorted(changed, key=repr)
+
+        return diffs
+
+
+class CompiledScenario(object):
+    """
+    A view of a scenario with its sensitivities resolved against the tables of a
+    CsvDatabase, created by AbstractScenario.compile(). For each table, key and set
+    of filters, the view stores the chosen sensitivity and the positions of its rows,
+    so DataObject.load_timeseries() doesn't filter the matching rows by sensitivity.
+    The view stores only the lookups for which the scenario names a sensitivity; those
+    using the reference sensitivity are stored in the tables and shared by all views,
+    so many scenarios can be compiled against one database at little cost. Lookups
+    named in the scenario's filter_dict are resolved when the view is created, others
+    on first use. Other attributes are those of the underlying scenario.
+    """
+    def __init__(self, scenario, db):
+        self.scenario = scenario
+        self.db = db
+        self.views = {}     # table name => (table, generation, dict of resolved lookups)
+
+        for tbl_name, lookups in scenario.filter_dict.items():
+            if tbl_name not in db.table_objs:
+                continue
+
+            tbl = db.get_table(tbl_name)
+            if SENSITIVITY_COL in tbl.data.columns:
+                for key, constraints in lookups:
+                    self.sensitivity_rows(tbl, key, dict(constraints or ()))
+
+    def __getattr__(self, name):
+        # Called only for attributes not found on the view
+        if name == 'scenario':
+            raise AttributeError(name)
+        return getattr(self.scenario, name)
+
+    def get_sensitivity(self, table_name, key_value, **filters):
+        return self.scenario.get_sensitivity(table_name, key_value, **filters)
+
+    def compile(self, db=None):
+        return self.scenario.compile(db)
+
+    def diff(self, other, db=None):
+        return self.scenario.diff(other, db)
+
+    def sensitivity_rows(self, tbl, key, filters):
+        """
+        Return the sensitivity that DataObject.load_timeseries() uses for `key` and `filters`
+        in table `tbl`, and the positions of the rows it selects. See CsvTable.sensitivity_rows().
+
+        :param tbl: (CsvTable) the table
+        :param key: (str) the key value, or None
+        :param filters: (dict) other column name/value pairs to match
+        :return: (tuple of (str, numpy array)) the sensitivity and the positions of its rows,
+           or None if the lookup can't be answered from the table's indexes.
+        """
+        sens = self.get_sensitivity(tbl.name, key, **filters)
+
+        query = dict(filters)
+        if key is not None:
+            query[tbl.metadata.key_col] = key
+
+        if sens is None:
+            return tbl.sensitivity_rows(None, query)
+
+        view = self.views.get(tbl.name)
+        if view is None or view[0] is not tbl or view[1] != tbl.generation:
+            view = self.views[tbl.name] = (tbl, tbl.generation, {})
+
+        resolved = view[2]
+        try:
+            lookup = tuple(sorted(query.items()))
+            found = lookup in resolved
+        except TypeError:
+            return None     # unhashable filter values
+
+        if not found:
+            resolved[lookup] = tbl.sensitivity_rows(sens, query)
+
+        return resolved[lookup]
@@ -1,19 +1,44 @@
 
+from collections import Counter
 import gzip
+import io
 import pandas as pd
 import numpy as np
 import pdb
+import polars as pl
 import re
 import time
 
 from .error import *
-from .utils import filter_query
+from .utils import filter_query, indexable
 
 # This string is inserted into sensitivity columns when value == None,
 # to allow sensitivity to be used in dataframe indices.
 REF_SENSITIVITY = '_reference_'
 
 SENSITIVITY_COL = 'sensitivity'
+REFERENCE_COL = 'reference_name'
+
+WEATHER_DATETIME_COL = 'weather_datetime'
+YEAR_COL = 'year'
+
+# Number of rows to read at a time when rows are filtered while reading
+CHUNK_ROWS = 100000
+
+_NO_ROWS = np.array([], dtype=np.intp)
+
+# Column holding row positions in the frame built by CsvTable.timeseries_frame()
+_POSITION_COL = '_position_'
+
+# Index values of these types sort the same way however they're grouped
+_SORTABLE_TYPES = ('string', 'integer', 'floating', 'boolean', 'mixed-integer-float')
+
+# A combination of filter columns is indexed once it has been queried this many times
+INDEX_MIN_QUERIES = 2
+
+# In compact mode, string columns with at most this ratio of distinct values
+# to rows are stored as categoricals
+COMPACT_MAX_RATIO = 0.5
 
 Verbose = False
 
@@ -23,18 +48,653 @@ def clean_col_name(name):
     'Replace problematic chars in column names with underscores'
     return re.sub(_bad_chars, '_', name)
 
+ENGINES = ('pandas', 'polars')
+
+# Strings that pandas.read_csv reads as NaN or as booleans by default. The NaN strings
+# are those listed for the `na_values` argument in the pandas.read_csv documentation.
+_NA_VALUES = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+              '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+_TRUE_VALUES  = ['True',  'TRUE',  'true']
+_FALSE_VALUES = ['False', 'FALSE', 'false']
+
+# Integer strings, which pandas.read_csv reads as int64, uint64 or Python ints
+_INT_PATTERN = r'^[+-]?[0-9]+$'
+
+def _polars_to_pandas_column(series, as_str):
+    """
+    Convert a polars String column to the pandas Series that pandas.read_csv
+    would produce for the same values: int64 if all values are integers (uint64 or
+    Python ints if they don't fit), float64 if all values are numeric or missing, bool (or object, if values are missing)
+    if all values are boolean strings, otherwise strings with NaN for missing values.
+
+    :param series: (polars.Series) column read as strings, with null for missing values
+    :param as_str: (bool) read the column as strings, with '' for missing values, as
+       pandas does for columns with a `str` converter.
+    :return: (pandas.Series) the converted column
+    """
+    if as_str:
+        return series.fill_null('').to_pandas()
+
+    if len(series) == 0:
+        return pd.Series([], dtype=object)
+
+    series = series.set(series.is_in(_NA_VALUES).fill_null(True), None)
+    has_na = series.null_count() > 0
+    stripped = series.str.strip_chars()
+
+    ints = stripped.cast(pl.Int64, strict=False)
+    if not has_na and ints.null_count() == 0:
+        return pd.Series(ints.to_numpy())
+
+    # Integers too large for int64 are read by pandas as uint64 if possible, else as objects
+    if ints.null_count() > series.null_count() and stripped.str.contains(_INT_PATTERN).all():
+        uints = stripped.cast(pl.UInt64, strict=False)
+        if not has_na and uints.null_count() == 0:
+            return pd.Series(uints.to_numpy())
+
+        if (ints.is_null() & uints.is_null()).sum() > series.null_count():
+            return pd.Series([np.nan if value is None else int(value) for value in stripped], dtype=object)
+
+        return _polars_strings(series)     # as pandas does with missing or negative values
+
+    floats = stripped.cast(pl.Float64, strict=False)
+    if floats.null_count() == series.null_count() and not floats.is_nan().any():
+        return pd.Series(floats.to_numpy())
+
+    if series.is_in(_TRUE_VALUES + _FALSE_VALUES).sum() == len(series) - series.null_count():
+        bools = series.is_in(_TRUE_VALUES)
+        if not has_na:
+            return pd.Series(bools.to_numpy())
+
+        result = pd.Series(bools.to_numpy(), dtype=object)
+        result[series.is_null().to_numpy()] = np.nan
+        return result
+
+    return _polars_strings(series)
+
+def _polars_strings(series):
+    result = series.to_pandas()
+    if result.dtype == object:
+        result = result.where(result.notna(), np.nan)
+    return result
+
+def _polars_isin(col, values):
+    """
+    Return a polars expression selecting rows of String column `col` whose values, once
+    converted as pandas would convert them, are in `values`, or None if the values aren't
+    all strings or all numbers.
+    """
+    values = list(values)
+    if all(isinstance(v, str) for v in values):
+        return pl.col(col).is_in(values)
+
+    if all(isinstance(v, (int, float, np.number)) and not isinstance(v, (bool, np.bool_)) for v in values):
+        return pl.col(col).str.strip_chars().cast(pl.Float64, strict=False).is_in([float(v) for v in values])
+
+    return None
+
+def _str_isin(series, values):
+    """
+    Return a boolean Series selecting the values of `series`, read as raw strings, that
+    are in `values`, once converted as pandas would convert them, or None if the values
+    aren't all strings or all numbers. The pandas equivalent of _polars_isin().
+    """
+    values = list(values)
+    if all(isinstance(v, str) for v in values):
+        return series.isin(values)
+
+    if all(isinstance(v, (int, float, np.number)) and not isinstance(v, (bool, np.bool_)) for v in values):
+        # convert each distinct string once
+        codes, uniques = pd.factorize(series)
+        numbers = pd.to_numeric(pd.Series(uniques, dtype=object).str.strip(), errors='coerce')
+        return pd.Series(numbers.isin([float(v) for v in values]).to_numpy()[codes], index=series.index)
+
+    return None
+
+def _parse_strings(raw, converters):
+    """
+    Convert a DataFrame of raw strings, as read with dtype=object and na_filter=False, to
+    the DataFrame pandas.read_csv produces when reading the same rows from a file, with
+    column types inferred from all the rows together.
+    """
+    text = raw.to_csv(index=False)
+    df = pd.read_csv(io.StringIO(text), index_col=None, converters=converters, na_values='', low_memory=False)
+    df.index = raw.index
+    return df
+
+def read_csv_polars(filename, str_cols=None, filters=None, usecols=None):
+    """
+    Read a CSV or gzipped CSV file using polars' multithreaded reader, returning
+    a pandas DataFrame with the same columns, dtypes and values as are produced by
+    the pandas reader in CsvTable.load_all(). (Polars parses floats exactly, whereas
+    pandas' default parser may differ in the last digit for values given to 17 digits.)
+
+    :param filename: (str) the pathname of the file to read
+    :param str_cols: (list of str) columns to read as strings, without conversion
+       of empty values to NaN.
+    :param filters: (dict) maps column names to collections of values; if given, only
+       rows whose values in these columns are in the corresponding collection are read.
+       Columns not present in the file are ignored. Filters on values that are neither
+       all strings nor all numbers are not applied here, and must be applied by the caller.
+    :param usecols: (callable) if given, only columns for which usecols(column_name)
+       returns True are read, as with pandas.read_csv.
+    :return: (pandas.DataFrame) the data read
+    """
+    str_cols = set(str_cols or [])
+
+    # Read everything as strings and convert the types ourselves, following pandas' rules
+    lf = pl.scan_csv(filename, infer_schema_length=0, encoding='utf8-lossy', glob=False)
+    names = lf.collect_schema().names()
+
+    if filters:
+        cols = {col.strip(): col for col in names}
+        for col, values in filters.items():
+            expr = _polars_isin(cols[col], values) if col in cols else None
+            if expr is not None:
+                lf = lf.filter(expr)
+
+    if usecols:
+        lf = lf.select([col for col in names if usecols(col)])
+
+    df = lf.collect()
+
+    # N.B. construct the DataFrame as pandas.read_csv does (copy=False), so that columns
+    # are stored in the same blocks, which affects the results of subsequent operations.
+    cols = {col: _polars_to_pandas_column(df[col], col in str_cols) for col in df.columns}
+    return pd.DataFrame(cols, columns=df.columns, copy=False)
+
+def load_table_data(tbl):
+    """
+    Load the data for the given CsvTable and return the tuple (data, metadata,
+    compact_dtypes). This is a module-level function so it can be run in a worker
+    process, in which case the CsvTable arrives without its `db` and the caller
+    copies the results back into the original CsvTable.
+    """
+    tbl.load_all()
+    return (tbl.data, tbl.metadata, tbl.compact_dtypes)
+
+def sensitivity_catalogue(df, md):
+    """
+    Return the distinct combinations of key, df_filters and sensitivity in a table's data,
+    with the key column renamed 'name' and the df_filters renamed 'filter1', 'filter2', etc.,
+    holding values of the form "{filter_col}:{value}".
+
+    :param df: (pandas.DataFrame) the table's data, with a sensitivity column
+    :param md: (CsvMetadata) the table's metadata
+    :return: (pandas.DataFrame) the sensitivities available in the table
+    """
+    df = df[([md.key_col] if md.key_col else []) + md.df_filters + [SENSITIVITY_COL]]
+    df = df.rename(columns={md.key_col:'name'})
+
+    for filter_num, filter in enumerate(md.df_filters):
+        df[filter] = filter + ':' + df[filter]
+        df = df.rename(columns={filter: 'filter{}'.format(filter_num+1)})
+
+    return df.drop_duplicates()
+
+def group_positions(*columns):
+    """
+    Return a dict mapping each distinct combination of values in `columns` to a sorted
+    array of the positions at which it occurs. Rows holding a null value are omitted.
+    Keys are values if a single column is given, otherwise tuples of values.
+
+    :param columns: (array-like) one or more equal-length sequences of values to group
+    :return: (dict) value or tuple of values => numpy array of int positions
+    """
+    factorized = [pd.factorize(col) for col in columns]
+
+    valid = np.logical_and.reduce([codes >= 0 for codes, _ in factorized])
+    positions = np.flatnonzero(valid)
+
+    # Combine the columns' codes into a single group number per (valid) row
+    groups = np.zeros(len(positions), dtype=np.int64)
+    for codes, uniques in factorized:
+        groups, _ = pd.factorize(groups * len(uniques) + codes[positions])
+
+    count = groups.max() + 1 if len(groups) else 0
+    _, first = np.unique(groups, return_index=True)
+    values = [uniques.take(codes[positions[first]]) for codes, uniques in factorized]
+    keys = values[0] if len(values) == 1 else zip(*values)
+
+    order = positions[np.argsort(groups, kind='stable')]
+    counts = np.bincount(groups, minlength=count)
+    return dict(zip(keys, np.split(order, np.cumsum(counts)[:-1])))
+
+def compact_column(series):
+    """
+    Return a more compact version of an object or string column: strings with few
+    distinct values become a categorical, and numbers or booleans with missing
+    values (stored as objects with None) become a nullable numeric or boolean
+    column. Return None if the column can't be compacted.
+    """
+    inferred = pd.api.types.infer_dtype(series, skipna=True)
+
+    if inferred == 'string':
+        count = series.count()
+        if count and series.nunique() <= COMPACT_MAX_RATIO * count:
+            return series.astype('category')
+
+    elif inferred == 'boolean':
+        return series.astype('boolean')
+
+    elif inferred == 'integer':
+        return series.astype('Int64')
+
+    elif inferred == 'floating':
+        return series.astype('Float64')
+
+    return None
+
+def expand_column(series, dtype):
+    """
+    Return a column compacted by compact_column() with its original `dtype`, and
+    None for missing values in object columns.
+    """
+    if dtype != object:
+        return series.astype(dtype)
+
+    series = series.astype(object)
+    return series.where(series.notna(), None)
+
 class CsvTable(object):
-    def __init__(self, db, tbl_name, metadata, output_table, compile_sensitivities, mapped_cols=None, filter_columns=None):
+    def __init__(self, db, tbl_name, metadata, output_table, compile_sensitivities, mapped_cols=None,
+                 filter_columns=None, project_columns=False, compact=False, load=True):
         self.db = db
         self.name = tbl_name
         self.metadata = metadata
         self.output_table = output_table
         self.compile_sensitivities = compile_sensitivities
+        self._indexes = {}          # indexes of row positions, keyed by tuple of column names
+        self._timeseries_frame = None
+        self._references = None
+        self._reference_rows = {}       # sensitivity_rows() results for the reference sensitivity
+        self.generation = 0             # incremented whenever the data changes
+        self.query_counts = Counter()   # number of queries by tuple of filter column names
         self.data = None
+        self.filename = db.file_for_table(tbl_name)
+        self.cache = db.table_cache
+        self.engine = db.engine
+        self.weather_datetime_filter = db.weather_datetime_filter
+        self.year_filter = db.year_filter
+        self.row_filter = db.row_filter
         self.str_cols = mapped_cols.get(tbl_name, None) if mapped_cols else None
         self.filter_columns = filter_columns or []
+        self.project_columns = project_columns
+        self.unread_cols = []       # columns present in the file(s) but not read
+        self.compact = compact
+        self.compact_dtypes = {}    # original dtypes of columns stored compactly
         self.data_class = None
-        self.load_all()
+
+        if load:
+            self.load_all()
+
+    @property
+    def data(self):
+        return self._data
+
+    @data.setter
+    def data(self, df):
+        self._data = df
+        self.clear_indexes()
+
+    def clear_indexes(self):
+        """
+        Discard the key and composite indexes, the timeseries frame and the reference
+        graph, which must be done if the data is modified in place.
+        """
+        self._indexes = {}
+        self._timeseries_frame = None
+        self._references = None
+        self._reference_rows = {}
+        self.generation += 1
+
+    def index(self, cols):
+        """
+        Return the index for the given columns, building it if necessary: a dict mapping
+        each combination of values in these columns (a single value if only one column is
+        given) to an array of the positions of the rows holding them. Indexes are discarded
+        when `data` is reassigned.
+
+        :param cols: (tuple of str) the names of the columns to index
+        :return: (dict) the index
+        """
+        index = self._indexes.get(cols)
+        if index is None:
+            df = self.data
+            index = self._indexes[cols] = group_positions(*[df[col] for col in cols])
+
+        return index
+
+    def key_index(self):
+        """
+        Return the index of the key column (see index()), or None if the table has no key column.
+        """
+        key_col = self.metadata.key_col
+        df = self.data
+
+        if df is None or not key_col or key_col not in df.columns:
+            return None
+
+        return self.index((key_col,))
+
+    def reference_graph(self):
+        """
+        Return the references between rows given by the table's reference_name column: a
+        dict mapping each key whose rows name a reference to the list of distinct keys they
+        name, in the order they appear. (Rows for different sensitivities or filter values
+        may reference different keys.) The graph is built on first use and discarded with
+        the indexes.
+
+        :return: (dict) key => list of referenced keys, or None if the table has no key
+           or reference_name column
+        """
+        df = self.data
+        key_col = self.metadata.key_col
+
+        if df is None or not key_col or key_col not in df.columns or REFERENCE_COL not in df.columns:
+            return None
+
+        if self._references is None:
+            rows = self.expand(df[[key_col, REFERENCE_COL]])
+            rows = rows[rows[REFERENCE_COL].notna()].drop_duplicates()
+
+            references = {}
+            for key, ref in zip(rows[key_col].values, rows[REFERENCE_COL].values):
+                references.setdefault(key, []).append(ref)
+
+            self._references = references
+
+        return self._references
+
+    def reference_errors(self):
+        """
+        Check the table's reference_name column, returning a message for each reference to
+        a key that isn't in the table, each cycle of references, and each reference to a row
+        that itself names a reference. DataObject.init_from_db() follows references only one
+        step, so the latter would load a row whose own reference is ignored.
+
+        :return: (list of str) the messages, which is empty if all references are valid
+        """
+        references = self.reference_graph()
+        if not references:
+            return []
+
+        name = self.name
+        keys = self.key_index()
+        errors = []
+
+        for key, refs in references.items():
+            for ref in refs:
+                if ref not in keys:
+                    errors.append("Table '{}': key '{}' references unknown key '{}'".format(name, key, ref))
+
+        # Find cycles by walking the references depth-first from each key
+        cyclic = set()
+        finished = set()
+        for start in references:
+            if start in finished:
+                continue
+
+            path = [start]
+            stack = [iter(references[start])]
+            while stack:
+                ref = next(stack[-1], None)
+                if ref is None:
+                    stack.pop()
+                    finished.add(path.pop())
+                elif ref in path:
+                    cycle = path[path.index(ref):]
+                    cyclic.update(cycle)
+                    errors.append("Table '{}': reference cycle {}".format(name, ' -> '.join(map(repr, cycle + [ref]))))
+                elif ref not in finished and ref in references:
+                    path.append(ref)
+                    stack.append(iter(references[ref]))
+
+        for key, refs in references.items():
+            for ref in refs:
+                if ref in references and not (key in cyclic and ref in cyclic):
+                    errors.append("Table '{}': key '{}' references '{}', which itself references {}".format(
+                                  name, key, ref, ', '.join(map(repr, references[ref]))))
+
+        return errors
+
+    def timeseries_frame(self):
+        """
+        Return the table's df_cols data cleaned and indexed as by DataObject.timeseries_cleanup(),
+        but with the key and sensitivity columns as additional outer index levels, and sorted
+        by all levels, so the timeseries for a key and sensitivity is a slice of this frame. The
+        frame is built on first use and discarded with the indexes.
+
+        :return: (tuple of (pandas.DataFrame, numpy array, int)) the frame, the row number in the
+           frame of each row of `data`, and the number of outer index levels; or None if the
+           table has no key column or no df_cols, or if cleaning the whole table would produce
+           different index dtypes or sort order than cleaning the rows for each key separately,
+           i.e., if an index column is numeric with missing values, or holds mixed types.
+        """
+        if self._timeseries_frame is None:
+            self._timeseries_frame = self._build_timeseries_frame() or False
+
+        return self._timeseries_frame or None
+
+    def _build_timeseries_frame(self):
+        md = self.metadata
+        df = self.data
+        key_col = md.key_col
+
+        if df is None or not md.df_cols or not key_col or key_col not in df.columns:
+            return None
+
+        # N.B. these are computed as in DataObject.load_timeseries() and timeseries_cleanup()
+        index_cols = [c for c in md.df_cols if c not in md.df_value_col + [SENSITIVITY_COL]]
+        col_to_keep = list(set(md.df_cols) - {SENSITIVITY_COL})
+        outer_cols = [key_col] + ([SENSITIVITY_COL] if self.has_sensitivity_col() else [])
+
+        if not index_cols or key_col in col_to_keep or not set(col_to_keep).issubset(df.columns):
+            return None
+
+        frame = self.expand(df[outer_cols + col_to_keep])
+
+        if 'gau' in col_to_keep:
+            frame['gau'] = frame['gau'].astype(str)
+
+        for col in index_cols:
+            series = frame[col]
+            filled = series.fillna('_empty_')
+            if filled.dtype != series.dtype:
+                return None
+
+            if pd.api.types.infer_dtype(filled, skipna=False) not in _SORTABLE_TYPES:
+                return None
+
+            frame[col] = filled
+
+        frame[_POSITION_COL] = np.arange(len(frame))
+        frame = frame.set_index(outer_cols + index_cols).sort_index()
+
+        positions = frame.pop(_POSITION_COL).to_numpy()
+        ranks = np.empty(len(positions), dtype=np.intp)
+        ranks[positions] = np.arange(len(positions))
+
+        return (frame, ranks, len(outer_cols))
+
+    def get_timeseries(self, rows):
+        """
+        Return the timeseries for the given rows of `data`, which must all have the same key
+        and sensitivity, as produced by DataObject.timeseries_cleanup(), but extracted from the
+        timeseries frame rather than by indexing and sorting the rows.
+
+        :param rows: (pandas.DataFrame) rows of this table's data
+        :return: (pandas.DataFrame) the timeseries, or None if there is no timeseries frame
+           or the rows' index values are not unique.
+        """
+        return self.timeseries_at(self.data.index.get_indexer(rows.index))
+
+    def timeseries_at(self, positions):
+        """
+        Return the timeseries for the rows of `data` at the given positions, as for get_timeseries().
+
+        :param positions: (array of int) positions of rows of this table's data
+        :return: (pandas.DataFrame) the timeseries, or None if there is no timeseries frame
+           or the rows' index values are not unique.
+        """
+        prebuilt = self.timeseries_frame()
+        if prebuilt is None or len(positions) == 0:
+            return None
+
+        frame, ranks, outer_levels = prebuilt
+
+        # Rows with the same key and sensitivity are contiguous, so they're usually a simple slice
+        positions = np.sort(ranks[positions])
+        first, last = positions[0], positions[-1]
+        ts = frame.iloc[first:last + 1] if last - first + 1 == len(positions) else frame.iloc[positions]
+
+        index = ts.index.droplevel(list(range(outer_levels)))
+        if isinstance(index, pd.MultiIndex):
+            index = index.remove_unused_levels()
+
+        if index.has_duplicates:
+            return None
+
+        return ts.set_axis(index, axis='index')
+
+    def hot_filters(self, count=None):
+        """
+        Return a list of (column names, number of queries) for the `count` most frequently
+        used combinations of filter columns, or for all of them if `count` is None.
+        """
+        return self.query_counts.most_common(count)
+
+    def select_rows(self, filters):
+        """
+        Return the rows of the data matching `filters`, as filter_query() does. Filters
+        that match by simple equality are answered by looking up the values in an index
+        of the filter columns, which is built once the combination of columns has been
+        queried INDEX_MIN_QUERIES times. Until then, if the filters include the key column,
+        the key index is used to limit the query to the rows with the given key. Other
+        filters, e.g., on None values, are passed to filter_query().
+
+        :param filters: (dict) column name/value pairs to match
+        :return: (pandas.DataFrame) the matching rows
+        """
+        df = self.data
+        if not filters or df is None or not all(col in df.columns and indexable(col, value)
+                                                for col, value in filters.items()):
+            return filter_query(df, filters)
+
+        cols = tuple(sorted(filters))
+        self.query_counts[cols] += 1
+
+        key_col = self.metadata.key_col
+        if cols in self._indexes or cols == (key_col,) or self.query_counts[cols] >= INDEX_MIN_QUERIES:
+            index = self.index(cols)
+            key = filters[cols[0]] if len(cols) == 1 else tuple(filters[col] for col in cols)
+            return df.iloc[index.get(key, _NO_ROWS)]
+
+        if key_col in filters:
+            positions = self.key_index().get(filters[key_col], _NO_ROWS)
+            filters = {col: value for col, value in filters.items() if col != key_col}
+            return filter_query(df.iloc[positions], filters)
+
+        return filter_query(df, filters)
+
+    def has_rows(self, filters):
+        """
+        Check cheaply whether any rows might match `filters`, using the key index and any
+        index already built for this combination of filter columns, without querying the
+        data. A False result is exact, so callers can skip select_rows(); True means only
+        that rows may match. Filters that select_rows() passes to filter_query() always
+        give True, so any error they raise is still raised by select_rows().
+
+        :param filters: (dict) column name/value pairs to match
+        :return: (bool) False if no rows match `filters`, else True
+        """
+        df = self.data
+        if df is None or not filters or not all(col in df.columns and indexable(col, value)
+                                                for col, value in filters.items()):
+            return True
+
+        key_col = self.metadata.key_col
+        if key_col in filters and filters[key_col] not in self.key_index():
+            return False
+
+        cols = tuple(sorted(filters))
+        index = self._indexes.get(cols)
+        if index is not None and len(cols) > 1:
+            return tuple(filters[col] for col in cols) in index
+
+        return True
+
+    def sensitivity_positions(self, filters):
+        """
+        Return the positions of the rows matching `filters`, grouped by sensitivity, using
+        the index of the filter columns.
+
+        :param filters: (dict) column name/value pairs to match, which must all be indexable
+        :return: (dict) sensitivity name => sorted numpy array of row positions, which is empty
+           if no rows match; or None if the table has no sensitivity column, or the filters
+           can't be answered from an index.
+        """
+        df = self.data
+        if df is None or SENSITIVITY_COL not in df.columns or not filters or \
+                not all(col in df.columns and indexable(col, value) for col, value in filters.items()):
+            return None
+
+        cols = tuple(sorted(filters))
+        key = filters[cols[0]] if len(cols) == 1 else tuple(filters[col] for col in cols)
+        positions = self.index(cols).get(key, _NO_ROWS)
+
+        groups = group_positions(df[SENSITIVITY_COL].take(positions))
+        if sum(len(group) for group in groups.values()) != len(positions):
+            return None     # null sensitivities, which the indexes omit
+
+        return {sens: positions[group] for sens, group in groups.items()}
+
+    def sensitivity_rows(self, sens, filters):
+        """
+        Return the sensitivity that DataObject.load_timeseries() uses for the rows matching
+        `filters` when the scenario asks for sensitivity `sens`, and the positions of the rows
+        it selects. As in load_timeseries(), the reference sensitivity is used if `sens` is None,
+        and the only sensitivity present is used regardless of `sens`. Results for the reference
+        sensitivity are the same for all scenarios, so they are stored in the table and shared.
+
+        :param sens: (str) the sensitivity named by the scenario, or None
+        :param filters: (dict) column name/value pairs to match, including the key
+        :return: (tuple of (str, numpy array)) the sensitivity and the positions of its rows,
+           which are empty if no rows match; the positions are None if the rows don't include
+           the sensitivity. Returns None if the filters can't be answered from an index.
+        """
+        lookup = None
+        if sens is None:
+            try:
+                lookup = tuple(sorted(filters.items()))
+                if lookup in self._reference_rows:
+                    return self._reference_rows[lookup]
+            except TypeError:
+                return None     # unhashable filter values
+
+        by_sens = self.sensitivity_positions(filters)
+        sens = sens or REF_SENSITIVITY
+
+        if by_sens is None:
+            result = None
+        elif not by_sens:
+            result = (sens, _NO_ROWS)
+        else:
+            # if we only have one sensitivity, we don't care what we queried
+            if len(by_sens) == 1:
+                sens = next(iter(by_sens))
+            result = (sens, by_sens.get(sens))
+
+        if lookup is not None:
+            self._reference_rows[lookup] = result
+
+        return result
+
+    def __getstate__(self):
+        # The database isn't needed to load the data, and shouldn't be copied to worker processes
+        state = self.__dict__.copy()
+        state['db'] = None
+        return state
 
     def _compute_metadata(self):
         md = self.metadata
@@ -42,7 +702,7 @@ class CsvTable(object):
             return
 
         tbl_name = self.name
-        all_cols = self.get_columns()
+        all_cols = self.get_source_columns()
 
         key_col   = md.key_col
         df_cols   = md.df_cols
@@ -71,7 +731,7 @@ class CsvTable(object):
             return
 
         # tbl_name = self.name
-        all_cols =  [x for x in self.get_columns() if x not in self.filter_columns]
+        all_cols =  [x for x in self.get_source_columns() if x not in self.filter_columns]
         md.key_col = None
         md.df_value_col = ['value']
         md.df_cols = all_cols
@@ -83,7 +743,7 @@ class CsvTable(object):
         if md.data_table:
             return
         # tbl_name = self.name
-        all_cols = self.get_columns()
+        all_cols = self.get_source_columns()
         md.key_col = md.key_col
         md.df_value_col = ['sensitivity']
         md.df_cols = ([md.key_col] if md.key_col else []) + md.df_filters + md.df_value_col
@@ -94,23 +754,126 @@ class CsvTable(object):
     def __str__(self):
         return "<{} {}>".format(self.__class__.__name__, self.name)
 
+    def use_column(self, col):
+        """
+        Return whether to read the given column from the table's CSV file(s). Columns
+        in `filter_columns` are never read. If `project_columns` is True, only the columns
+        used by DataObjects are read: the key, attr_cols, df_cols and sensitivity columns,
+        or, if attr_cols aren't specified, all but the metadata's drop_cols. Columns that
+        are not read are recorded in `unread_cols`.
+        """
+        name = col.strip()
+        md = self.metadata
+
+        if name in self.filter_columns:
+            use = False
+
+        elif not self.project_columns or md.data_table or self.output_table:
+            use = True
+
+        elif self.compile_sensitivities:
+            use = name in ([md.key_col] if md.key_col else []) + md.df_filters + [SENSITIVITY_COL]
+
+        elif md.attr_cols:
+            used = [md.key_col, SENSITIVITY_COL, REFERENCE_COL] + md.attr_cols + md.df_cols
+            use = name in used
+
+        else:
+            use = name not in md.drop_cols
+
+        if not (use or name in self.unread_cols):
+            self.unread_cols.append(name)
+
+        return use
+
+    def column_filters(self):
+        """
+        Return a dict mapping column names to the collection of values to keep
+        in that column. The database's weather_datetime_filter and year_filter
+        apply only to output tables, in which these columns are index levels.
+        """
+        filters = {}
+        if self.output_table:
+            for col, values in ((WEATHER_DATETIME_COL, self.weather_datetime_filter), (YEAR_COL, self.year_filter)):
+                if values is not None and col not in self.filter_columns:
+                    filters[col] = values
+
+        return filters
+
+    def filter_rows(self, df):
+        """
+        Return the rows of `df` -- data just read from one of this table's files, or a
+        chunk thereof -- that pass the column filters and the database's `row_filter`.
+        """
+        mask = None
+        cols = {col.strip(): col for col in df.columns}
+
+        for col, values in self.column_filters().items():
+            if col in cols:
+                keep = df[cols[col]].isin(values)
+                mask = keep if mask is None else (mask & keep)
+
+        if self.row_filter:
+            keep = self.row_filter(self.name, df)
+            if keep is not None:
+                mask = keep if mask is None else (mask & keep)
+
+        return df if mask is None else df[mask]
+
+    def _filter_raw_rows(self, raw, converters):
+        """
+        Return the rows of `raw`, a chunk of a file read as raw strings, that pass the
+        column filters and the database's `row_filter`. Column filters on strings or on
+        numbers are applied to the strings directly; otherwise the chunk is parsed and
+        passed to filter_rows().
+        """
+        cols = {col.strip(): col for col in raw.columns}
+        masks = [_str_isin(raw[cols[col]], values) for col, values in self.column_filters().items() if col in cols]
+
+        if self.row_filter or any(mask is None for mask in masks):
+            return raw.loc[self.filter_rows(_parse_strings(raw, converters)).index]
+
+        return raw[np.logical_and.reduce(masks)] if masks else raw
+
+    def _read_csv_pandas(self, f, converters):
+        if not (self.row_filter or self.column_filters()):
+            return pd.read_csv(f, index_col=None, converters=converters, na_values='', low_memory=False,
+                               usecols=self.use_column)
+
+        # Read and filter a chunk at a time so the full file is never in memory. Chunks are
+        # read as raw strings and the rows kept are parsed together, so that column types
+        # are inferred once, as for an unchunked read, rather than separately per chunk.
+        reader = pd.read_csv(f, index_col=None, dtype=object, keep_default_na=False, na_filter=False,
+                             low_memory=False, usecols=self.use_column, chunksize=CHUNK_ROWS)
+        chunks = [self._filter_raw_rows(chunk, converters) for chunk in reader]
+        raw = chunks[0] if len(chunks) == 1 else pd.concat(chunks)
+        return _parse_strings(raw, converters)
+
     def load_all(self):
         if self.data is not None:
             return self.data
 
-        db = self.db
         tbl_name = self.name
-        filename = db.file_for_table(tbl_name)
+        filename = self.filename
 
         if not filename:
             raise CsvdbException('Missing filename for table "{}"'.format(tbl_name))
 
+        # N.B. the key must be computed before the metadata is updated from the data
+        cache_key = self.cache.key(self) if self.cache else None
+        if cache_key and self.cache.read(self, cache_key):
+            if Verbose:
+                print("Read table '{}' from cache".format(tbl_name))
+            self.compact_data()
+            return self.data
+
         # Avoid reading empty strings as nan (sensitivity column must be None)
         converters = {col: str for col in self.str_cols} if self.str_cols else {}
 
         if type(filename) is not list:
             filename = [filename]
 
+        self.unread_cols = []
         dfs = []
         for fn in filename:
             if not (fn.endswith('.gz') or fn.endswith('.csv')):
@@ -119,14 +882,18 @@ class CsvTable(object):
             wait = 1
             while True:
                 try:
-                    if fn.endswith('.gz'):
+                    if self.engine == 'polars':
+                        df = read_csv_polars(fn, str_cols=self.str_cols, filters=self.column_filters(),
+                                             usecols=self.use_column)
+                        dfs.append(self.filter_rows(df))
+                    elif fn.endswith('.gz'):
                         with openFunc(fn, 'r', encoding=None) as f:
-                            dfs.append(pd.read_csv(f, index_col=None, converters=converters, na_values='', low_memory=False))
+                            dfs.append(self._read_csv_pandas(f, converters))
                     else:
                         with openFunc(fn, 'r', encoding='utf-8',errors='replace') as f:
-                            dfs.append(pd.read_csv(f, index_col=None, converters=converters, na_values='', low_memory=False))
+                            dfs.append(self._read_csv_pandas(f, converters))
                     break
-                except (OSError, pd.errors.EmptyDataError) as e:
+                except (OSError, pd.errors.EmptyDataError, pl.exceptions.NoDataError) as e:
                     if wait<=7200:
                         print('Pausing {} seconds. Error: "{}" when reading path: {}'.format(wait, e, fn))
                         time.sleep(wait)
@@ -186,26 +953,59 @@ class CsvTable(object):
             df = df.set_index([c for c in md.df_cols if c not in md.df_value_col]).sort_index()
 
         elif self.compile_sensitivities:
-            df = df[md.df_cols]
-            df = df.rename(columns={md.key_col:'name'})
-
-            for filter_num, filter in enumerate(md.df_filters):
-                df[filter] = filter + ':' + df[filter]
-                df = df.rename(columns={filter: 'filter{}'.format(filter_num+1)})
-
-            df = df.drop_duplicates()
+            df = sensitivity_catalogue(df, md)
 
         # self.data = df = df.where(~pd.isnull(df), other=None) # this no longer works: https://stackoverflow.com/questions/14162723/replacing-pandas-or-numpy-nan-with-a-none-to-use-with-mysqldb
         self.data = df = df.replace({np.nan: None})
 
-        drop_cols = [x for x in self.filter_columns if x in self.data.columns]
-        if drop_cols:
-            self.data.drop(drop_cols, axis='columns', inplace=True)
+        if cache_key:
+            self.cache.write(self, cache_key)
+
+        self.compact_data()
+        df = self.data
 
         rows, cols = df.shape
         if Verbose:
             print("Cached {} rows, {} cols for table '{}' from {}".format(rows, cols, tbl_name, filename))
 
+    def compact_data(self):
+        """
+        If `compact` is True, store the table's low-cardinality string columns as
+        categoricals and its numeric columns with missing values as nullable numeric
+        columns rather than as Python objects. Only regular tables are compacted.
+        Use expand() to restore the original values in rows extracted from the data.
+        """
+        if not self.compact or self.output_table or self.compile_sensitivities or self.data is None:
+            return
+
+        df = self.data
+        compact_dtypes = {}
+
+        for col in df.columns:
+            series = df[col]
+            if series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+                compacted = compact_column(series)
+                if compacted is not None:
+                    compact_dtypes[col] = series.dtype
+                    df[col] = compacted
+
+        self.compact_dtypes = compact_dtypes
+
+    def expand(self, df):
+        """
+        Return `df`, a subset of this table's rows, with any columns stored compactly
+        restored to the dtypes and values they would have without compact storage.
+        """
+        cols = [col for col in self.compact_dtypes if col in df.columns]
+        if not cols:
+            return df
+
+        df = df.copy(deep=False)
+        for col in cols:
+            df[col] = expand_column(df[col], self.compact_dtypes[col])
+
+        return df
+
     def has_sensitivity_col(self, df=None):
         df = self.data if df is None else df
         return SENSITIVITY_COL in df.columns
@@ -239,8 +1039,11 @@ class CsvTable(object):
             if sens:
                 filters[SENSITIVITY_COL] = sens
 
-        rows = filter_query(self.data, filters)
-        tups = [tuple(row) for idx, row in rows.iterrows()]
+        if self.has_rows(filters):
+            rows = self.expand(self.select_rows(filters))
+            tups = [tuple(row) for idx, row in rows.iterrows()]
+        else:
+            tups = []
 
         count = len(tups)
         if count == 0:
@@ -257,9 +1060,90 @@ class CsvTable(object):
 
         return tups[0]
 
+    def get_rows(self, key_col, keys, scenario=None, allow_multiple=False, raise_error=False, **filters):
+        """
+        Get the rows for many keys at once, returning the same results as calling get_row()
+        for each key, but finding the rows for all keys in a single pass over the table.
+
+        :param key_col: (str) the name of the column holding the key values
+        :param keys: (iterable of str) the keys to find
+        :param scenario: (instance of subclass of csvdb.AbstractScenario), or None
+        :param allow_multiple: (bool) whether to allow multiple rows to be returned for a key
+        :param raise_error: (bool) whether to raise an error or return None for a key if the
+           {`key`, `scenario`} combination is not found in `table`.
+        :param filters: (dict) any addition colname/value pairs to use to isolate the rows of interest
+        :return: (dict) keyed by key, with values as returned by get_row()
+        :raises RowNotFound: if raise_error is True and a {`key`, `scenario`} combination
+            is not present in `table`.
+        """
+        name = self.name
+        if self.data is None:
+            raise CsvdbException('No data has been loaded for table {}'.format(name))
+
+        keys = list(keys)
+
+        sens_by_key = {}
+        if scenario and self.has_sensitivity_col():
+            for key in keys:
+                sens = scenario.get_sensitivity(name, key, **dict(filters, **{key_col: key}))
+                if sens:
+                    sens_by_key[key] = sens
+
+        index = self.key_index() if key_col == self.metadata.key_col else None
+
+        # Fall back to get_row() for lookups that can't be done by simple equality tests
+        if (index is None or key_col in filters or (sens_by_key and SENSITIVITY_COL in filters) or
+                not all(indexable(key_col, key) for key in keys) or
+                not all(indexable(SENSITIVITY_COL, sens) for sens in sens_by_key.values())):
+            return {key: self.get_row(key_col, key, scenario=scenario, allow_multiple=allow_multiple,
+                                      raise_error=raise_error, **filters) for key in keys}
+
+        positions = [index.get(key, _NO_ROWS) for key in set(keys)]
+        rows = self.data.iloc[np.sort(np.concatenate(positions + [_NO_ROWS]))]
+        rows = filter_query(rows, filters)
+
+        if sens_by_key:
+            wanted = pd.Series(rows[key_col].to_numpy(dtype=object)).map(sens_by_key).to_numpy(dtype=object)
+            keep = pd.isnull(wanted) | (rows[SENSITIVITY_COL].to_numpy(dtype=object) == wanted)
+            rows = rows[keep]
+
+        rows = self.expand(rows)
+
+        tups_by_key = {}
+        for key, (idx, row) in zip(rows[key_col], rows.iterrows()):
+            tups_by_key.setdefault(key, []).append(tuple(row))
+
+        results = {}
+        for key in keys:
+            tups = tups_by_key.get(key, [])
+            count = len(tups)
+
+            if count == 0:
+                if raise_error:
+                    raise RowNotFound(name, key)
+                results[key] = None
+
+            elif count > 1:
+                if not allow_multiple:
+                    raise DuplicateRowsFound(name, key)
+                results[key] = tups
+
+            else:
+                results[key] = tups[0]
+
+        return results
+
     def get_columns(self):
         return list(self.data.columns)
 
+    def get_source_columns(self):
+        """
+        Return the names of the columns in the table's CSV file(s), including
+        those that were not read.
+        """
+        cols = self.get_columns()
+        return cols + [col for col in self.unread_cols if col not in cols]
+
     def get_dataframe(self, key_value, copy=True):
         """
         Return a DataFrame holding all rows from the underlying DataFrame
@@ -274,6 +1158,13 @@ class CsvTable(object):
         """
         df = self.data
         key_col = self.db.get_key_col(self.name)
-        result = df.query("%s == %r" % (key_col, key_value))
+        index = self.key_index() if (key_col == self.metadata.key_col and indexable(key_col, key_value)) else None
+
+        if index is None:
+            result = df.query("%s == %r" % (key_col, key_value))
+        else:
+            result = df.iloc[index.get(key_value, _NO_ROWS)]
+
+        result = self.expand(result)
         return result.copy(deep=True) if copy else result
 
@@ -1,5 +1,9 @@
+import hashlib
+
 from .error import CsvdbException
 
+_BLOCK_SIZE = 1 << 20
+
 def col_match(col, value):
     """
     Creates a query string to match a column in a dataframe.
@@ -12,6 +16,25 @@ def col_match(col, value):
 
     return '{} == "{}"'.format(col, value)
 
+def indexable(col, value):
+    """
+    Return whether the condition built by col_match(col, value) is a simple equality
+    test that gives the same result as looking up `value` in a dict keyed by the
+    column's values.
+    """
+    import math
+
+    if not col.isidentifier():
+        return False
+
+    if isinstance(value, str):
+        return not ('"' in value or '\\' in value)
+
+    if isinstance(value, (int,  float)) and not isinstance(value, bool):
+        return math.isfinite(value)
+
+    return False
+
 def ensure_tuple(obj):
     if isinstance(obj, tuple):
         return obj
@@ -31,6 +54,17 @@ def filter_query(df, filters):
     result = df.query(query)
     return result
 
+def file_digest(pathname):
+    """
+    Return the SHA-1 digest of a file's contents, as a hex string, reading it in blocks.
+    """
+    sha = hashlib.sha1()
+    with open(pathname, 'rb') as f:
+        for block in iter(lambda: f.read(_BLOCK_SIZE), b''):
+            sha.update(block)
+
+    return sha.hexdigest()
+
 def camelCase(s):
     """
     If a string has any underscores (e.g., 'Camel_case', change it to 'CamelCase'.
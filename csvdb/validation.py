@@ -221,16 +221,23 @@ def update_from_schema(dbdir, schema_file, run):
 @click.option('--validate', '-v', is_flag=True, default=False,
               help='Validate the database based on validation.csv in the named package.')
 
+@click.option('--workers', '-w', type=int, default=None, metavar='N',
+              help='Clean tables in N worker processes. Default is to clean them serially.')
+
+@click.option('--incremental', '-i', is_flag=True, default=False,
+              help='Revalidate only tables that changed, or whose referenced tables or validation rules changed, '
+                   'since the last --incremental run, reporting stored results for the others.')
+
 def main(dbdir, pkg_name, all, trim_blanks, drop_empty_rows, drop_empty_cols, drop_empty,
          schema_file, create_schema, delete_orphans, update_schema, include_shapes, save_changes,
-         check_unique, validate):
+         check_unique, validate, workers, incremental):
     main_fun(dbdir, pkg_name, all, trim_blanks, drop_empty_rows, drop_empty_cols, drop_empty,
          schema_file, create_schema, delete_orphans, update_schema, include_shapes, save_changes,
-         check_unique, validate)
+         check_unique, validate, workers, incremental)
 
 def main_fun(dbdir, pkg_name, all=False, trim_blanks=False, drop_empty_rows=False, drop_empty_cols=False, drop_empty=False,
          schema_file=None, create_schema=False, delete_orphans=False, update_schema=False, include_shapes=False, save_changes=False,
-         check_unique=False, validate=False):
+         check_unique=False, validate=False, workers=None, incremental=False):
 
     if update_schema and create_schema:
         raise ValidationUsageError('Options --update-schema and --create-schema are mutually exclusive.')
@@ -274,4 +281,6 @@ def main_fun(dbdir, pkg_name, all=False, trim_blanks=False, drop_empty_rows=Fals
                         drop_empty_cols=drop_empty_cols,
                         check_unique=check_unique,
                         include_shapes=include_shapes,
-                        delete_orphans=delete_orphans)
+                        delete_orphans=delete_orphans,
+                        workers=workers,
+                        incremental=incremental)
@@ -3,6 +3,7 @@ from os import path
 
 from schema import *
 from tst_database import TestDatabase
+from test_engines import compare_engines
 
 class CapitalCost(TechCapitalCost):
     pass
@@ -97,11 +98,14 @@ def main():
     ccgt_obj = DispatchableThermal('CCGT', scenario)
     ccgt_obj.show_costs()
 
-    # Shapes data are loaded by calling self.shapes.load_all() or automatically,
-    # on the first call to self.shapes.get_slice().
+    # Shapes data are loaded by calling self.shapes.load_all() or preload(names),
+    # or automatically, one shape at a time, by calls to self.shapes.get_slice().
     ag_shapes = db.shapes.get_slice('Agriculture')
     print("\nAgriculture shapes:\n", ag_shapes)
 
+    count = compare_engines()
+    print("\nEngines 'pandas' and 'polars' loaded identical data for {} tables".format(count))
+
     print('done')
 
 if __name__ == '__main__':
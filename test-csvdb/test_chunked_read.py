@@ -0,0 +1,59 @@
+#
+# Check that filtered output tables read in chunks get the same column types as when
+# read in one piece, when a column's values look numeric in some chunks but not others.
+# Run directly as a script, or with "pytest --import-mode=importlib test-csvdb".
+#
+from os import path
+import shutil
+import tempfile
+
+import pandas as pd
+
+import csvdb.table
+from csvdb import CsvDatabase
+
+TableName = 'OUT_MIXED'
+
+def write_table(dirname, rows=300):
+    """
+    Write an output table whose 'zone' column holds numbers in the first half of the
+    rows and strings in the second, and whose 'flag' column is empty in the first half.
+    """
+    with open(path.join(dirname, TableName + '.csv'), 'w') as f:
+        f.write('zone,flag,year,value\n')
+        for i in range(rows):
+            first = i < rows // 2
+            zone = str(i % 7) if first else 'z{}'.format(i % 7)
+            flag = '' if first else 'True'
+            f.write('{},{},{},{}\n'.format(zone, flag, 2020 + i % 3, i * 0.5))
+
+def load(dirname, chunk_rows, engine='pandas'):
+    saved = csvdb.table.CHUNK_ROWS
+    csvdb.table.CHUNK_ROWS = chunk_rows
+    try:
+        db = CsvDatabase(pathname=dirname, output_tables=True, year_filter=[2020, 2022],
+                         engine=engine, load=False)
+        return db.get_table(TableName).data
+    finally:
+        csvdb.table.CHUNK_ROWS = saved
+
+def test_chunked_read_infers_types_once():
+    dirname = tempfile.mkdtemp()
+    try:
+        write_table(dirname)
+        whole = load(dirname, 100000)
+        chunked = load(dirname, 50)
+
+        pd.testing.assert_frame_equal(whole, chunked)
+        pd.testing.assert_frame_equal(whole, load(dirname, 50, engine='polars'))
+
+        for df in (whole, chunked):
+            zones = df.index.get_level_values('zone') if 'zone' in df.index.names else df['zone']
+            assert pd.api.types.infer_dtype(zones) == 'string'
+            assert set(df.index.get_level_values('year') if 'year' in df.index.names else df['year']) == {2020, 2022}
+    finally:
+        shutil.rmtree(dirname)
+
+if __name__ == '__main__':
+    test_chunked_read_infers_types_once()
+    print('Chunked and unchunked reads agree')
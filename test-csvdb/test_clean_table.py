@@ -0,0 +1,126 @@
+#
+# Check that clean_table()'s column-wise blank trimming and empty row and column checks
+# give the same results as checking each cell, and that the tables it writes hold the
+# values cleaned cell by cell.
+# Run directly as a script, or with "pytest --import-mode=importlib test-csvdb".
+#
+import contextlib
+import io
+from os import path
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, path.dirname(path.realpath(__file__)))
+
+from csvdb.database import SPACES_PATTERN, CLEANING_COUNTS, trimmed_strings, blank_mask
+from tst_validation import make_validation_db, remove_validation_db, open_db, Tables
+
+Columns = {
+    'object': pd.Series([' a ', 'b  c', None, '', 'd', 3, 1.5, np.nan, '  ', 'e\t\tf'], dtype=object),
+    'str': pd.Series([' a ', 'b  c', None, '', 'd', 'x y', '  z', np.nan, '  ', 'e\t\tf'], dtype='str'),
+    'float': pd.Series([1.5, np.nan, 2.0, 0.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0]),
+    'int': pd.Series(range(10)),
+    'blank': pd.Series([None, '', None, '', '', None, '', None, '', None], dtype=object),
+}
+
+def is_blank(value):
+    return value is None or value == ''
+
+def trim_cells(series):
+    """
+    Trim each string value as clean_table() did, one cell at a time.
+
+    :return: (dict) index label => trimmed value, for the values that changed
+    """
+    trimmed = {}
+    for idx, value in series.items():
+        if isinstance(value, str):
+            stripped = re.sub(SPACES_PATTERN, ' ', value.strip())
+            if value != stripped:
+                trimmed[idx] = stripped
+
+    return trimmed
+
+def clean_cells(df):
+    """
+    Trim blanks and find empty columns and rows one cell at a time.
+
+    :return: (tuple of (pandas.DataFrame, int, list, list)) the trimmed data, the number of
+       values trimmed, and the empty 'Unnamed: ' columns and empty rows
+    """
+    df = df.copy()
+    trim_count = 0
+    empty_cols = []
+    for col_name in df:
+        for idx, value in trim_cells(df[col_name]).items():
+            df.loc[idx, col_name] = value
+            trim_count += 1
+
+        if col_name.startswith('Unnamed: ') and all(is_blank(value) for value in df[col_name].tolist()):
+            empty_cols.append(col_name)
+
+    empty_rows = [idx for idx, row in zip(df.index, df.itertuples(index=False, name=None))
+                  if all(is_blank(value) for value in row)]
+
+    return df, trim_count, empty_cols, empty_rows
+
+def test_helpers_match_cell_checks():
+    for name, series in Columns.items():
+        series = series.set_axis(range(100, 100 + len(series)))
+        assert trimmed_strings(series).to_dict() == trim_cells(series), name
+        assert blank_mask(series).tolist() == [is_blank(value) for value in series.tolist()], name
+
+def with_blank_rows(df):
+    """
+    Return a copy of `df` with blank rows inserted, which clean_table() is given explicitly
+    since the rows of fully blank lines are dropped when tables are read.
+    """
+    columns = {}
+    for col_name in df:
+        values = df[col_name].tolist()
+        values[1:1] = [None if df[col_name].dtype == object else '']
+        values[3:3] = ['']
+        columns[col_name] = pd.Series(values, dtype=df[col_name].dtype)
+
+    return pd.DataFrame(columns)
+
+def test_clean_table_matches_cell_checks():
+    dirname, db_path, pkg_name = make_validation_db()
+    try:
+        db = open_db(db_path)
+        val_dict = db.read_validation_csv(pkg_name)
+        data = {tbl_name: with_blank_rows(db.get_table(tbl_name).data) for tbl_name in Tables}
+        expected = {}
+        for tbl_name in Tables:
+            df, trim_count, empty_cols, empty_rows = clean_cells(data[tbl_name])
+            df = df.drop(empty_cols, axis='columns').drop(empty_rows, axis='index').reset_index(drop=True)
+            expected[tbl_name] = df, [len(empty_rows), len(empty_cols), trim_count, 0]
+
+        assert all(counts[0] == 2 for df, counts in expected.values())
+        assert any(counts[1] for df, counts in expected.values())
+        assert any(counts[2] for df, counts in expected.values())
+
+        for save_changes in (False, True):
+            db = open_db(db_path)
+            for tbl_name in Tables:
+                counts = dict.fromkeys(CLEANING_COUNTS, 0)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    db.clean_table(tbl_name, val_dict, counts, data=data[tbl_name].copy(), delete_orphans=False,
+                                   save_changes=save_changes)
+                assert [counts[name] for name in CLEANING_COUNTS] == expected[tbl_name][1], tbl_name
+
+        # The files hold the values cleaned one cell at a time
+        db = open_db(db_path)
+        for tbl_name in Tables:
+            pd.testing.assert_frame_equal(expected[tbl_name][0], db.get_table(tbl_name).data.reset_index(drop=True),
+                                          obj=tbl_name)
+    finally:
+        remove_validation_db(dirname)
+
+if __name__ == '__main__':
+    test_helpers_match_cell_checks()
+    test_clean_table_matches_cell_checks()
+    print('clean_table tests passed')
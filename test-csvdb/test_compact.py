@@ -0,0 +1,68 @@
+#
+# Check that storing tables compactly (compact=True) uses less memory, and that rows,
+# DataFrames and DataObjects hold the same values as without compaction.
+# Run directly as a script, or with "pytest --import-mode=importlib test-csvdb".
+#
+import copy
+from os import path
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, path.dirname(path.realpath(__file__)))
+
+from csvdb import CsvDatabase
+from tst_database import _Metadata
+from tst_synth import make_synth_db, remove_synth_db, open_db, make_scenarios, load_results, assert_same
+
+DbPath = path.normpath(path.join(path.dirname(path.realpath(__file__)), '..', 'test.csvdb'))
+
+def test_compact_results_match():
+    dirname, db_path = make_synth_db()
+    try:
+        full = open_db(db_path)
+        expected = load_results(full, make_scenarios())
+        full_data = {name: tbl.data for name, tbl in full.table_objs.items()}
+
+        db = open_db(db_path, compact=True)
+        assert_same(expected, load_results(db, make_scenarios()))
+
+        for name, df in full_data.items():
+            tbl = db.get_table(name)
+            assert set(tbl.compact_dtypes) == {col for col in df.columns if tbl.data[col].dtype != df[col].dtype}
+            pd.testing.assert_frame_equal(df, tbl.expand(tbl.data), obj=name)
+
+        compacted = db.get_table('COST')
+        assert compacted.compact_dtypes and isinstance(compacted.data['cost_type'].dtype, pd.CategoricalDtype)
+        assert (compacted.data.memory_usage(deep=True).sum() <
+                full_data['COST'].memory_usage(deep=True).sum())
+    finally:
+        remove_synth_db(dirname)
+
+def test_compact_tables_expand_to_originals():
+    full = CsvDatabase(pathname=DbPath, metadata=copy.deepcopy(_Metadata))
+    db = CsvDatabase(pathname=DbPath, metadata=copy.deepcopy(_Metadata), compact=True)
+
+    assert list(full.table_objs) == list(db.table_objs)
+    assert any(tbl.compact_dtypes for tbl in db.table_objs.values())
+
+    for name, tbl in db.table_objs.items():
+        df = full.table_objs[name].data
+        if df is None:
+            assert tbl.data is None, name
+            continue
+
+        pd.testing.assert_frame_equal(df, tbl.expand(tbl.data), obj=name)
+
+        # Columns that aren't compacted keep their dtype
+        for col in df.columns:
+            if col not in tbl.compact_dtypes:
+                assert tbl.data[col].dtype == df[col].dtype, (name, col)
+
+        # All columns are restored when the table is reloaded for cleaning
+        pd.testing.assert_frame_equal(df, db.get_table(name, all_columns=True).data, obj=name)
+
+if __name__ == '__main__':
+    test_compact_results_match()
+    test_compact_tables_expand_to_originals()
+    print('Compact storage tests passed')
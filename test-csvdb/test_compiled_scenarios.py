@@ -0,0 +1,196 @@
+#
+# Check that DataObjects loaded with a compiled scenario are the same as those loaded with
+# the scenario itself, that the compiled view is reused, and that it finds each lookup's
+# rows without selecting rows from the table. Also check that compiled scenarios share the
+# reference sensitivity's rows, and that running scenarios in worker processes gives the
+# same results as running them serially.
+# Run directly as a script, or with "pytest --import-mode=importlib test-csvdb".
+#
+import os
+from os import path
+import sys
+
+sys.path.insert(0, path.dirname(path.realpath(__file__)))
+
+from csvdb.scenario import CompiledScenario, CsvdbFilter
+from csvdb.table import CsvTable
+from csvdb.data_object import get_database
+from tst_synth import (make_synth_db, remove_synth_db, open_db, make_scenarios, make_class, object_state,
+                       load_results, assert_same, Scenario, Names)
+
+class Calls(object):
+    """
+    Count the calls to a CsvTable method while in use.
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.count = 0
+        self.method = method = getattr(CsvTable, self.name)
+
+        def counted(*args, **kwargs):
+            self.count += 1
+            return method(*args, **kwargs)
+
+        setattr(CsvTable, self.name, counted)
+        return self
+
+    def __exit__(self, *args):
+        setattr(CsvTable, self.name, self.method)
+
+def load_scenario(scenario):
+    """
+    Load the SIMPLE and COSTD objects for the scenario. This is module-level so that
+    it can be run in a worker process.
+
+    :return: (tuple of (int, dict)) the process id, and the state of each object
+    """
+    db = get_database()
+    states = {}
+    for name in ('SIMPLE', 'COSTD'):
+        cls = make_class(db.get_table(name))
+        for key in db.get_table(name).key_index():
+            states[(name, key)] = object_state(cls.load_from_db(key, scenario))
+
+    return os.getpid(), states
+
+def make_batch(count=6):
+    """
+    Return `count` scenarios, each of which names the 'hi' sensitivity for different COSTD keys.
+    """
+    return [Scenario('b{}'.format(i), [('COSTD', key, 'hi', None) for key in Names[i::count]])
+            for i in range(count)]
+
+def compiled_results(db, scenarios):
+    """
+    Return load_results() with each scenario replaced by its compiled view.
+    """
+    return load_results(db, [scenario.compile(db) for scenario in scenarios])
+
+def test_compiled_objects_match():
+    dirname, db_path = make_synth_db()
+    try:
+        for compact in (False, True):
+            db = open_db(db_path, compact=compact)
+            expected = load_results(db, make_scenarios())
+
+            # Compile fresh scenarios against a fresh database, so no results are shared
+            db = open_db(db_path, compact=compact)
+            assert_same(expected, compiled_results(db, make_scenarios()), compact)
+    finally:
+        remove_synth_db(dirname)
+
+def test_compiled_view_is_reused():
+    dirname, db_path = make_synth_db()
+    try:
+        db = open_db(db_path)
+        scenario = make_scenarios()[1]
+        compiled = scenario.compile(db)
+        assert isinstance(compiled, CompiledScenario)
+        assert scenario.compile() is compiled and compiled.compile() is compiled
+        assert compiled.name == scenario.name
+
+        # Adding a filter discards the compiled view
+        scenario.add_filter(CsvdbFilter('SIMPLE', 'T02', 'alt'))
+        assert scenario.compile(db) is not compiled
+
+        # So does a new database
+        other = open_db(db_path)
+        assert scenario.compile(other).db is other
+    finally:
+        remove_synth_db(dirname)
+
+def test_compiled_lookups_skip_row_selection():
+    dirname, db_path = make_synth_db()
+    try:
+        db = open_db(db_path)
+        scenario = make_scenarios()[1]
+        expected = {}
+        for name in ('COST', 'SIMPLE', 'COSTD'):
+            cls = make_class(db.get_table(name))
+            filters = {'cost_type': 'capacity'} if name == 'COST' else {}
+            for key in db.get_table(name).key_index():
+                expected[(name, key)] = object_state(cls.load_from_db(key, scenario, **filters))
+
+        db = open_db(db_path)
+        scenario = make_scenarios()[1]
+        with Calls('sensitivity_rows') as resolved:
+            compiled = scenario.compile(db)
+        assert resolved.count == sum(len(lookups) for lookups in scenario.filter_dict.values())
+
+        # Lookups named in the scenario were resolved when it was compiled
+        with Calls('sensitivity_positions') as positions:
+            make_class(db.get_table('SIMPLE')).load_from_db('T01', compiled)
+            make_class(db.get_table('COSTD')).load_from_db('T03', compiled)
+        assert positions.count == 0
+
+        with Calls('select_rows') as selections:
+            for name in ('COST', 'SIMPLE', 'COSTD'):
+                cls = make_class(db.get_table(name))
+                filters = {'cost_type': 'capacity'} if name == 'COST' else {}
+                for key in db.get_table(name).key_index():
+                    assert_same(expected[(name, key)], object_state(cls.load_from_db(key, compiled, **filters)),
+                                (name, key))
+
+        assert selections.count == 0
+    finally:
+        remove_synth_db(dirname)
+
+def test_reference_rows_are_shared():
+    dirname, db_path = make_synth_db()
+    try:
+        db = open_db(db_path)
+        scenarios = [Scenario('a', []), Scenario('b', [('SIMPLE', 'T01', 'alt', None)])]
+        cls = make_class(db.get_table('SIMPLE'))
+
+        cls.load_from_db('T02', scenarios[0].compile(db))
+        compiled = scenarios[1].compile(db)
+        with Calls('sensitivity_positions') as positions:
+            obj = cls.load_from_db('T02', compiled)
+        assert positions.count == 0
+        assert_same(object_state(cls.load_from_db('T02', scenarios[1])), object_state(obj))
+    finally:
+        remove_synth_db(dirname)
+
+
+def test_compiled_views_store_named_lookups():
+    dirname, db_path = make_synth_db()
+    try:
+        db = open_db(db_path)
+        scenarios = make_batch()
+        compiled = db.compile_scenarios(scenarios)
+        assert [view.scenario for view in compiled] == scenarios
+        assert all(view is scenario.compile(db) for view, scenario in zip(compiled, scenarios))
+
+        for view, scenario in zip(compiled, scenarios):
+            assert len(view.views['COSTD'][2]) == len(scenario.filter_dict['COSTD'])
+            assert list(view.views) == ['COSTD']
+    finally:
+        remove_synth_db(dirname)
+
+def test_map_scenarios_matches_serial():
+    dirname, db_path = make_synth_db()
+    try:
+        db = open_db(db_path)
+        scenarios = make_batch()
+        expected = [load_scenario(scenario)[1] for scenario in scenarios]
+
+        serial = db.map_scenarios(load_scenario, scenarios)
+        assert {pid for pid, _ in serial} == {os.getpid()}
+        assert_same(expected, [states for _, states in serial])
+
+        parallel = db.map_scenarios(load_scenario, scenarios, workers=3)
+        assert os.getpid() not in {pid for pid, _ in parallel}
+        assert_same(expected, [states for _, states in parallel])
+    finally:
+        remove_synth_db(dirname)
+
+if __name__ == '__main__':
+    test_compiled_objects_match()
+    test_compiled_view_is_reused()
+    test_compiled_lookups_skip_row_selection()
+    test_reference_rows_are_shared()
+    test_compiled_views_store_named_lookups()
+    test_map_scenarios_matches_serial()
+    print('Compiled scenario tests passed')
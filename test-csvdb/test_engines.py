@@ -0,0 +1,83 @@
+#
+# Check that the 'polars' read engine loads the same tables as the default 'pandas' engine.
+# Run directly as a script, or with "pytest --import-mode=importlib test-csvdb", since the
+# directory's name isn't a valid package name.
+#
+import copy
+from os import path
+import shutil
+import sys
+import tempfile
+
+import pandas as pd
+
+sys.path.insert(0, path.dirname(path.realpath(__file__)))
+
+from csvdb import CsvDatabase
+from csvdb.table import ENGINES
+from tst_database import _Metadata
+
+DbPath = path.normpath(path.join(path.dirname(path.realpath(__file__)), '..', 'test.csvdb'))
+
+# Polars parses floats exactly, whereas pandas' default parser can be off in the last
+# digit of floats written with 17 significant digits, so floats are compared to within
+# a few units in the last place. All other values must be identical.
+FloatTolerance = 1e-15
+
+def load_tables(engine):
+    db = CsvDatabase(pathname=DbPath, metadata=copy.deepcopy(_Metadata), engine=engine, load=False)
+    return {name: db.get_table(name).data for name in sorted(db.get_table_names())}
+
+def compare_engines():
+    """
+    Load every table in test.csvdb with each engine and check that the DataFrames match.
+
+    :return: (int) the number of tables compared
+    :raises AssertionError: if any table differs
+    """
+    pandas_tables = load_tables('pandas')
+    polars_tables = load_tables('polars')
+
+    assert list(pandas_tables) == list(polars_tables)
+    for name, df in pandas_tables.items():
+        try:
+            pd.testing.assert_frame_equal(df, polars_tables[name], check_exact=False,
+                                          rtol=FloatTolerance, atol=0)
+        except AssertionError as e:
+            raise AssertionError("Table {}: {}".format(name, e))
+
+    return len(pandas_tables)
+
+def test_engines_load_identical_tables():
+    assert compare_engines() > 0
+
+def test_engines_read_large_integers_alike():
+    # Integers beyond int64 are read by pandas as uint64 if they fit, else as Python ints
+    dirname = tempfile.mkdtemp()
+    try:
+        with open(path.join(dirname, 'OUT_BIG.csv'), 'w') as f:
+            f.write('name,unsigned,huge,huge_na,value\n')
+            for i in range(4):
+                f.write('n{},{},{},{},{}\n'.format(i, 2 ** 64 - 1 - i, 2 ** 70 + i, 'NA' if i == 1 else -2 ** 70 - i, i))
+
+        tables = []
+        for engine in ENGINES:
+            db = CsvDatabase(pathname=dirname, output_tables=True, engine=engine, load=False)
+            tables.append(db.get_table('OUT_BIG').data.reset_index())
+
+        df = tables[0]
+        assert df['unsigned'].dtype == 'uint64' and df['unsigned'][0] == 2 ** 64 - 1
+        assert df['huge'].dtype == object and df['huge'][3] == 2 ** 70 + 3
+        assert df['huge_na'].dtype == object and pd.isna(df['huge_na'][1])
+
+        for other in tables[1:]:
+            pd.testing.assert_frame_equal(df, other)
+            for col in df.columns:
+                assert list(map(type, df[col])) == list(map(type, other[col])), col
+    finally:
+        shutil.rmtree(dirname)
+
+if __name__ == '__main__':
+    test_engines_read_large_integers_alike()
+    count = compare_engines()
+    print("Engines 'pandas' and 'polars' loaded identical data for {} tables".format(count))
@@ -0,0 +1,92 @@
+#
+# Check that validate(incremental=True) reports the same results as a full validation,
+# and that tables unchanged since the last run, and the tables they reference, aren't
+# loaded at all.
+# Run directly as a script, or with "pytest --import-mode=importlib test-csvdb".
+#
+import contextlib
+import io
+from os import path
+import sys
+
+sys.path.insert(0, path.dirname(path.realpath(__file__)))
+
+from csvdb.error import ValidationFormatError
+from csvdb.table import CsvTable
+from tst_validation import make_validation_db, remove_validation_db, open_db, write_lines, Tables, Validation
+
+class TableLoads(object):
+    """
+    Record the names of the tables loaded while in use.
+    """
+    def __enter__(self):
+        self.names = []
+        self.load_all = load_all = CsvTable.load_all
+
+        def record(tbl):
+            self.names.append(tbl.name)
+            return load_all(tbl)
+
+        CsvTable.load_all = record
+        return self
+
+    def __exit__(self, *args):
+        CsvTable.load_all = self.load_all
+
+def validate(dirname, db_path, pkg_name, incremental=True):
+    """
+    Validate the database without saving changes.
+
+    :return: (tuple of (str, str, list)) the printed output, the contents of
+       cleaning_errors.txt, and the names of the tables loaded
+    """
+    output = io.StringIO()
+    with TableLoads() as loads, contextlib.redirect_stdout(output):
+        open_db(db_path).validate(pkg_name, save_changes=False, incremental=incremental)
+
+    with open(path.join(dirname, 'cleaning_errors.txt')) as f:
+        errors = f.read()
+
+    return output.getvalue(), errors, loads.names
+
+def test_unchanged_tables_are_not_loaded():
+    dirname, db_path, pkg_name = make_validation_db()
+    try:
+        _, full_errors, _ = validate(dirname, db_path, pkg_name, incremental=False)
+
+        _, errors, loaded = validate(dirname, db_path, pkg_name)
+        assert errors == full_errors
+        assert sorted(loaded) == sorted(Tables)
+
+        output, errors, loaded = validate(dirname, db_path, pkg_name)
+        assert errors == full_errors
+        assert loaded == []
+        assert 'stored results for 3 of 3 tables' in output
+
+        # Only the changed table and the table it references are loaded
+        write_lines(path.join(db_path, 'CHILD.csv'), Tables['CHILD'] + ['c6,p4,2020,1,'])
+        output, errors, loaded = validate(dirname, db_path, pkg_name)
+        assert sorted(set(loaded)) == ['CHILD', 'PARENT']
+        assert ' - CHILD\n' in output and ' - OTHER (unchanged)' in output
+
+        _, full_errors, _ = validate(dirname, db_path, pkg_name, incremental=False)
+        assert errors == full_errors
+    finally:
+        remove_validation_db(dirname)
+
+def test_unknown_references_are_reported():
+    for rule, message in (('CHILD,parent,,,,,PARENT,nope,,,,,', "unknown column 'nope'"),
+                          ('CHILD,parent,,,,,NOPE,name,,,,,', "unknown table 'NOPE'")):
+        dirname, db_path, pkg_name = make_validation_db(validation=Validation[:1] + [rule])
+        try:
+            open_db(db_path).read_validation_csv(pkg_name)
+            assert False, "expected ValidationFormatError"
+        except ValidationFormatError as e:
+            assert message in str(e)
+        finally:
+            remove_validation_db(dirname)
+
+if __name__ == '__main__':
+    test_unchanged_tables_are_not_loaded()
+    test_unknown_references_are_reported()
+    print('Incremental validation tests passed')
@@ -0,0 +1,153 @@
+#
+# Check that DataObject.load_all_from_db() creates the same objects as calling load_from_db()
+# for each key, including for keys whose rows it leaves to load_from_db(), and that it loads
+# the other keys without calling load_from_db().
+# Run directly as a script, or with "pytest --import-mode=importlib test-csvdb".
+#
+import contextlib
+import io
+import os
+from os import path
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, path.dirname(path.realpath(__file__)))
+
+from csvdb import CsvDatabase, CsvMetadata
+from tst_synth import (make_synth_db, remove_synth_db, open_db, make_scenarios, make_class, object_state,
+                       outcome, assert_same, Scenario, CostTypes)
+
+# Keys whose rows load_timeseries() handles in different ways: K1's attributes differ by row,
+# K2 has no values, K3 has duplicate index values, K4 has no reference sensitivity, K5 and
+# K6 have other sensitivities, K7 and K8 have missing attributes, and K9 has a missing value.
+EdgeTable = ['name,geography,unit,gau,vintage,value,sensitivity',
+             'K0,state,kw,ca,2020,1,',
+             'K0,state,kw,tx,2020,2,',
+             'K1,state,kw,ca,2020,1,',
+             'K1,state,mw,tx,2020,2,',
+             'K2,state,kw,ca,2020,,',
+             'K2,state,kw,tx,2020,,',
+             'K3,state,kw,ca,2020,1,',
+             'K3,state,kw,ca,2020,5,',
+             'K3,state,kw,tx,2020,2,',
+             'K4,state,kw,ca,2020,1,a',
+             'K4,state,kw,ca,2020,2,b',
+             'K5,state,kw,ca,2020,7,high',
+             'K5,state,kw,tx,2020,8,high',
+             'K6,state,kw,ca,2020,1,',
+             'K6,state,kw,ca,2020,9,high',
+             'K7,state,,ca,2020,1,',
+             'K7,state,,tx,2030,3,',
+             'K8,state,,ca,2020,1,',
+             'K8,state,kw,tx,2020,2,',
+             'K9,state,kw,ca,2020,1,',
+             'K9,state,kw,tx,2020,,']
+
+class ObjectLoads(object):
+    """
+    Record the keys passed to load_from_db() by the given DataObject class while in use.
+    """
+    def __init__(self, cls):
+        self.cls = cls
+
+    def __enter__(self):
+        self.keys = []
+        load_from_db = self.cls.load_from_db.__func__
+
+        def record(cls, key, scenario, **filters):
+            self.keys.append(key)
+            return load_from_db(cls, key, scenario, **filters)
+
+        self.cls.load_from_db = classmethod(record)
+        return self
+
+    def __exit__(self, *args):
+        del self.cls.load_from_db
+
+def load_each(tbl, scenario, keys, filters):
+    """
+    Load objects with load_from_db() and with load_all_from_db(), and return the outcome
+    of each, with the keys of the objects created, and the keys loaded by load_from_db()
+    within load_all_from_db().
+    """
+    results = []
+    for load_all in (False, True):
+        cls = make_class(tbl)
+        output = io.StringIO()
+        with ObjectLoads(cls) as loads, contextlib.redirect_stdout(output):
+            if load_all:
+                loaded = outcome(cls.load_all_from_db, scenario, keys=keys, **filters)
+            else:
+                loaded = outcome(lambda: {key: cls.load_from_db(key, scenario, **filters) for key in keys})
+
+        if loaded[0] == 'ok':
+            loaded = ('ok', {key: object_state(obj) for key, obj in loaded[1].items()})
+        results.append((loaded, [obj._key for obj in cls.instances()], output.getvalue(), loads.keys))
+
+        # Build the table's indexes afresh for each pass
+        tbl.clear_indexes()
+
+    return results
+
+def test_load_all_matches_load_from_db():
+    dirname, db_path = make_synth_db()
+    try:
+        for compact in (False, True):
+            db = open_db(db_path, compact=compact)
+            scenarios = make_scenarios()
+            scenarios.append(scenarios[1].compile(db))
+
+            for name, filter_sets in (('MAIN', [{}]),
+                                      ('COST', [{'cost_type': cost_type} for cost_type in CostTypes]),
+                                      ('SIMPLE', [{}]),
+                                      ('COSTD', [{}, {'zone': 'ca'}])):
+                tbl = db.get_table(name)
+                keys = list(tbl.key_index())
+                for scenario in scenarios:
+                    for filters in filter_sets:
+                        expected, result = load_each(tbl, scenario, keys, filters)
+                        context = (compact, name, scenario.name, filters)
+                        assert_same(expected[:3], result[:3], context)
+
+                        # Tables with timeseries are loaded in a single pass
+                        if name != 'MAIN' and 'zone' not in filters and expected[0][0] == 'ok':
+                            assert result[3] == [], (context, result[3])
+    finally:
+        remove_synth_db(dirname)
+
+def test_load_all_matches_load_from_db_for_edge_cases():
+    dirname = tempfile.mkdtemp()
+    db_path = path.join(dirname, 'edge.csvdb')
+    try:
+        os.makedirs(db_path)
+        with open(path.join(db_path, 'EDGE.csv'), 'w') as f:
+            f.write('\n'.join(EdgeTable) + '\n')
+
+        for compact in (False, True):
+            CsvDatabase.clear_cached_database()
+            db = CsvDatabase.get_database(db_path, compact=compact, metadata=[
+                CsvMetadata('EDGE', df_cols=['sensitivity', 'gau', 'vintage', 'value'])])
+            tbl = db.get_table('EDGE')
+            keys = list(tbl.key_index())
+
+            scenarios = [Scenario('reference', []),
+                         Scenario('high', [('EDGE', 'K6', 'high', None), ('EDGE', 'K0', 'zz', None)]),
+                         Scenario('compiled', [('EDGE', 'K6', 'high', None)]).compile(db)]
+
+            for scenario in scenarios:
+                for key_list in [[key] for key in keys] + [keys, ['K0', 'K2', 'K3', 'K6', 'K9', 'NOPE']]:
+                    for filters in ({}, {'vintage': 2020}):
+                        expected, result = load_each(tbl, scenario, key_list, filters)
+                        assert_same(expected[:3], result[:3], (compact, scenario.name, key_list, filters))
+
+            # Only the keys that can't be sliced from the timeseries frame go through load_from_db()
+            _, result = load_each(tbl, scenarios[0], ['K0', 'K3', 'K5', 'K9'], {})
+            assert result[3] == ['K3']
+    finally:
+        shutil.rmtree(dirname)
+
+if __name__ == '__main__':
+    test_load_all_matches_load_from_db()
+    test_load_all_matches_load_from_db_for_edge_cases()
+    print('load_all_from_db tests passed')
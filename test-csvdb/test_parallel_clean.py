@@ -0,0 +1,86 @@
+#
+# Check that validate() with worker processes prints and writes the same results, and
+# saves the same files, as a serial run, and that the tables are cleaned in the workers.
+# Run directly as a script, or with "pytest --import-mode=importlib test-csvdb".
+#
+import contextlib
+import io
+import os
+from os import path
+import sys
+
+sys.path.insert(0, path.dirname(path.realpath(__file__)))
+
+from csvdb import CsvDatabase
+from tst_validation import make_validation_db, remove_validation_db, open_db, Tables
+
+class TableCleans(object):
+    """
+    Record the names of the tables cleaned in this process while in use.
+    """
+    def __enter__(self):
+        self.names = []
+        self.clean_table = clean_table = CsvDatabase.clean_table
+
+        def record(db, tbl_name, *args, **kwargs):
+            self.names.append(tbl_name)
+            return clean_table(db, tbl_name, *args, **kwargs)
+
+        CsvDatabase.clean_table = record
+        return self
+
+    def __exit__(self, *args):
+        CsvDatabase.clean_table = self.clean_table
+
+def read_files(dirname):
+    """
+    Return the contents of the files under `dirname`, other than the validation package's,
+    keyed by their relative pathnames, with `dirname` replaced as in the printed output.
+    """
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(dirname):
+        dirnames[:] = [name for name in dirnames if not name.startswith('tstpkg_')]
+        for filename in filenames:
+            pathname = path.join(dirpath, filename)
+            with open(pathname, 'rb') as f:
+                files[path.relpath(pathname, dirname)] = f.read().replace(dirname.encode(), b'DIR')
+
+    return files
+
+def validate(save_changes, workers=None):
+    """
+    Validate a new copy of the validation database.
+
+    :return: (tuple of (str, dict, list)) the printed output and the files in the directory
+       afterwards, with the temporary directory replaced, and the tables cleaned in this process
+    """
+    dirname, db_path, pkg_name = make_validation_db()
+    try:
+        output = io.StringIO()
+        db = open_db(db_path)
+        with TableCleans() as cleans, contextlib.redirect_stdout(output):
+            db.validate(pkg_name, save_changes=save_changes, workers=workers)
+
+        if save_changes and workers:
+            assert not set(db.table_objs) & {'PARENT', 'CHILD'}   # rewritten by the workers
+
+        return output.getvalue().replace(dirname, 'DIR'), read_files(dirname), cleans.names
+    finally:
+        remove_validation_db(dirname)
+
+def test_parallel_clean_matches_serial():
+    for save_changes in (False, True):
+        output, files, cleaned = validate(save_changes)
+        assert sorted(cleaned) == sorted(Tables)
+        assert 'cleaning_errors.txt' in files and 'Errors in CHILD.parent' in output
+
+        for workers in (2, 3):
+            assert validate(save_changes, workers) == (output, files, [])
+
+    # The files are only modified when saving changes
+    unsaved = validate(False)[1]
+    assert unsaved[path.join('db.csvdb', 'PARENT.csv')] != files[path.join('db.csvdb', 'PARENT.csv')]
+
+if __name__ == '__main__':
+    test_parallel_clean_matches_serial()
+    print('Parallel clean tests passed')
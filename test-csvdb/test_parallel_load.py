@@ -0,0 +1,67 @@
+#
+# Check that loading tables in parallel, with threads or processes, produces the same
+# tables, in the same order and with the same metadata, as loading them serially.
+# Run directly as a script, or with "pytest --import-mode=importlib test-csvdb".
+#
+import copy
+from os import path
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, path.dirname(path.realpath(__file__)))
+
+from csvdb import CsvDatabase
+from csvdb.error import CsvdbException
+from tst_database import _Metadata
+
+DbPath = path.normpath(path.join(path.dirname(path.realpath(__file__)), '..', 'test.csvdb'))
+
+def load(**kwargs):
+    return CsvDatabase(pathname=DbPath, metadata=copy.deepcopy(_Metadata), **kwargs)
+
+def assert_same_database(expected, db):
+    assert list(expected.table_objs) == list(db.table_objs)
+    for name, tbl in expected.table_objs.items():
+        other = db.table_objs[name]
+        if tbl.data is None:
+            assert other.data is None, name
+        else:
+            pd.testing.assert_frame_equal(tbl.data, other.data, obj=name)
+
+        for attr in ('key_col', 'attr_cols', 'df_cols', 'drop_cols'):
+            assert getattr(tbl.metadata, attr) == getattr(other.metadata, attr), (name, attr)
+
+        # Metadata updated by worker processes is copied back to the database's instances
+        assert other.metadata is db.metadata.get(name, other.metadata)
+
+def test_parallel_load_matches_serial():
+    serial = load()
+    assert serial.table_objs
+
+    for executor in ('thread', 'process'):
+        assert_same_database(serial, load(load_workers=4, load_executor=executor))
+
+def test_load_tables_skips_loaded_tables():
+    db = load(load=False)
+    names = sorted(db.tables_with_classes())
+    db.load_tables(names[:3])
+    loaded = {name: db.table_objs[name] for name in names[:3]}
+
+    db.load_tables(names, workers=4)
+    assert list(db.table_objs) == names
+    assert all(db.table_objs[name] is tbl for name, tbl in loaded.items())
+
+def test_unknown_executor_is_rejected():
+    db = load(load=False)
+    try:
+        db.load_tables(db.tables_with_classes(), workers=2, executor='fiber')
+        assert False, "expected CsvdbException"
+    except CsvdbException as e:
+        assert "executor must be one of" in str(e)
+
+if __name__ == '__main__':
+    test_parallel_load_matches_serial()
+    test_load_tables_skips_loaded_tables()
+    test_unknown_executor_is_rejected()
+    print('Parallel load tests passed')
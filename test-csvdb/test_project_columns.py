@@ -0,0 +1,66 @@
+#
+# Check that reading only the columns used by DataObjects (project_columns=True) loads the
+# same rows and DataObjects as reading every column, and that the other columns are not read.
+# Run directly as a script, or with "pytest --import-mode=importlib test-csvdb".
+#
+from os import path
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, path.dirname(path.realpath(__file__)))
+
+from tst_synth import make_synth_db, remove_synth_db, open_db, make_scenarios, load_results, assert_same
+
+def test_projected_tables_match_full_tables():
+    dirname, db_path = make_synth_db()
+    try:
+        full = open_db(db_path)
+        expected = load_results(full, make_scenarios())
+        full_data = {name: tbl.data for name, tbl in full.table_objs.items()}
+
+        db = open_db(db_path, project_columns=True)
+        results = load_results(db, make_scenarios())
+        assert list(expected) == list(results)
+
+        # Rows hold only the columns read, but DataObjects are loaded with the same values
+        for lookup, result in results.items():
+            if lookup[0] == 'obj':
+                assert_same(expected[lookup], result, lookup)
+            elif lookup[0] == 'df' and result[0] == 'ok':
+                assert_same(expected[lookup][1][list(result[1].columns)], result[1], lookup)
+
+        # Tables with drop_cols don't read them
+        assert db.get_table('MAIN').unread_cols == ['notes']
+        assert sorted(db.get_table('COST').unread_cols) == ['notes', 'source']
+
+        for name, df in full_data.items():
+            tbl = db.get_table(name)
+            assert not set(tbl.unread_cols) & set(tbl.data.columns), name
+            assert set(tbl.unread_cols) | set(tbl.data.columns) == set(df.columns), name
+            pd.testing.assert_frame_equal(df[list(tbl.data.columns)], tbl.data, obj=name)
+
+            # The table is reloaded with every column when asked
+            pd.testing.assert_frame_equal(df, db.get_table(name, all_columns=True).data, obj=name)
+    finally:
+        remove_synth_db(dirname)
+
+def test_projected_sensitivity_tables_match():
+    dirname, db_path = make_synth_db()
+    try:
+        full = open_db(db_path, compile_sensitivities=True)
+        db = open_db(db_path, compile_sensitivities=True, project_columns=True)
+
+        assert list(full.table_objs) == list(db.table_objs)
+        for name, tbl in full.table_objs.items():
+            if tbl.data is None:
+                assert db.table_objs[name].data is None, name
+            else:
+                pd.testing.assert_frame_equal(tbl.data, db.table_objs[name].data, obj=name)
+    finally:
+        remove_synth_db(dirname)
+
+if __name__ == '__main__':
+    test_projected_tables_match_full_tables()
+    test_projected_sensitivity_tables_match()
+    print('Column projection tests passed')
@@ -0,0 +1,126 @@
+#
+# Check that the ValidationInfo objects referring to the same table column or folder share
+# one set of values, equal to the values each used to collect for itself, that folders are
+# listed once, and that the values are collected again after the table is reloaded.
+# Run directly as a script, or with "pytest --import-mode=importlib test-csvdb".
+#
+import os
+from os import path
+import sys
+
+sys.path.insert(0, path.dirname(path.realpath(__file__)))
+
+from csvdb import check
+from tst_validation import make_validation_db, remove_validation_db, open_db, write_lines, Tables, Validation
+
+# Two more rules referring to PARENT.name, and two listing the files in a folder
+Rules = Validation + ['OTHER,name,,,,,PARENT,name,,,,,',
+                      'PARENT,other,,,,,PARENT,name,,,,x,y',
+                      'CHILD,name,,,,Files,,,,,,,',
+                      'OTHER,kind2,,,,Files,,,,,,,']
+
+class Globs(object):
+    """
+    Count the folders listed while in use.
+    """
+    def __enter__(self):
+        self.count = 0
+        self.glob = glob = check.glob
+
+        def counted(pattern):
+            self.count += 1
+            return glob(pattern)
+
+        check.glob = counted
+        return self
+
+    def __exit__(self, *args):
+        check.glob = self.glob
+
+def make_db():
+    dirname, db_path, pkg_name = make_validation_db(validation=Rules)
+    os.makedirs(path.join(db_path, 'Files'))
+    for name in ('f1.csv', 'f2.csv.gz'):
+        write_lines(path.join(db_path, 'Files', name), ['a'])
+
+    return dirname, db_path, pkg_name
+
+def collect_values(db, info):
+    """
+    Collect the legal values of a rule as each ValidationInfo did for itself.
+    """
+    if info.folder:
+        return [name.split('.')[0] for name in os.listdir(path.join(db.pathname, info.folder))]
+
+    values = []
+    for ref_tbl, ref_col in ((info.ref_tbl, info.ref_col), (info.ref_tbl2, info.ref_col2)):
+        if ref_tbl and ref_col:
+            values += list(db.get_table(ref_tbl).data[ref_col].unique())
+
+    return values + info.extra
+
+def test_reference_sets_are_shared():
+    dirname, db_path, pkg_name = make_db()
+    try:
+        db = open_db(db_path)
+        val_dict = db.read_validation_csv(pkg_name)
+        infos = [info for info in val_dict.values() if info.folder or info.ref_tbl]
+        assert len(infos) == 6
+
+        with Globs() as globs:
+            for info in infos:
+                assert info.reference_sets is db.reference_sets
+                assert sorted(info.values) == sorted(collect_values(db, info)), info
+                assert info.value_set == frozenset(info.values)
+        assert globs.count == 1
+
+        child_parent, other_name, other = (val_dict[key] for key in (('CHILD', 'parent'), ('OTHER', 'name'),
+                                                                      ('PARENT', 'other')))
+        assert other_name.values is child_parent.values
+        assert other.values[-2:] == ['x', 'y'] and other.values is other.values
+        assert val_dict[('CHILD', 'name')].values is val_dict[('OTHER', 'kind2')].values
+
+        # Reloading PARENT drops its values, but not those of the folder
+        folder_values = val_dict[('CHILD', 'name')].values
+        values = child_parent.values
+        db.table_objs.pop('PARENT')
+        write_lines(path.join(db_path, 'PARENT.csv'), Tables['PARENT'] + ['p5,B,1,'])
+        db.get_table('PARENT')
+
+        with Globs() as globs:
+            assert child_parent.values is not values and 'p5' in child_parent.values
+            assert other_name.values is child_parent.values
+            assert 'p5' in other.values and other.values[-2:] == ['x', 'y']
+            assert val_dict[('CHILD', 'name')].values is folder_values
+        assert globs.count == 0
+
+        # As does invalidating it explicitly
+        values = child_parent.values
+        db.invalidate_reference_sets('PARENT')
+        assert child_parent.values is not values and child_parent.values == values
+
+        db.invalidate_reference_sets()
+        assert val_dict[('CHILD', 'name')].values is not folder_values
+    finally:
+        remove_validation_db(dirname)
+
+def test_invalidation_is_deferred_while_frozen():
+    dirname, db_path, pkg_name = make_db()
+    try:
+        db = open_db(db_path)
+        info = db.read_validation_csv(pkg_name)[('CHILD', 'parent')]
+        values = info.values
+
+        db.reference_sets.freeze()
+        db.invalidate_reference_sets('PARENT')
+        assert info.values is values
+
+        db.reference_sets.thaw()
+        assert info.values is not values and info.values == values
+    finally:
+        remove_validation_db(dirname)
+
+if __name__ == '__main__':
+    test_reference_sets_are_shared()
+    test_invalidation_is_deferred_while_frozen()
+    print('Reference set tests passed')
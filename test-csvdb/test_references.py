@@ -0,0 +1,127 @@
+#
+# Check that the reference_name graph and the reference errors reported for a table agree
+# with following each row's reference separately, and that DataObjects follow references
+# as before.
+# Run directly as a script, or with "pytest --import-mode=importlib test-csvdb".
+#
+import os
+from os import path
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, path.dirname(path.realpath(__file__)))
+
+from csvdb import CsvDatabase, CsvMetadata
+from csvdb.error import CsvdbException
+from tst_synth import make_synth_db, remove_synth_db, open_db, make_class
+
+# A refers to B, H to A (a chain), C to the unknown D, E and F to each other, and S to itself
+RefTable = ['name,reference_name,value',
+            'A,B,1',
+            'B,,2',
+            'C,D,3',
+            'E,F,4',
+            'F,E,5',
+            'H,A,6',
+            'S,S,7']
+
+def follow_references(tbl):
+    """
+    Find the reference errors by looking up each row's reference with get_row().
+
+    :return: (tuple of (dict, set, set, set)) the references of each key, the (key, unknown
+       reference) pairs, the keys in cycles and the (key, reference) pairs of chains
+    """
+    references = {}
+    for key, ref in zip(tbl.data['name'], tbl.data['reference_name']):
+        if isinstance(ref, str) and ref not in references.get(key, []):
+            references.setdefault(key, []).append(ref)
+
+    def ref_of(key):
+        row = tbl.get_row('name', key)
+        return row[1] if row is not None and isinstance(row[1], str) else None
+
+    unknown = {(key, ref) for key, refs in references.items() for ref in refs
+               if tbl.get_row('name', ref) is None}
+
+    cyclic = set()
+    for key in references:
+        seen = [key]
+        ref = ref_of(key)
+        while ref is not None and ref not in seen:
+            seen.append(ref)
+            ref = ref_of(ref)
+        if ref == key:
+            cyclic.add(key)
+
+    chains = {(key, ref) for key, refs in references.items() for ref in refs
+              if ref_of(ref) is not None and not (key in cyclic and ref in cyclic)}
+
+    return references, unknown, cyclic, chains
+
+def write_ref_db(dirname):
+    db_path = path.join(dirname, 'ref.csvdb')
+    os.makedirs(db_path)
+    with open(path.join(db_path, 'REF.csv'), 'w') as f:
+        f.write('\n'.join(RefTable) + '\n')
+    return db_path
+
+def test_reference_errors_match_lookups():
+    dirname = tempfile.mkdtemp()
+    try:
+        db_path = write_ref_db(dirname)
+        CsvDatabase.clear_cached_database()
+        db = CsvDatabase.get_database(db_path, metadata=[CsvMetadata('REF')])
+        tbl = db.get_table('REF')
+
+        references, unknown, cyclic, chains = follow_references(tbl)
+        assert tbl.reference_graph() == references
+        assert tbl.reference_graph() is tbl.reference_graph()
+
+        errors = tbl.reference_errors()
+        assert errors == db.reference_errors()
+        for key, ref in unknown:
+            assert "Table 'REF': key '{}' references unknown key '{}'".format(key, ref) in errors
+        for key, ref in chains:
+            assert "Table 'REF': key '{}' references '{}', which itself references".format(key, ref) in \
+                '\n'.join(errors)
+        cycles = [error for error in errors if 'reference cycle' in error]
+        assert {key.strip("'") for error in cycles for key in error.split('cycle ')[1].split(' -> ')} == cyclic
+        assert len(errors) == len(unknown) + len(chains) + len(cycles)
+
+        # DataObjects follow a reference one step, to the referenced row
+        cls = make_class(tbl)
+        for key in ('A', 'B', 'C', 'H', 'S', 'X'):
+            row = tbl.get_row('name', key)
+            if row is not None and isinstance(row[1], str):
+                row = tbl.get_row('name', row[1])
+
+            obj = cls.load_from_db(key, None)
+            assert obj._has_data == (row is not None), key
+            assert obj.attrs == dict(zip(tbl.metadata.attr_cols, row or [None] * 3)), key
+
+        CsvDatabase.clear_cached_database()
+        try:
+            CsvDatabase.get_database(db_path, metadata=[CsvMetadata('REF')], check_references=True)
+            assert False, "expected CsvdbException"
+        except CsvdbException as e:
+            assert all(error in str(e) for error in errors)
+    finally:
+        shutil.rmtree(dirname)
+
+def test_valid_references():
+    dirname, db_path = make_synth_db()
+    try:
+        db = open_db(db_path, check_references=True)
+        tbl = db.get_table('MAIN')
+        assert tbl.reference_graph() == follow_references(tbl)[0] != {}
+        assert db.reference_errors() == []
+        assert db.get_table('COST').reference_graph() is None
+    finally:
+        remove_synth_db(dirname)
+
+if __name__ == '__main__':
+    test_reference_errors_match_lookups()
+    test_valid_references()
+    print('Reference tests passed')
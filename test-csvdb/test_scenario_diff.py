@@ -0,0 +1,86 @@
+#
+# Check that AbstractScenario.diff() reports exactly the lookups named in either scenario
+# whose DataObjects load differently in the two scenarios.
+# Run directly as a script, or with "pytest --import-mode=importlib test-csvdb".
+#
+from os import path
+import sys
+
+sys.path.insert(0, path.dirname(path.realpath(__file__)))
+
+from tst_synth import (make_synth_db, remove_synth_db, open_db, make_scenarios, make_class, object_state,
+                       outcome, assert_same, Scenario)
+
+def make_diff_scenarios():
+    """
+    Return scenarios that name the same, different, missing and only sensitivities for
+    various lookups, in addition to those returned by make_scenarios().
+    """
+    return make_scenarios() + [
+        Scenario('a', [('COST', 'T01', 'high', [('cost_type', 'capacity')]),
+                       ('COST', 'T20', 'high', [('cost_type', 'energy')]),
+                       ('SIMPLE', 'T01', 'alt', None),
+                       ('SIMPLE', 'MISSING', 'alt', None),
+                       ('COSTD', 'T03', 'hi', None),
+                       ('MAIN', 'T01', 'x', None)]),
+        Scenario('b', [('COST', 'T01', 'high', [('cost_type', 'capacity')]),
+                       ('COST', 'T02', 'low', [('cost_type', 'energy')]),
+                       ('SIMPLE', 'T01', '_reference_', None),
+                       ('COSTD', 'T03', 'hi', None)]),
+    ]
+
+def load(db, tbl_name, key, constraints, scenario):
+    """
+    Return the outcome of loading the object for a lookup, with only the class of any error,
+    since the message names the sensitivity asked for.
+    """
+    cls = make_class(db.get_table(tbl_name))
+    result = outcome(lambda: object_state(cls.load_from_db(key, scenario, **dict(constraints or ()))))
+    return result[:2]
+
+def changed_lookups(db, scenario, other):
+    """
+    Return the lookups named in either scenario whose objects load differently in the two.
+    """
+    changed = set()
+    for tbl_name in set(scenario.filter_dict) | set(other.filter_dict):
+        lookups = set(scenario.filter_dict.get(tbl_name, {})) | set(other.filter_dict.get(tbl_name, {}))
+        for key, constraints in lookups:
+            try:
+                assert_same(load(db, tbl_name, key, constraints, scenario),
+                            load(db, tbl_name, key, constraints, other))
+            except AssertionError:
+                changed.add((tbl_name, key, constraints))
+
+    return changed
+
+def test_diff_matches_loaded_objects():
+    dirname, db_path = make_synth_db()
+    try:
+        db = open_db(db_path)
+        scenarios = make_diff_scenarios()
+
+        for scenario in scenarios:
+            assert scenario.diff(scenario) == {}
+            for other in scenarios:
+                diffs = scenario.diff(other, db)
+                reported = {(tbl_name, key, constraints)
+                            for tbl_name, changes in diffs.items() for key, constraints, _, _ in changes}
+                assert reported == changed_lookups(db, scenario, other), (scenario.name, other.name)
+
+                # The result is symmetric, and the same for compiled scenarios
+                assert other.diff(scenario, db) == {tbl_name: sorted([(key, constraints, sens2, sens1)
+                                                                      for key, constraints, sens1, sens2 in changes],
+                                                                     key=repr)
+                                                    for tbl_name, changes in diffs.items()}
+                assert scenario.compile(db).diff(other) == diffs
+
+        a, b = scenarios[-2:]
+        assert a.diff(b) == {'COST': [('T02', (('cost_type', 'energy'),), '_reference_', 'low')],
+                             'SIMPLE': [('T01', None, 'alt', '_reference_')]}
+    finally:
+        remove_synth_db(dirname)
+
+if __name__ == '__main__':
+    test_diff_matches_loaded_objects()
+    print('Scenario diff tests passed')
@@ -0,0 +1,82 @@
+#
+# Check that the sensitivity catalogue of tables and shapes is the same as the data of a
+# database created with compile_sensitivities=True, whether or not the tables are loaded,
+# and that loaded tables aren't read again.
+# Run directly as a script, or with "pytest --import-mode=importlib test-csvdb".
+#
+from os import path
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, path.dirname(path.realpath(__file__)))
+
+from csvdb.table import CsvTable
+from tst_synth import make_synth_db, remove_synth_db, open_db
+
+class TableReads(object):
+    """
+    Record the names of the tables read while in use.
+    """
+    def __enter__(self):
+        self.names = []
+        self.load_all = load_all = CsvTable.load_all
+
+        def record(tbl):
+            self.names.append(tbl.name)
+            return load_all(tbl)
+
+        CsvTable.load_all = record
+        return self
+
+    def __exit__(self, *args):
+        CsvTable.load_all = self.load_all
+
+def assert_same_frames(expected, frames):
+    assert sorted(expected) == sorted(frames)
+    for name, df in expected.items():
+        pd.testing.assert_frame_equal(df, frames[name], obj=name)
+
+def test_catalogue_matches_compiled_sensitivities():
+    dirname, db_path = make_synth_db()
+    try:
+        for compact in (False, True):
+            compiled = open_db(db_path, compile_sensitivities=True, compact=compact)
+            compiled.shapes.load_all(verbose=False)
+            expected = {name: tbl.data for name, tbl in compiled.table_objs.items() if tbl.data is not None}
+            expected_shapes = {name: df for name, df in compiled.shapes.slices.items() if df is not None}
+            assert expected and expected_shapes
+
+            for load in (False, True):
+                db = open_db(db_path, load=load, compact=compact)
+                loaded = dict(db.table_objs)
+
+                with TableReads() as reads:
+                    assert_same_frames(expected, db.sensitivity_catalogue(workers=4))
+                    assert_same_frames(expected_shapes, db.shapes.sensitivity_catalogue(workers=4))
+
+                # Loaded tables are catalogued from their data; others are read without being kept
+                if load:
+                    assert reads.names == []
+                else:
+                    assert sorted(reads.names) == sorted(db.tables_with_classes())
+                assert db.table_objs == loaded
+                assert not db.shapes.slices
+    finally:
+        remove_synth_db(dirname)
+
+def test_catalogue_of_named_tables():
+    dirname, db_path = make_synth_db()
+    try:
+        db = open_db(db_path, load=False)
+        catalogue = db.sensitivity_catalogue(['COST', 'MAIN'])
+        assert list(catalogue) == ['COST']
+        assert set(catalogue['COST']['sensitivity']) == {'_reference_', 'high', 'low'}
+        assert list(db.shapes.sensitivity_catalogue(['shapeB'])) == ['shapeB']
+    finally:
+        remove_synth_db(dirname)
+
+if __name__ == '__main__':
+    test_catalogue_matches_compiled_sensitivities()
+    test_catalogue_of_named_tables()
+    print('Sensitivity catalogue tests passed')
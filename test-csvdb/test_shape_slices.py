@@ -0,0 +1,77 @@
+#
+# Check that ShapeDataMgr.get_slice() reads only the requested shape, once, and returns
+# the same data as reading every shape with load_all().
+# Run directly as a script, or with "pytest --import-mode=importlib test-csvdb".
+#
+from os import path
+
+import pandas as pd
+
+from csvdb.database import ShapeDataMgr
+
+DbPath = path.normpath(path.join(path.dirname(path.realpath(__file__)), '..', 'test.csvdb'))
+
+class ShapeLoads(object):
+    """
+    Record the names of the shapes read while in use.
+    """
+    def __enter__(self):
+        self.names = []
+        self.load_shape = load_shape = ShapeDataMgr.load_shape
+
+        def record(mgr, shape_name, verbose=True):
+            self.names.append(shape_name)
+            return load_shape(mgr, shape_name, verbose=verbose)
+
+        ShapeDataMgr.load_shape = record
+        return self
+
+    def __exit__(self, *args):
+        ShapeDataMgr.load_shape = self.load_shape
+
+def assert_same_slice(expected, df, name):
+    if expected is None:
+        assert df is None, name
+    else:
+        pd.testing.assert_frame_equal(expected, df, obj=name)
+
+def test_get_slice_reads_one_shape():
+    for compile_sensitivities in (False, True):
+        every = ShapeDataMgr(DbPath, None, compile_sensitivities).load_all(verbose=False)
+        names = sorted(every)
+        assert len(names) > 1
+
+        mgr = ShapeDataMgr(DbPath, None, compile_sensitivities)
+        for i, name in enumerate(names):
+            with ShapeLoads() as loads:
+                df = mgr.get_slice(name, verbose=False)
+                assert mgr.get_slice(name, verbose=False) is df
+
+            assert loads.names == [name]
+            assert sorted(mgr.slices) == names[:i + 1]
+            assert_same_slice(every[name], df, name)
+
+def test_load_all_skips_loaded_shapes():
+    mgr = ShapeDataMgr(DbPath, None, False)
+    names = sorted(mgr.file_map)
+    mgr.preload(names[:2], verbose=False)
+
+    with ShapeLoads() as loads:
+        mgr.load_all(verbose=False)
+
+    assert loads.names == [name for name in mgr.file_map if name not in names[:2]]
+    assert sorted(mgr.slices) == names
+
+def test_unknown_shape_raises_key_error():
+    mgr = ShapeDataMgr(DbPath, None, False)
+    try:
+        mgr.get_slice('NoSuchShape', verbose=False)
+        assert False, "expected KeyError"
+    except KeyError:
+        assert not mgr.slices
+
+if __name__ == '__main__':
+    test_get_slice_reads_one_shape()
+    test_load_all_skips_loaded_shapes()
+    test_unknown_shape_raises_key_error()
+    print('Shape slice tests passed')
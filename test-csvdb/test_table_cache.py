@@ -0,0 +1,97 @@
+#
+# Check that tables read from the Parquet table cache match those read from CSV, that
+# unchanged tables are read from the cache, and that databases loading tables with
+# different options can share a cache directory.
+# Run directly as a script, or with "pytest --import-mode=importlib test-csvdb".
+#
+import copy
+from os import path
+import shutil
+import sys
+import tempfile
+
+import pandas as pd
+
+sys.path.insert(0, path.dirname(path.realpath(__file__)))
+
+from csvdb import CsvDatabase
+from csvdb.cache import TableCache
+from tst_database import _Metadata
+
+DbPath = path.normpath(path.join(path.dirname(path.realpath(__file__)), '..', 'test.csvdb'))
+
+class CacheCounts(object):
+    """
+    Count the tables read from and written to any TableCache while in use.
+    """
+    def __enter__(self):
+        self.hits = []
+        self.writes = []
+        self.read, self.write = TableCache.read, TableCache.write
+
+        def read(cache, tbl, key):
+            found = self.read(cache, tbl, key)
+            if found:
+                self.hits.append(tbl.name)
+            return found
+
+        def write(cache, tbl, key):
+            written = self.write(cache, tbl, key)
+            if written:
+                self.writes.append(tbl.name)
+            return written
+
+        TableCache.read, TableCache.write = read, write
+        return self
+
+    def __exit__(self, *args):
+        TableCache.read, TableCache.write = self.read, self.write
+
+def load(cache_dir=None, **kwargs):
+    db = CsvDatabase(pathname=DbPath, metadata=copy.deepcopy(_Metadata), cache_dir=cache_dir, **kwargs)
+    return {name: tbl.data for name, tbl in db.table_objs.items()}
+
+def assert_same_tables(expected, tables):
+    assert list(expected) == list(tables)
+    for name, df in expected.items():
+        if df is None:
+            assert tables[name] is None, name
+        else:
+            pd.testing.assert_frame_equal(df, tables[name], obj=name)
+
+def test_cached_tables_match_csv():
+    cache_dir = tempfile.mkdtemp()
+    try:
+        expected = load()
+        with CacheCounts() as cold:
+            assert_same_tables(expected, load(cache_dir))
+
+        with CacheCounts() as warm:
+            assert_same_tables(expected, load(cache_dir))
+
+        assert not cold.hits and cold.writes
+        assert sorted(warm.hits) == sorted(cold.writes) and not warm.writes
+    finally:
+        shutil.rmtree(cache_dir)
+
+def test_option_sets_share_cache_dir():
+    cache_dir = tempfile.mkdtemp()
+    options = [{}, {'compile_sensitivities': True}]
+    try:
+        expected = [load(**kwargs) for kwargs in options]
+        for i in range(3):
+            for kwargs, tables in zip(options, expected):
+                with CacheCounts() as counts:
+                    assert_same_tables(tables, load(cache_dir, **kwargs))
+
+                if i == 0:
+                    assert counts.writes and not counts.hits
+                else:
+                    assert counts.hits and not counts.writes, (i, kwargs)
+    finally:
+        shutil.rmtree(cache_dir)
+
+if __name__ == '__main__':
+    test_cached_tables_match_csv()
+    test_option_sets_share_cache_dir()
+    print('Table cache tests passed')
@@ -0,0 +1,258 @@
+#
+# Check that row lookups answered from a table's indexes return the same rows as querying
+# the whole table with filter_query(), and that the indexed lookups don't query the data.
+# Run directly as a script, or with "pytest --import-mode=importlib test-csvdb".
+#
+from os import path
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, path.dirname(path.realpath(__file__)))
+
+import csvdb.table
+from csvdb.utils import filter_query
+from csvdb.table import CsvTable
+from tst_synth import (make_synth_db, remove_synth_db, open_db, make_scenarios, make_class, outcome,
+                       assert_same)
+
+# Keys which aren't in the tables, including some that can't be looked up in an index
+OddKeys = ['MISSING', "it's", 'a"b', 5, 1.5, None]
+
+class Queries(object):
+    """
+    Count the calls to filter_query() made by CsvTable while in use.
+    """
+    def __enter__(self):
+        self.count = 0
+
+        def counted(df, filters):
+            self.count += 1
+            return filter_query(df, filters)
+
+        csvdb.table.filter_query = counted
+        return self
+
+    def __exit__(self, *args):
+        csvdb.table.filter_query = filter_query
+
+class RowSelections(object):
+    """
+    Record the filters passed to CsvTable.select_rows() while in use.
+    """
+    def __enter__(self):
+        self.filters = []
+        self.select_rows = select_rows = CsvTable.select_rows
+
+        def record(tbl, filters):
+            self.filters.append(dict(filters))
+            return select_rows(tbl, filters)
+
+        CsvTable.select_rows = record
+        return self
+
+    def __exit__(self, *args):
+        CsvTable.select_rows = self.select_rows
+
+class RowLookups(object):
+    """
+    Count the calls to CsvTable.get_row() while in use.
+    """
+    def __enter__(self):
+        self.count = 0
+        self.get_row = get_row = CsvTable.get_row
+
+        def counted(tbl, *args, **kwargs):
+            self.count += 1
+            return get_row(tbl, *args, **kwargs)
+
+        CsvTable.get_row = counted
+        return self
+
+    def __exit__(self, *args):
+        CsvTable.get_row = self.get_row
+
+def query_row(tbl, key, allow_multiple=True, **filters):
+    """
+    Return the result of get_row() found by querying the whole table.
+    """
+    filters[tbl.metadata.key_col] = key
+    tups = [tuple(row) for idx, row in filter_query(tbl.data, filters).iterrows()]
+    if not tups:
+        return None
+
+    return tups if len(tups) > 1 else tups[0]
+
+def query_dataframe(tbl, key):
+    return tbl.data.query("%s == %r" % (tbl.metadata.key_col, key))
+
+def test_key_index_lookups_match_queries():
+    dirname, db_path = make_synth_db()
+    try:
+        db = open_db(db_path)
+        for name in ('MAIN', 'COST', 'SIMPLE'):
+            tbl = db.get_table(name)
+            keys = list(tbl.data['name'].unique())
+
+            index = tbl.key_index()
+            assert sorted(index) == sorted(keys)
+            for key, positions in index.items():
+                np.testing.assert_array_equal(positions, np.flatnonzero(tbl.data['name'] == key))
+
+            for key in keys + OddKeys:
+                assert_same(outcome(query_row, tbl, key), outcome(tbl.get_row, 'name', key, allow_multiple=True),
+                            (name, key))
+                assert_same(outcome(query_dataframe, tbl, key), outcome(tbl.get_dataframe, key), (name, key))
+
+            # Known keys are found without querying the data
+            with Queries() as queries:
+                for key in keys + ['MISSING']:
+                    tbl.get_row('name', key, allow_multiple=True)
+                    tbl.get_dataframe(key)
+            assert queries.count == 0, name
+    finally:
+        remove_synth_db(dirname)
+
+def test_key_index_follows_data():
+    dirname, db_path = make_synth_db()
+    try:
+        db = open_db(db_path)
+        tbl = db.get_table('MAIN')
+        assert 'T39' in tbl.key_index()
+
+        tbl.data = tbl.data[tbl.data['name'] != 'T39']
+        assert 'T39' not in tbl.key_index()
+        assert tbl.get_row('name', 'T39') is None
+
+        # Indexes are rebuilt after in-place edits once cleared
+        tbl.data.loc[tbl.data.index[0], 'name'] = 'T99'
+        tbl.clear_indexes()
+        assert tbl.get_row('name', 'T99') == query_row(tbl, 'T99')
+        pd.testing.assert_frame_equal(tbl.get_dataframe('T99'), query_dataframe(tbl, 'T99'))
+    finally:
+        remove_synth_db(dirname)
+
+def test_filter_indexes_match_queries():
+    dirname, db_path = make_synth_db()
+    try:
+        db = open_db(db_path)
+        tbl = db.get_table('COST')
+        filter_sets = ([{'name': key, 'cost_type': cost_type} for key in ['T01', 'T20', 'MISSING']
+                        for cost_type in ['capacity', 'energy', 'other']] +
+                       [{'cost_type': 'energy', 'gau': gau, 'vintage': vintage}
+                        for gau in ['ca', 'tx'] for vintage in [2020, 2040, 1999]] +
+                       [{'sensitivity': sens} for sens in ['high', '', 'none']] +
+                       [{'cost_type': None}, {'name': 'a"b', 'cost_type': 'energy'}])
+
+        for i in range(csvdb.table.INDEX_MIN_QUERIES + 1):
+            for filters in filter_sets:
+                assert_same(outcome(filter_query, tbl.data, filters), outcome(tbl.select_rows, filters),
+                            (i, filters))
+
+        counts = dict(tbl.hot_filters())
+        assert counts[('cost_type', 'name')] == 9 * (csvdb.table.INDEX_MIN_QUERIES + 1)
+        assert ('cost_type',) not in counts     # None can't be looked up in an index
+
+        # Once a combination of columns has been queried often enough, it's answered from its index
+        with Queries() as queries:
+            for filters in filter_sets[:-2]:
+                tbl.select_rows(filters)
+        assert queries.count == 0
+    finally:
+        remove_synth_db(dirname)
+
+def test_filter_index_built_after_repeated_queries():
+    dirname, db_path = make_synth_db()
+    try:
+        db = open_db(db_path)
+        tbl = db.get_table('COST')
+        filters = {'cost_type': 'energy', 'gau': 'tx'}
+        expected = filter_query(tbl.data, filters)
+
+        for i in range(csvdb.table.INDEX_MIN_QUERIES):
+            with Queries() as queries:
+                pd.testing.assert_frame_equal(expected, tbl.select_rows(filters))
+            assert queries.count == (1 if i + 1 < csvdb.table.INDEX_MIN_QUERIES else 0), i
+    finally:
+        remove_synth_db(dirname)
+
+def get_each_row(tbl, keys, **kwargs):
+    return {key: tbl.get_row('name', key, **kwargs) for key in keys}
+
+def test_get_rows_matches_get_row():
+    dirname, db_path = make_synth_db()
+    try:
+        db = open_db(db_path)
+        scenarios = [None] + make_scenarios()
+
+        for name in ('MAIN', 'COST', 'SIMPLE', 'COSTD'):
+            tbl = db.get_table(name)
+            keys = list(tbl.data['name'].unique())
+            filter_sets = [{}, {'cost_type': 'energy'}] if name == 'COST' else [{}]
+
+            for key_list in (keys, keys[::-3] + ['MISSING'], keys[:2] + keys[:2], OddKeys, []):
+                for scenario in scenarios:
+                    for filters in filter_sets:
+                        for kwargs in ({'allow_multiple': True, 'raise_error': False},
+                                       {'allow_multiple': True, 'raise_error': True}, {'raise_error': False}):
+                            context = (name, key_list, scenario and scenario.name, filters, kwargs)
+                            kwargs = dict(kwargs, scenario=scenario, **filters)
+                            expected = outcome(get_each_row, tbl, key_list, **kwargs)
+                            assert_same(expected, outcome(tbl.get_rows, 'name', key_list, **kwargs), context)
+                            assert_same(expected, outcome(db.get_rows, name, key_list, **kwargs), context)
+                            assert_same(expected, outcome(make_class(tbl).get_rows, key_list, **kwargs), context)
+
+            # Keys that can be looked up in the key index are found together
+            with RowLookups() as lookups:
+                tbl.get_rows('name', keys + ['MISSING'], allow_multiple=True, scenario=scenarios[-1])
+            assert lookups.count == 0, name
+    finally:
+        remove_synth_db(dirname)
+
+def test_misses_skip_row_selection():
+    dirname, db_path = make_synth_db()
+    try:
+        db = open_db(db_path)
+        tbl = db.get_table('COST')
+        filter_sets = ([{'name': key, 'cost_type': cost_type} for key in ['T01', 'T20', 'MISSING', "it's"]
+                        for cost_type in ['capacity', 'other']] +
+                       [{'cost_type': 'energy', 'gau': gau} for gau in ['ca', 'mx']] +
+                       [{'name': 'T01', 'vintage': 1999}, {'vintage': 2020}])
+
+        for i in range(csvdb.table.INDEX_MIN_QUERIES + 1):
+            for filters in filter_sets:
+                # A False result is exact; True only means that rows may match
+                if not tbl.has_rows(filters):
+                    assert len(filter_query(tbl.data, filters)) == 0, filters
+                tbl.select_rows(filters)
+
+        # Once the combinations are indexed, every miss is known
+        for filters in filter_sets:
+            assert tbl.has_rows(filters) == (len(filter_query(tbl.data, filters)) > 0), filters
+
+        # Rows and objects for missing keys are found to be missing without selecting rows
+        scenario = make_scenarios()[0]
+        for name in ('MAIN', 'COST', 'SIMPLE', 'COSTD'):
+            tbl = db.get_table(name)
+            cls = make_class(tbl)
+            with RowSelections() as selections:
+                assert tbl.get_row('name', 'MISSING') is None
+                obj = cls.load_from_db('MISSING', scenario)
+            assert selections.filters == [], (name, selections.filters)
+            assert obj._timeseries is None and obj._has_data is False
+
+            with RowSelections() as selections:
+                assert tbl.get_row('name', 'T01', allow_multiple=True) == query_row(tbl, 'T01')
+            assert selections.filters == [{'name': 'T01'}]
+    finally:
+        remove_synth_db(dirname)
+
+if __name__ == '__main__':
+    test_key_index_lookups_match_queries()
+    test_key_index_follows_data()
+    test_filter_indexes_match_queries()
+    test_filter_index_built_after_repeated_queries()
+    test_get_rows_matches_get_row()
+    test_misses_skip_row_selection()
+    print('Table lookup tests passed')
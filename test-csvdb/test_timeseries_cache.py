@@ -0,0 +1,125 @@
+#
+# Check that DataObjects loaded through the timeseries cache are the same as those loaded
+# without it, that repeated loads are cache hits, and that the cache's limits and
+# invalidation work.
+# Run directly as a script, or with "pytest --import-mode=importlib test-csvdb".
+#
+from os import path
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, path.dirname(path.realpath(__file__)))
+
+from csvdb.cache import TimeseriesCache
+from csvdb.error import CsvdbException
+from tst_synth import make_synth_db, remove_synth_db, open_db, make_scenarios, make_class, load_results, assert_same
+
+def object_results(results):
+    return {lookup: result for lookup, result in results.items() if lookup[0] == 'obj'}
+
+def test_cached_objects_match_uncached():
+    dirname, db_path = make_synth_db()
+    try:
+        expected = object_results(load_results(open_db(db_path), make_scenarios()))
+
+        db = open_db(db_path, timeseries_cache_entries=10000)
+        cache = db.timeseries_cache
+        scenarios = make_scenarios()
+
+        assert_same(expected, object_results(load_results(db, scenarios)))
+        cold = cache.stats()
+        assert cold['entries'] > 0 and cold['evictions'] == 0
+
+        # Everything stored is loaded from the cache the second time; only the lookups
+        # that raised an error, and so weren't stored, miss again.
+        assert_same(expected, object_results(load_results(db, scenarios)))
+        warm = cache.stats()
+        assert warm['entries'] == cold['entries']
+        assert warm['hits'] - cold['hits'] == cold['hits'] + cold['entries']
+        assert warm['misses'] - cold['misses'] == cold['misses'] - cold['entries']
+    finally:
+        remove_synth_db(dirname)
+
+def test_cache_hits_copy_timeseries():
+    dirname, db_path = make_synth_db()
+    try:
+        for copy_timeseries in (True, False):
+            db = open_db(db_path, timeseries_cache_entries=100, copy_timeseries=copy_timeseries)
+            scenario = make_scenarios()[0]
+            cls = make_class(db.get_table('SIMPLE'))
+
+            first = cls.load_from_db('T01', scenario)
+            second = cls.load_from_db('T01', scenario)
+            assert db.timeseries_cache.stats()['hits'] == 1
+            pd.testing.assert_frame_equal(first._timeseries, second._timeseries)
+            assert (first._timeseries is second._timeseries) == (not copy_timeseries)
+    finally:
+        remove_synth_db(dirname)
+
+def test_cache_limits():
+    dirname, db_path = make_synth_db()
+    try:
+        expected = object_results(load_results(open_db(db_path), make_scenarios()))
+
+        for kwargs in ({'timeseries_cache_entries': 3}, {'timeseries_cache_bytes': 5000},
+                       {'timeseries_cache_entries': 50, 'timeseries_cache_bytes': 20000}):
+            db = open_db(db_path, **kwargs)
+            cache = db.timeseries_cache
+            assert_same(expected, object_results(load_results(db, make_scenarios())), kwargs)
+
+            stats = cache.stats()
+            assert stats['evictions'] > 0, kwargs
+            assert stats['entries'] <= kwargs.get('timeseries_cache_entries', stats['entries'])
+            assert stats['bytes'] <= kwargs.get('timeseries_cache_bytes', stats['bytes'])
+            assert stats['bytes'] == sum(size for _, size in cache.entries.values())
+    finally:
+        remove_synth_db(dirname)
+
+def test_invalidate_drops_stale_entries():
+    dirname, db_path = make_synth_db()
+    try:
+        db = open_db(db_path, timeseries_cache_entries=100)
+        scenario = make_scenarios()[0]
+        tbl = db.get_table('SIMPLE')
+        cls = make_class(tbl)
+        assert cls.load_from_db('T02', scenario)._timeseries['value'].tolist() != [100, 100]
+        make_class(db.get_table('COSTD')).load_from_db('T02', scenario)
+
+        df = tbl.data.copy()
+        df.loc[df['name'] == 'T02', 'value'] = 100
+        tbl.data = df
+
+        assert db.timeseries_cache.invalidate('MISSING') == 0
+        db.invalidate_timeseries('SIMPLE')
+        assert len(db.timeseries_cache) == 1
+        assert cls.load_from_db('T02', scenario)._timeseries['value'].tolist() == [100, 100]
+    finally:
+        remove_synth_db(dirname)
+
+def test_lru_order():
+    cache = TimeseriesCache(max_entries=2)
+    cache.put(('A', 1), 'a1')
+    cache.put(('A', 2), 'a2')
+    assert cache.get(('A', 1)) == 'a1'      # ('A', 2) is now the least recently used
+    cache.put(('B', 1), 'b1')
+
+    assert cache.get(('A', 2)) is None
+    assert cache.get(('A', 1)) == 'a1' and cache.get(('B', 1)) == 'b1'
+    assert cache.stats()['evictions'] == 1
+
+    assert not TimeseriesCache(max_bytes=10).put(('A', 1), 'big', nbytes=11)
+
+    try:
+        TimeseriesCache(max_entries=0)
+        assert False, "expected CsvdbException"
+    except CsvdbException:
+        pass
+
+if __name__ == '__main__':
+    test_cached_objects_match_uncached()
+    test_cache_hits_copy_timeseries()
+    test_cache_limits()
+    test_invalidate_drops_stale_entries()
+    test_lru_order()
+    print('Timeseries cache tests passed')
@@ -0,0 +1,116 @@
+#
+# Check that timeseries sliced from a table's prebuilt timeseries frame are the same as
+# those cleaned per object by DataObject.timeseries_cleanup(), and that the frame is built
+# only once per table.
+# Run directly as a script, or with "pytest --import-mode=importlib test-csvdb".
+#
+from os import path
+import sys
+
+import numpy as np
+
+sys.path.insert(0, path.dirname(path.realpath(__file__)))
+
+from csvdb import DataObject
+from csvdb.table import CsvTable, SENSITIVITY_COL
+from tst_synth import (make_synth_db, remove_synth_db, open_db, make_scenarios, make_class, object_state,
+                       outcome, assert_same, CostTypes)
+
+TimeseriesTables = (('COST', [{'cost_type': cost_type} for cost_type in CostTypes]),
+                    ('SIMPLE', [{}]),
+                    ('COSTD', [{}, {'zone': 'ca'}]))
+
+class FrameBuilds(object):
+    """
+    Count the timeseries frames built while in use.
+    """
+    def __enter__(self):
+        self.count = 0
+        self.build = build = CsvTable._build_timeseries_frame
+
+        def counted(tbl):
+            self.count += 1
+            return build(tbl)
+
+        CsvTable._build_timeseries_frame = counted
+        return self
+
+    def __exit__(self, *args):
+        CsvTable._build_timeseries_frame = self.build
+
+def make_cleanup_class(tbl):
+    """
+    Return a DataObject subclass for the table that overrides timeseries_cleanup(), so that
+    each object's timeseries is cleaned separately rather than sliced from the table's frame.
+    """
+    base = make_class(tbl)
+
+    class Obj(base):
+        def timeseries_cleanup(self, timeseries):
+            return DataObject.timeseries_cleanup(self, timeseries)
+
+    return Obj
+
+def load_objects(cls, tbl, scenarios, filter_sets):
+    return {(key, scenario.name, tuple(filters.items())): outcome(
+                lambda: object_state(cls.load_from_db(key, scenario, **filters)))
+            for key in tbl.key_index() for scenario in scenarios for filters in filter_sets}
+
+def test_frame_slices_match_cleanup():
+    dirname, db_path = make_synth_db()
+    try:
+        for compact in (False, True):
+            db = open_db(db_path, compact=compact)
+            for name, _ in TimeseriesTables:
+                tbl = db.get_table(name)
+                md = tbl.metadata
+                obj = make_class(tbl)(None, None)
+                groups = [md.key_col, SENSITIVITY_COL] + (md.df_filters or [])
+
+                with FrameBuilds() as builds:
+                    for _, rows in tbl.expand(tbl.data).groupby(groups, sort=False):
+                        expected = obj.timeseries_cleanup(rows[list(set(md.df_cols) - {SENSITIVITY_COL})])
+                        assert_same(expected, tbl.get_timeseries(rows), (compact, name, rows.iloc[0][groups]))
+
+                assert builds.count == 1, name
+    finally:
+        remove_synth_db(dirname)
+
+def test_objects_match_cleanup():
+    dirname, db_path = make_synth_db()
+    try:
+        db = open_db(db_path)
+        scenarios = make_scenarios()
+        for name, filter_sets in TimeseriesTables:
+            tbl = db.get_table(name)
+            expected = load_objects(make_cleanup_class(tbl), tbl, scenarios, filter_sets)
+            with FrameBuilds() as builds:
+                assert_same(expected, load_objects(make_class(tbl), tbl, scenarios, filter_sets), name)
+            assert builds.count == 1, name
+    finally:
+        remove_synth_db(dirname)
+
+def test_missing_numeric_index_values_use_cleanup():
+    dirname, db_path = make_synth_db()
+    try:
+        db = open_db(db_path)
+        scenarios = make_scenarios()
+        tbl = db.get_table('COST')
+        df = tbl.data.copy()
+        df['vintage'] = df['vintage'].astype(float)
+        df.loc[df.index[::7], 'vintage'] = np.nan
+        tbl.data = df
+
+        # Cleaning the whole table would give a different index dtype, so there's no frame
+        assert tbl.timeseries_frame() is None
+        filter_sets = [{'cost_type': cost_type} for cost_type in CostTypes]
+        assert_same(load_objects(make_cleanup_class(tbl), tbl, scenarios, filter_sets),
+                    load_objects(make_class(tbl), tbl, scenarios, filter_sets))
+    finally:
+        remove_synth_db(dirname)
+
+if __name__ == '__main__':
+    test_frame_slices_match_cleanup()
+    test_objects_match_cleanup()
+    test_missing_numeric_index_values_use_cleanup()
+    print('Timeseries frame tests passed')
@@ -0,0 +1,150 @@
+#
+# Check that the dtype checkers in csvdb.check report the same bad values as testing each
+# value in turn, that columns whose dtype guarantees their values are valid aren't checked
+# value by value, and that each distinct string is checked once.
+# Run directly as a script, or with "pytest --import-mode=importlib test-csvdb".
+#
+from decimal import Decimal
+from os import path
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, path.dirname(path.realpath(__file__)))
+
+from csvdb import check
+from csvdb.check import _check_fns, _Bool
+
+def scan_bool(series, nullable):
+    bad = []
+    for i, value in series.items():
+        if value is None and nullable:
+            continue
+        if not isinstance(value, (bool, np.bool_)) and (not isinstance(value, str) or value.lower() not in _Bool):
+            bad.append((i, value))
+    return bad
+
+def scan_str(series, nullable):
+    return [(i, value) for i, value in series.items()
+            if not (value is None and nullable) and not isinstance(value, str)]
+
+def scan_type(aType):
+    def scan(series, nullable):
+        bad = []
+        for i, value in series.items():
+            if value is None and nullable:
+                continue
+            try:
+                aType(value)
+            except:
+                bad.append((i, value))
+        return bad
+
+    return scan
+
+# The checkers as they were, testing each value in turn
+Scans = {
+    'int'   : scan_type(int),
+    'float' : scan_type(float),
+    'bool'  : scan_bool,
+    'str'   : scan_str,
+}
+
+Pool = np.array(['1', ' 2 ', '1.5', 'x', 'True', 'no', 'YES', '', 'nan', 'inf', '1_000', '1e3',
+                 None, np.nan, 1, 2.5, True, np.float64('inf'), np.bool_(False), np.int64(4), pd.NA,
+                 Decimal('1.5'), Decimal('nan'), 2**70, np.float32('nan'), pd.Timestamp('2020-01-01'),
+                 -0.0, np.str_('7')], dtype=object)
+
+def make_series(seed=0, count=300):
+    """
+    Return series of various dtypes, holding values drawn from Pool, strings, numbers
+    with NaN and infinity, booleans and nullable integers, with shuffled indexes.
+    """
+    rng = np.random.default_rng(seed)
+    series = []
+    for _ in range(count):
+        n = int(rng.integers(0, 30))
+        kind = rng.integers(0, 8)
+        if kind == 0:
+            s = pd.Series(list(rng.choice(Pool, n)), dtype=object)
+        elif kind == 1:
+            s = pd.Series(rng.choice(['1', 'a', 'true', None], n), dtype='str')
+        elif kind == 2:
+            s = pd.Series(rng.integers(0, 9, n))
+        elif kind == 3:
+            s = pd.Series(np.where(rng.random(n) < 0.2, np.nan, rng.random(n) * 10))
+        elif kind == 4:
+            s = pd.Series(np.where(rng.random(n) < 0.2, np.inf, rng.random(n)))
+        elif kind == 5:
+            s = pd.Series(rng.random(n) < 0.5)
+        elif kind == 6:
+            s = pd.Series(pd.array(rng.integers(0, 3, n), dtype='Int64')).where(rng.random(n) < 0.7)
+        else:
+            s = pd.Series(list(rng.choice(Pool[:12], n)), dtype=object)
+
+        s.index = rng.permutation(n) * 3
+        series.append(s)
+
+    return series
+
+def same_value(x, y):
+    return type(x) == type(y) and (x is y or x == y or (x != x and y != y))
+
+def test_checkers_match_scan():
+    for series in make_series():
+        for name, check_fn in _check_fns.items():
+            for nullable in (True, False):
+                expected = Scans[name](series, nullable)
+                bad = check_fn(series, nullable)
+                assert len(bad) == len(expected) and \
+                    all(i == j and same_value(x, y) for (i, x), (j, y) in zip(expected, bad)), \
+                    (name, nullable, series.dtype, series.tolist(), expected, bad)
+
+class Conversions(object):
+    """
+    Record the values passed to the int and float conversion tests while in use.
+    """
+    def __enter__(self):
+        self.values = []
+        self.tests = (check._converts_to_int, check._converts_to_float)
+
+        def recorded(test):
+            def record(value):
+                self.values.append(value)
+                return test(value)
+            return record
+
+        check._converts_to_int, check._converts_to_float = map(recorded, self.tests)
+        return self
+
+    def __exit__(self, *args):
+        check._converts_to_int, check._converts_to_float = self.tests
+
+def test_values_are_checked_once():
+    columns = [pd.Series(np.arange(1000)),
+               pd.Series(np.arange(1000) / 3),
+               pd.Series(np.arange(1000) % 2 == 0),
+               pd.Series(list(range(500)) + [None] * 500, dtype=object)]
+
+    with Conversions() as tests:
+        assert _check_fns['int'](columns[0], False) == []
+        assert _check_fns['float'](columns[1], False) == []
+        assert _check_fns['float'](columns[2], False) == []
+        assert _check_fns['bool'](columns[2], False) == []
+        assert _check_fns['int'](columns[3], True) == []
+        assert _check_fns['str'](columns[1], False) == list(columns[1].items())
+    assert tests.values == []
+
+    # Each distinct string is converted once, in order of first appearance
+    strings = pd.Series(['1', 'x', '2', '1', 'x', None] * 100, dtype=object)
+    with Conversions() as tests:
+        bad = _check_fns['int'](strings, True)
+    assert tests.values == ['1', 'x', '2']
+    assert bad == Scans['int'](strings, True)
+    assert len(bad) == 200
+
+if __name__ == '__main__':
+    test_checkers_match_scan()
+    test_values_are_checked_once()
+    print('Type check tests passed')
@@ -0,0 +1,122 @@
+#
+# Check that check_value_list() finds the same bad values, in the same order, as scanning
+# the column once for each distinct value, and that validation checks columns against
+# each rule's hashed set of values.
+# Run directly as a script, or with "pytest --import-mode=importlib test-csvdb".
+#
+import contextlib
+import io
+from os import path
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, path.dirname(path.realpath(__file__)))
+
+from csvdb import CsvDatabase
+from csvdb.check import ValidationInfo
+from tst_validation import make_validation_db, remove_validation_db, open_db
+
+def scan_values(series, values):
+    """
+    Find the values of `series` not in `values` as check_value_list() did, by testing
+    each distinct value against the list and scanning the column for each bad one.
+    """
+    if len(series) == 0:
+        return None
+
+    bad = []
+    for val in series.unique():
+        if val not in values:
+            bad += [(i, val) for i in series[series == val].index]
+
+    return bad
+
+def make_cases(seed=0, count=30):
+    """
+    Return (series, values) pairs of columns of various dtypes, with shuffled indexes,
+    and lists of legal values of mixed types.
+    """
+    rng = np.random.default_rng(seed)
+    mixed = np.array(['a', 1, 1.0, True, None, np.nan, 'b', 2.5], dtype=object)
+    legal = np.array(['a', 'c', 1, 3, 2.5, None, False], dtype=object)
+    cases = []
+    for dtype in ('str', object, 'int64', 'float64', 'bool'):
+        for _ in range(count):
+            n = int(rng.integers(0, 50))
+            if dtype == 'str':
+                series = pd.Series(rng.choice(['a', 'b', 'c', 'd', None], n), dtype='str')
+            elif dtype == object:
+                series = pd.Series(list(rng.choice(mixed, n)), dtype=object)
+            elif dtype == 'bool':
+                series = pd.Series(rng.random(n) < 0.5)
+            else:
+                series = pd.Series(rng.integers(0, 5, n).astype(dtype))
+
+            series.index = rng.permutation(n) + 10
+            cases.append((series, list(rng.choice(legal, int(rng.integers(0, 5))))))
+
+    return cases
+
+def test_value_list_matches_scan():
+    for series, values in make_cases():
+        expected = scan_values(series, values)
+        for legal in (values, set(values), frozenset(values)):
+            bad = CsvDatabase.check_value_list(series, legal)
+            assert bad == expected, (series.tolist(), values)
+            assert [type(value) for _, value in bad or []] == [type(value) for _, value in expected or []]
+
+    # Unhashable legal values are searched as a list
+    series = pd.Series(['a', 'b', 'c', 'a'], dtype=object)
+    values = [[1], 'b']
+    assert CsvDatabase.check_value_list(series, values) == scan_values(series, values) == \
+        [(0, 'a'), (3, 'a'), (2, 'c')]
+
+class ValueLists(object):
+    """
+    Record the legal values passed to check_value_list() while in use.
+    """
+    def __enter__(self):
+        self.values = []
+        self.method = method = CsvDatabase.__dict__['check_value_list']
+
+        def record(series, values):
+            self.values.append(values)
+            return method.__func__(series, values)
+
+        CsvDatabase.check_value_list = staticmethod(record)
+        return self
+
+    def __exit__(self, *args):
+        CsvDatabase.check_value_list = self.method
+
+def test_validation_uses_value_sets():
+    dirname, db_path, pkg_name = make_validation_db()
+    try:
+        db = open_db(db_path)
+        val_dict = db.read_validation_csv(pkg_name)
+        infos = [info for info in val_dict.values() if isinstance(info, ValidationInfo) and info.values]
+        assert infos
+        for info in infos:
+            assert info.value_set == frozenset(info.values)
+            assert info.value_set is info.value_set
+
+        output = io.StringIO()
+        with ValueLists() as checked, contextlib.redirect_stdout(output):
+            db.validate(pkg_name, save_changes=False)
+
+        assert checked.values and all(type(values) is frozenset for values in checked.values)
+        with open(path.join(dirname, 'cleaning_errors.txt')) as f:
+            errors = f.read()
+
+        # Bad values are reported at their lines, counting the header
+        assert "Value 'p9' at line 4 not found in reference column PARENT.name" in errors
+        assert "Value 'Z' at line 3 not found in reference column PARENT.type" in errors
+    finally:
+        remove_validation_db(dirname)
+
+if __name__ == '__main__':
+    test_value_list_matches_scan()
+    test_validation_uses_value_sets()
+    print('Value list tests passed')
@@ -0,0 +1,213 @@
+#
+# A small generated database with sensitivities, used by the tests of scenarios,
+# DataObjects and table lookups. MAIN has a duplicate key and rows that refer to other
+# rows by reference_name; COST, SIMPLE and COSTD (a .csvd directory) hold timeseries
+# with several sensitivities, and the shapes in ShapeData have two sensitivities each.
+#
+import copy
+import gzip
+import os
+from os import path
+import random
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from csvdb import CsvDatabase, CsvMetadata, DataObject
+from csvdb.scenario import AbstractScenario, CsvdbFilter
+
+Metadata = [
+    CsvMetadata('MAIN', drop_cols=['notes']),
+    CsvMetadata('COST', df_filters=['cost_type'], df_cols=['sensitivity', 'gau', 'vintage', 'value'],
+                drop_cols=['source', 'notes']),
+    CsvMetadata('SIMPLE', df_cols=['sensitivity', 'year', 'value']),
+    CsvMetadata('COSTD', df_cols=['sensitivity', 'zone', 'year', 'value']),
+]
+
+Names = ['T%02d' % i for i in range(40)]
+
+CostTypes = ['capacity', 'energy']
+
+# (name, filters) for scenarios; each filter gives CsvdbFilter's arguments
+Scenarios = [
+    ('s1', [('COST', 'T01', 'high', [('cost_type', 'capacity')]),
+            ('SIMPLE', 'T01', 'alt', None),
+            ('COSTD', 'T03', 'hi', None)]),
+    ('s2', [('COST', 'T02', 'low', [('cost_type', 'energy')]),
+            ('COST', 'T02', 'nope', [('cost_type', 'capacity')]),
+            ('SIMPLE', 'T01', 'alt', None)]),
+]
+
+def write_synth_db(db_path, seed=1):
+    rand = random.Random(seed)
+    os.makedirs(path.join(db_path, 'ShapeData'))
+    os.makedirs(path.join(db_path, 'COSTD.csvd'))
+
+    with open(path.join(db_path, 'MAIN.csv'), 'w') as f:
+        f.write('name,type,reference_name,size,flag,notes\n')
+        for i, name in enumerate(Names):
+            ref = Names[i - 1] if i % 7 == 3 else ''
+            size = '' if i % 5 == 0 else i * 1.5
+            f.write('{},{},{},{},{},note {}\n'.format(name, rand.choice('ABC'), ref, size,
+                                                     rand.choice(['True', 'False', '']), i))
+        f.write('T05,B,,9,True,duplicate\n')
+
+    with open(path.join(db_path, 'COST.csv'), 'w') as f:
+        f.write('name,source,notes,cost_type,geography,gau,unit,vintage,value,sensitivity\n')
+        for name in Names:
+            for cost_type in CostTypes:
+                for sens in (['', 'high', 'low'] if name < 'T10' else ['']):
+                    for gau in ('ca', 'tx'):
+                        for vintage in (2020, 2030, 2040):
+                            f.write('{},src,,{},state,{},kw,{},{},{}\n'.format(
+                                name, cost_type, gau, vintage, rand.randint(1, 999), sens))
+
+    with open(path.join(db_path, 'SIMPLE.csv'), 'w') as f:
+        f.write('name,region,year,value,sensitivity,notes\n')
+        for name in Names[:10]:
+            for year in (2020, 2021):
+                f.write('{},r1,{},{},,n\n'.format(name, year, rand.randint(1, 9)))
+                if name == 'T01':
+                    f.write('{},r1,{},{},alt,\n'.format(name, year, rand.randint(1, 9)))
+
+    for part in range(2):
+        with open(path.join(db_path, 'COSTD.csvd', 'part{}.csv'.format(part)), 'w') as f:
+            f.write('name,zone,year,value,sensitivity,notes\n')
+            for name in Names[part * 20:(part + 1) * 20]:
+                for year in (2020, 2030):
+                    f.write('{},ca,{},{},,\n'.format(name, year, rand.random()))
+                    f.write('{},ca,{},{},hi,x\n'.format(name, year, rand.random()))
+
+    for shape in ('shapeA', 'shapeB', 'shapeC'):
+        with gzip.open(path.join(db_path, 'ShapeData', shape + '.csv.gz'), 'wt') as f:
+            f.write('gau,weather_datetime,value,sensitivity\n')
+            for hour in range(48):
+                for sens in ('', 's1'):
+                    f.write('ca,2012-01-{:02d} {:02d}:00,{},{}\n'.format(1 + hour // 24, hour % 24,
+                                                                          rand.random(), sens))
+
+def make_synth_db():
+    """
+    Write the database to a new temporary directory.
+
+    :return: (tuple of (str, str)) the temporary directory and the database's pathname
+    """
+    dirname = tempfile.mkdtemp()
+    db_path = path.join(dirname, 'synth.csvdb')
+    write_synth_db(db_path)
+    return dirname, db_path
+
+def remove_synth_db(dirname):
+    shutil.rmtree(dirname)
+
+def open_db(db_path, **kwargs):
+    """
+    Return a new CsvDatabase for the database, which is also the current database
+    used by DataObjects and scenarios.
+    """
+    CsvDatabase.clear_cached_database()
+    return CsvDatabase.get_database(db_path, metadata=copy.deepcopy(Metadata), **kwargs)
+
+class Scenario(AbstractScenario):
+    """
+    A scenario built from a list of filters rather than read from a file.
+    """
+    def __init__(self, name, filters):
+        self.name = name
+        self.filter_dict = {}
+        for args in filters:
+            self.add_filter(CsvdbFilter(*args))
+
+def make_scenarios():
+    """
+    Return a scenario with no filters followed by those described by `Scenarios`.
+    Requires the database to be open.
+    """
+    return [Scenario('reference', [])] + [Scenario(name, filters) for name, filters in Scenarios]
+
+def make_class(tbl):
+    """
+    Return a DataObject subclass for the table, which stores its attributes in a dict.
+    """
+    md = tbl.metadata
+
+    class Obj(DataObject):
+        _instances_by_key = {}
+        _table_name = tbl.name
+        _key_col = md.key_col
+
+        def init_from_tuple(self, tup, scenario, **kwargs):
+            self.attrs = dict(zip(md.attr_cols, tup))
+
+    Obj.__name__ = tbl.name
+    return Obj
+
+def object_state(obj):
+    return getattr(obj, 'attrs', None), obj._timeseries, getattr(obj, '_has_data', None)
+
+def outcome(func, *args, **kwargs):
+    """
+    Call the function, returning ('ok', result) or, if it raises an exception,
+    ('error', exception class name, message), so that failures can be compared too.
+    """
+    try:
+        return 'ok', func(*args, **kwargs)
+    except Exception as e:
+        return 'error', type(e).__name__, str(e)
+
+def assert_same(expected, value, context=None):
+    """
+    Check that two values are equal, comparing DataFrames, Series and arrays exactly
+    (including their types), and the members of tuples, lists and dicts recursively.
+    """
+    assert type(expected) is type(value), (context, type(expected), type(value))
+
+    if isinstance(expected, pd.DataFrame):
+        pd.testing.assert_frame_equal(expected, value, obj=str(context))
+    elif isinstance(expected, pd.Series):
+        pd.testing.assert_series_equal(expected, value, obj=str(context))
+    elif isinstance(expected, np.ndarray):
+        np.testing.assert_array_equal(expected, value, err_msg=str(context))
+    elif isinstance(expected, (tuple, list)):
+        assert len(expected) == len(value), (context, expected, value)
+        for i, (x, y) in enumerate(zip(expected, value)):
+            assert_same(x, y, (context, i))
+    elif isinstance(expected, dict):
+        assert list(expected) == list(value), (context, list(expected), list(value))
+        for key in expected:
+            assert_same(expected[key], value[key], (context, key))
+    elif isinstance(expected, float) and np.isnan(expected):
+        assert np.isnan(value), (context, value)
+    else:
+        assert expected == value, (context, expected, value)
+
+def load_results(db, scenarios):
+    """
+    Look up every key (and a missing one) of each of the tables in `Metadata` with
+    get_row() and get_dataframe(), and load a DataObject for each key in each scenario,
+    for each cost type in COST.
+
+    :return: (dict) a tuple describing each lookup => the outcome() of the lookup
+    """
+    results = {}
+    for name in [md.table_name for md in Metadata]:
+        tbl = db.get_table(name)
+        cls = make_class(tbl)
+        keys = sorted(set(tbl.data['name'])) + ['MISSING']
+        filter_sets = [{'cost_type': cost_type} for cost_type in CostTypes] if name == 'COST' else [{}]
+
+        for key in keys:
+            results[('df', name, key)] = outcome(tbl.get_dataframe, key)
+
+            for filters in filter_sets:
+                items = tuple(sorted(filters.items()))
+                results[('row', name, key, items)] = outcome(tbl.get_row, 'name', key, allow_multiple=True,
+                                                             **filters)
+
+                for scenario in scenarios:
+                    results[('obj', scenario.name, name, key, items)] = outcome(
+                        lambda: object_state(cls.load_from_db(key, scenario, **filters)))
+
+    return results
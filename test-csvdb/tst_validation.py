@@ -0,0 +1,79 @@
+#
+# A small database and validation package used by the validation and cleaning tests.
+# CHILD rows reference PARENT names; both tables hold values that clean_table() reports
+# or fixes: blanks to trim, an empty row and column, bad types, and unknown references.
+#
+import os
+from os import path
+import sys
+import tempfile
+
+from csvdb import CsvDatabase
+
+Tables = {
+    'PARENT': ['name,type,size,notes',
+               'p1,A,1.5,',
+               ' p2 ,B,2,first  note',
+               'p3,C,x,',
+               ',,,',
+               'p4,A,,'],
+
+    'CHILD':  ['name,parent,year,value,Unnamed: 4',
+               'c1,p1,2020,1.0,',
+               'c2,p2,2021,2.5,',
+               'c3,p9,2022,3,',
+               'c4,p1,20x,,',
+               'c5,p3,2030,1e3,'],
+
+    'OTHER':  ['name,kind',
+               'o1,A',
+               'o2,Z'],
+}
+
+Validation = ['table_name,column_name,not_null,linked_column,dtype,folder,referenced_table,referenced_field,'
+              'referenced_table2,referenced_field2,cascade_delete,additional_valid_inputs,_c_1',
+              ',value,TRUE,,float,,,,,,,,',
+              ',year,,,int,,,,,,,,',
+              'PARENT,type,,,,,,,,,,A,B',
+              'PARENT,size,,,float,,,,,,,,',
+              'PARENT,notes,,,str,,,,,,,,',
+              'CHILD,parent,,,,,PARENT,name,,,TRUE,,',
+              'OTHER,kind,,,,,PARENT,type,,,,,']
+
+def write_lines(pathname, lines):
+    with open(pathname, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+def make_validation_db(tables=None, validation=None):
+    """
+    Write the tables and validation.csv to a new temporary directory, holding the database
+    "db.csvdb" and a validation package named for the directory, which is importable.
+
+    :return: (tuple of (str, str, str)) the temporary directory, the database's pathname,
+       and the name of the validation package
+    """
+    dirname = tempfile.mkdtemp()
+    db_path = path.join(dirname, 'db.csvdb')
+    pkg_name = 'tstpkg_' + path.basename(dirname).replace('-', '_')
+    os.makedirs(db_path)
+    os.makedirs(path.join(dirname, pkg_name, 'etc'))
+
+    for name, lines in (tables or Tables).items():
+        write_lines(path.join(db_path, name + '.csv'), lines)
+
+    write_lines(path.join(dirname, pkg_name, '__init__.py'), [''])
+    write_lines(path.join(dirname, pkg_name, 'etc', 'validation.csv'), validation or Validation)
+
+    sys.path.insert(0, dirname)
+    return dirname, db_path, pkg_name
+
+def remove_validation_db(dirname):
+    import shutil
+
+    if dirname in sys.path:
+        sys.path.remove(dirname)
+    shutil.rmtree(dirname)
+
+def open_db(db_path, **kwargs):
+    CsvDatabase.clear_cached_database()
+    return CsvDatabase(pathname=db_path, metadata=[], load=False, **kwargs)